@@ -0,0 +1,140 @@
+"""
+Admission Control
+Backpressure for the recommendation endpoints
+- AdmissionController: at most `max_concurrent` requests run; up to
+  `max_queue` more wait (for at most `queue_timeout` seconds); anything
+  beyond is rejected at once with 503 instead of queueing unbounded work
+- ClientRateLimiter: a token bucket per client (bounded LRU of clients) -> 429
+- Degraded mode: while the API is under pressure, requests skip LLM calls
+  and URL scraping and are served by plain retrieval
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from app.gemini_client import TokenBucket
+
+
+class Overloaded(Exception):
+    """Raised when a request cannot be admitted; carries a Retry-After hint"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Concurrency limiter with a bounded wait queue and a pressure signal
+    Pressure = running at `degrade_at` of capacity or anyone queued; degraded
+    mode lasts until `cooldown` seconds after the last pressure
+    """
+
+    def __init__(self, max_concurrent: int = 8, max_queue: int = 16, queue_timeout: float = 2.0,
+                 degrade_at: float = 0.75, cooldown: float = 5.0):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.degrade_at = degrade_at
+        self.cooldown = cooldown
+        self.active = 0
+        self.waiting = 0
+        self.pressure_at = None
+        self.stats_counts = {"admitted": 0, "queued": 0, "rejected_full": 0, "rejected_timeout": 0, "served_degraded": 0}
+        self._semaphore = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._semaphore
+
+    def _note_pressure(self):
+        if self.waiting > 0 or self.active >= self.degrade_at * self.max_concurrent:
+            self.pressure_at = time.monotonic()
+
+    def degraded(self) -> bool:
+        """Under pressure now, or recently enough that load may come straight back"""
+        return self.pressure_at is not None and time.monotonic() - self.pressure_at < self.cooldown
+
+    async def acquire(self):
+        """Take a slot, waiting in the bounded queue if needed; raises Overloaded"""
+        semaphore = self._get_semaphore()
+        if semaphore.locked():
+            if self.waiting >= self.max_queue:
+                self.stats_counts["rejected_full"] += 1
+                self.pressure_at = time.monotonic()
+                raise Overloaded("Server busy - queue full", self.queue_timeout)
+            self.waiting += 1
+            self.stats_counts["queued"] += 1
+            self._note_pressure()
+            try:
+                await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.stats_counts["rejected_timeout"] += 1
+                raise Overloaded("Server busy - timed out waiting for a slot", self.queue_timeout)
+            finally:
+                self.waiting -= 1
+        else:
+            await semaphore.acquire()
+        self.active += 1
+        self.stats_counts["admitted"] += 1
+        self._note_pressure()
+
+    def release(self):
+        self.active -= 1
+        self._get_semaphore().release()
+
+    def releaser(self) -> Callable[[], None]:
+        """release() for one slot that may be given back from several exit paths - only the first call counts"""
+        released = False
+
+        def release_once():
+            nonlocal released
+            if not released:
+                released = True
+                self.release()
+
+        return release_once
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "degraded": self.degraded(),
+            **self.stats_counts,
+        }
+
+
+class ClientRateLimiter:
+    """Per-client token buckets: `rate` requests/second with bursts of `burst`"""
+
+    def __init__(self, rate: float = 2.0, burst: float = 10.0, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self.limited = 0
+
+    def check(self, client: str) -> Optional[float]:
+        """None if the request may proceed, else seconds until the client's next token"""
+        bucket = self.buckets.get(client)
+        if bucket is None:
+            bucket = self.buckets[client] = TokenBucket(self.rate, self.burst)
+            if len(self.buckets) > self.max_clients:
+                # Forget the least recently seen client - it comes back with a full bucket
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(client)
+        if bucket.try_acquire():
+            return None
+        self.limited += 1
+        return bucket.wait_time()
+
+    def stats(self) -> dict:
+        return {"rate": self.rate, "burst": self.burst, "clients": len(self.buckets), "limited": self.limited}
@@ -0,0 +1,262 @@
+"""
+ANN Index
+Approximate search for catalogs far beyond the ~377 scraped items
+- ivf: spherical k-means coarse quantizer; a query scans only the rows of its
+  `nprobe` closest lists (numpy only, rows come from the shared .npy export)
+- hnsw: graph index from hnswlib (optional dependency), searched with `ef`
+
+Build parameters (nlist / M, ef_construction) are fixed when the index is
+written; search parameters (nprobe / ef) are set per process
+Usage: python -m app.ann_index ivf --params nlist=64   (or: hnsw --params M=16,ef_construction=200)
+"""
+
+import argparse
+import os
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from app.retrieval import EMBEDDINGS_FILE, MmapRetriever
+
+
+ANN_KINDS = ("ivf", "hnsw")
+ANN_FILES = {"ivf": "catalog_ivf.npz", "hnsw": "catalog_hnsw.bin"}
+DEFAULT_SEARCH_PARAMS = {"ivf": {"nprobe": 8}, "hnsw": {"ef": 64}}
+# Chroma's own HNSW ef_search is part of the collection config, set by rag.py at build time
+CHROMA_EF_ENV = "SHL_CHROMA_EF_SEARCH"
+DEFAULT_BUILD_PARAMS = {"ivf": {"nlist": 0, "iterations": 10}, "hnsw": {"M": 16, "ef_construction": 200}}
+# k-means is trained on a sample; assignment of every row runs in blocks
+KMEANS_SAMPLE_PER_LIST = 64
+ASSIGN_BLOCK = 65536
+
+
+def parse_params(spec: str) -> Dict[str, int]:
+    """"nprobe=16" / "M=32,ef_construction=400" -> dict of ints"""
+    params = {}
+    for part in spec.split(","):
+        if part.strip():
+            name, _, value = part.partition("=")
+            try:
+                params[name.strip()] = int(value)
+            except ValueError:
+                raise ValueError(f"Invalid parameter {part.strip()!r} in {spec!r} - expected name=<integer>")
+    return params
+
+
+def validate_search_params(mode: str, params: Dict[str, int]):
+    """
+    Fail fast (at startup) on search parameters the selected index cannot take
+    Only ivf (nprobe) and hnsw (ef) are tuned per process
+    """
+    if not params:
+        return
+    if mode not in ANN_KINDS:
+        hint = f" - set Chroma's ef_search at build time with {CHROMA_EF_ENV}" if mode == "chroma" else ""
+        raise ValueError(f"SHL_INDEX={mode} takes no search parameters, got {sorted(params)}{hint}")
+    unknown = sorted(set(params) - set(DEFAULT_SEARCH_PARAMS[mode]))
+    if unknown:
+        raise ValueError(f"SHL_INDEX={mode} takes {sorted(DEFAULT_SEARCH_PARAMS[mode])}, got {unknown}")
+    for name, value in params.items():
+        if value < 1:
+            raise ValueError(f"{name} must be >= 1, got {value}")
+
+
+def default_nlist(n: int) -> int:
+    """~sqrt(n) lists keeps both the centroid scan and each list short"""
+    return max(1, int(round(np.sqrt(n))))
+
+
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Closest centroid (max cosine) of every row, computed block by block"""
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_BLOCK):
+        block = np.asarray(vectors[start:start + ASSIGN_BLOCK], dtype=np.float32)
+        labels[start:start + ASSIGN_BLOCK] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+def train_centroids(vectors: np.ndarray, nlist: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on a sample; empty lists are re-seeded from random rows"""
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    sample_size = min(n, nlist * KMEANS_SAMPLE_PER_LIST)
+    sample = np.asarray(vectors[np.sort(rng.choice(n, sample_size, replace=False))], dtype=np.float32)
+    centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+    for _ in range(iterations):
+        labels = assign_lists(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        empty = np.bincount(labels, minlength=nlist) == 0
+        sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+        centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+    return centroids.astype(np.float32)
+
+
+def build_ivf(vectors: np.ndarray, nlist: int = 0, iterations: int = 10, seed: int = 0) -> dict:
+    """Centroids plus inverted lists: row ids sorted by list, with list offsets"""
+    nlist = min(nlist or default_nlist(len(vectors)), len(vectors))
+    centroids = train_centroids(vectors, nlist, iterations, seed)
+    labels = assign_lists(vectors, centroids)
+    row_ids = np.argsort(labels, kind="stable").astype(np.int32)
+    offsets = np.zeros(nlist + 1, dtype=np.int64)
+    np.cumsum(np.bincount(labels, minlength=nlist), out=offsets[1:])
+    return {"centroids": centroids, "row_ids": row_ids, "offsets": offsets}
+
+
+class IVFRetriever(MmapRetriever):
+    """
+    Inverted-file search
+    - centroids are scored first, then only the rows of the `nprobe` best
+      lists are scored exactly against the memory-mapped float32 vectors
+    - nprobe = nlist is an exact (slower) search
+    """
+
+    def __init__(self, embeddings: np.ndarray, ivf: dict, encoder, nprobe: int = 8):
+        self.embeddings = embeddings
+        self.encoder = encoder
+        self.centroids = np.asarray(ivf["centroids"])
+        self.row_ids = np.asarray(ivf["row_ids"])
+        self.offsets = np.asarray(ivf["offsets"])
+        self.set_search_params(nprobe=nprobe)
+
+    @classmethod
+    def load(cls, index_dir: str, encoder, nprobe: int = 8) -> "IVFRetriever":
+        embeddings = np.load(os.path.join(index_dir, EMBEDDINGS_FILE), mmap_mode="r")
+        with np.load(os.path.join(index_dir, ANN_FILES["ivf"])) as data:
+            ivf = {name: data[name] for name in data.files}
+        return cls(embeddings, ivf, encoder, nprobe)
+
+    def set_search_params(self, nprobe: int = None):
+        if nprobe is not None:
+            if nprobe < 1:
+                raise ValueError("nprobe must be >= 1")
+            self.nprobe = min(nprobe, len(self.centroids))
+
+    def resident_bytes(self) -> int:
+        """Index overhead on top of the shared vectors"""
+        return self.centroids.nbytes + self.row_ids.nbytes + self.offsets.nbytes
+
+    def candidates(self, query_vector: np.ndarray) -> np.ndarray:
+        scores = self.centroids @ query_vector
+        probes = np.argpartition(-scores, self.nprobe - 1)[:self.nprobe]
+        rows = np.concatenate([self.row_ids[self.offsets[p]:self.offsets[p + 1]] for p in probes])
+        # Sorted rows read the memory map front to back
+        return np.sort(rows)
+
+    def search_vectors(self, query_vectors: np.ndarray, k: int) -> dict:
+        ids, distances = [], []
+        for query_vector in query_vectors:
+            rows = self.candidates(query_vector)
+            scores = np.asarray(self.embeddings[rows]) @ query_vector
+            top = min(k, len(rows))
+            best = np.argpartition(-scores, top - 1)[:top] if top else np.array([], dtype=np.int64)
+            best = best[np.argsort(-scores[best])]
+            ids.append([str(i) for i in rows[best]])
+            distances.append((2.0 - 2.0 * scores[best]).tolist())
+        return {"ids": ids, "distances": distances}
+
+
+def _hnswlib():
+    try:
+        import hnswlib
+    except ImportError:
+        raise ImportError("SHL_INDEX=hnsw needs hnswlib: pip install hnswlib") from None
+    return hnswlib
+
+
+def build_hnsw(vectors: np.ndarray, M: int = 16, ef_construction: int = 200, seed: int = 0):
+    """hnswlib graph over inner product (= cosine for unit vectors)"""
+    hnswlib = _hnswlib()
+    index = hnswlib.Index(space="ip", dim=vectors.shape[1])
+    index.init_index(max_elements=len(vectors), M=M, ef_construction=ef_construction, random_seed=seed)
+    for start in range(0, len(vectors), ASSIGN_BLOCK):
+        block = np.asarray(vectors[start:start + ASSIGN_BLOCK], dtype=np.float32)
+        index.add_items(block, np.arange(start, start + len(block)))
+    return index
+
+
+class HNSWRetriever(MmapRetriever):
+    """
+    Graph search through hnswlib
+    - `ef` is the candidate list size: higher means better recall, slower queries
+    - the graph holds its own copy of the vectors; the .npy export is only mapped
+    """
+
+    def __init__(self, embeddings: np.ndarray, index, encoder, ef: int = 64):
+        self.embeddings = embeddings
+        self.index = index
+        self.encoder = encoder
+        self.set_search_params(ef=ef)
+
+    @classmethod
+    def load(cls, index_dir: str, encoder, ef: int = 64) -> "HNSWRetriever":
+        embeddings = np.load(os.path.join(index_dir, EMBEDDINGS_FILE), mmap_mode="r")
+        index = _hnswlib().Index(space="ip", dim=embeddings.shape[1])
+        index.load_index(os.path.join(index_dir, ANN_FILES["hnsw"]), max_elements=len(embeddings))
+        return cls(embeddings, index, encoder, ef)
+
+    def set_search_params(self, ef: int = None):
+        if ef is not None:
+            if ef < 1:
+                raise ValueError("ef must be >= 1")
+            self.ef = ef
+            self.index.set_ef(ef)
+
+    def search_vectors(self, query_vectors: np.ndarray, k: int) -> dict:
+        k = min(k, len(self))
+        # hnswlib cannot return more results than its candidate list
+        if self.ef < k:
+            self.index.set_ef(k)
+        labels, ip_distances = self.index.knn_query(np.asarray(query_vectors, dtype=np.float32), k=k)
+        if self.ef < k:
+            self.index.set_ef(self.ef)
+        # "ip" distance is 1 - cos; Chroma's L2 scale is 2 - 2cos
+        return {
+            "ids": [[str(i) for i in row] for row in labels],
+            "distances": (2.0 * ip_distances).tolist(),
+        }
+
+
+def build_ann_index(index_dir: str, kind: str, **params):
+    """Build an ANN index over the exported embeddings and save it next to them"""
+    if kind not in ANN_KINDS:
+        raise ValueError(f"Unknown ANN index: {kind}")
+    embeddings = np.load(os.path.join(index_dir, EMBEDDINGS_FILE), mmap_mode="r")
+    build_params = {**DEFAULT_BUILD_PARAMS[kind], **params}
+    path = os.path.join(index_dir, ANN_FILES[kind])
+    if kind == "ivf":
+        ivf = build_ivf(embeddings, **build_params)
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, **ivf)
+        os.replace(tmp_path, path)
+    else:
+        build_hnsw(embeddings, **build_params).save_index(path)
+    return path
+
+
+def load_ann_retriever(index_dir: str, encoder, kind: str, search_params: Optional[Dict[str, int]] = None):
+    """Retriever for a saved ANN index, with defaults for unset search parameters"""
+    if kind not in ANN_KINDS:
+        raise ValueError(f"Unknown ANN index: {kind}")
+    params = {**DEFAULT_SEARCH_PARAMS[kind], **(search_params or {})}
+    if kind == "ivf":
+        return IVFRetriever.load(index_dir, encoder, **params)
+    return HNSWRetriever.load(index_dir, encoder, **params)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build an ANN index over the exported embeddings")
+    parser.add_argument("kind", choices=ANN_KINDS)
+    parser.add_argument("--index-dir", default=os.path.join("app", "chroma_db"))
+    parser.add_argument("--params", default="", help='Build parameters, e.g. "nlist=256" or "M=32,ef_construction=400"')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    path = build_ann_index(args.index_dir, args.kind, **parse_params(args.params))
+    print(f"✅ Built {args.kind} index in {time.perf_counter() - start:.1f}s: {path}")
+
+
+if __name__ == "__main__":
+    main()
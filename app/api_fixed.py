@@ -3,15 +3,46 @@ SHL Assessment Recommendation API
 Using Google Gemini API for AI-powered insights
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from pydantic import BaseModel
 import chromadb
 from bs4 import BeautifulSoup
-import requests
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 import google.generativeai as genai
 from dotenv import load_dotenv
+import asyncio
+import math
+from typing import List, Literal
+import hashlib
+import hmac
 import os
+import time
+import numpy as np
+import orjson
+
+from app.gemini_client import GeminiClient, FakeGeminiModel, CircuitOpenError, RateLimitedError
+from app.catalog import Catalog
+from app.serialization import RawJSONResponse, build_fragments, render_payload, render_recommendation
+from app.retrieval import (
+    ChromaRetriever, MmapRetriever, FieldRetriever, load_metadatas, chunk_text, chunk_vector_search,
+    parse_field_weights, SHARED_INDEX_MODES
+)
+from app.quantized_index import QuantizedRetriever
+from app.ann_index import ANN_KINDS, load_ann_retriever, parse_params, validate_search_params
+from app.local_store import LocalStore
+from app.ingest import load_near_duplicate_groups
+from app.http_fixtures import fixture_session
+from app.query_parser import ParsedQuery, QueryParser, parse_minutes, test_type_letters
+from app.insights import (
+    UNAVAILABLE, JUSTIFICATION_CONFIG, cache_key, insight_prompt, justification_key, justification_prompt,
+    parse_justifications
+)
+from app.single_flight import SingleFlight
+from app.admission import AdmissionController, ClientRateLimiter, Overloaded
+from app.jobs import FINISHED, JobError, JobQueue
+from app.profiling import EXTENSIONS, MEDIA_TYPES, ProfilerBusy, install_signal_handler, profile_running
+from app.semantic_cache import SemanticCache, query_key, DEFAULT_CAPACITY, DEFAULT_THRESHOLD
 
 
 # Load environment variables
@@ -19,18 +50,26 @@ load_dotenv()
 
 
 # Initialize Google Gemini (free tier)
+# GEMINI_FAKE=1 swaps in a local fake that injects latency/failures for testing
 try:
-    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-    model = genai.GenerativeModel('gemini-1.5-flash')
+    if os.getenv("GEMINI_FAKE") == "1":
+        model = FakeGeminiModel.from_env()
+    else:
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        model = genai.GenerativeModel('gemini-1.5-flash')
 except Exception as e:
     print(f"Warning: Gemini initialization failed: {e}")
     model = None
 
+# Shared by all requests: concurrency cap, RPM budget, retries and circuit breaker
+gemini_client = GeminiClient.from_env(model) if model else None
+
 
 app = FastAPI(
     title="SHL Assessment Recommender",
     description="AI-powered assessment recommendations using RAG",
-    version="1.0"
+    version="1.0",
+    default_response_class=ORJSONResponse
 )
 
 
@@ -40,22 +79,160 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Retry-After", "X-Degraded"],
 )
 
 
+# Index backend: "chroma" (default), "mmap" - the read-only export that
+# forked workers share (see app/serve.py) - or "fields", the same export with
+# separate name/description/skills vectors weighted by SHL_FIELD_WEIGHTS - or
+# "int8" / "binary", the quantized single-file index (float16 rescoring) - or
+# "ivf" / "hnsw", approximate indexes for large catalogs (see app/ann_index.py)
+# tuned with SHL_ANN_SEARCH ("nprobe=16" / "ef=128"), checked against the mode
+# at startup (Chroma's ef_search is fixed at build time, see SHL_CHROMA_EF_SEARCH)
+# Only chroma mode opens the Chroma SQLite file
+INDEX_DIR = os.getenv("SHL_INDEX_DIR", os.path.join("app", "chroma_db"))
+INDEX_MODE = os.getenv("SHL_INDEX", "chroma")
+ANN_SEARCH_PARAMS = parse_params(os.getenv("SHL_ANN_SEARCH", ""))
+validate_search_params(INDEX_MODE, ANN_SEARCH_PARAMS)
+FIELD_WEIGHTS = parse_field_weights(os.getenv("SHL_FIELD_WEIGHTS", ""))
+# How per-chunk scores of long queries are combined: max, mean or rrf
+CHUNK_AGGREGATION = os.getenv("SHL_CHUNK_AGG", "max")
+# Ranked lists reused for paraphrased queries (entries per worker; 0 disables)
+# Measure hit rate / false hits for a threshold with benchmark_semantic_cache.py
+SEMANTIC_CACHE_SIZE = int(os.getenv("SHL_SEMANTIC_CACHE", str(DEFAULT_CAPACITY)))
+SEMANTIC_THRESHOLD = float(os.getenv("SHL_SEMANTIC_THRESHOLD", str(DEFAULT_THRESHOLD)))
+# insight_mode="query": budget for the single batched justification call before
+# falling back to the static insights
+QUERY_INSIGHT_TIMEOUT = float(os.getenv("SHL_QUERY_INSIGHT_TIMEOUT", "5"))
+# Stub insights (SHL_INSIGHTS=stub builds) are only served with the fake Gemini model
+SERVE_STUB_INSIGHTS = os.getenv("GEMINI_FAKE") == "1"
+# Identical concurrent requests (and JD URLs) share one computation; 0 disables
+SINGLE_FLIGHT = os.getenv("SHL_SINGLE_FLIGHT", "1") != "0"
+# Per-client identity for rate limiting: the peer address, or the first entry of
+# this header when running behind a proxy (e.g. SHL_CLIENT_HEADER=x-forwarded-for)
+CLIENT_HEADER = os.getenv("SHL_CLIENT_HEADER", "").lower()
+
 # Initialize ChromaDB client
-chroma_client = chromadb.PersistentClient(path="app/chroma_db")
+chroma_client = chromadb.PersistentClient(path=INDEX_DIR) if INDEX_MODE == "chroma" else None
+
+# Precomputed by rag.py: top-K neighbours of every assessment
+SIMILAR_PATH = os.path.join(INDEX_DIR, "similar_assessments.npz")
+similar_graph = None
+
+# Cache shared by every worker on the host (Gemini insights, background job records)
+CACHE_DIR = os.getenv("SHL_CACHE_DIR", os.path.join("app", "cache"))
+cache_store = LocalStore(CACHE_DIR)
+
+# Whole catalog held once in compact form, loaded on first use,
+# plus the pre-serialized static JSON of every assessment (indexed by row)
+retriever = None
+catalog = None
+catalog_fragments = []
+index_version = ""
+
+# Query parser compiled from the catalog vocabulary, plus per-row features it is matched against
+query_parser = QueryParser()
+catalog_skills = []
+catalog_minutes = []
+catalog_levels = []
+catalog_languages = []
+catalog_test_types = []
+# Near-duplicate group per row (from rag.py) - one assessment per group is shown
+duplicate_groups = None
+semantic_cache = SemanticCache(SEMANTIC_CACHE_SIZE, SEMANTIC_THRESHOLD) if SEMANTIC_CACHE_SIZE > 0 else None
+# Backpressure for the recommendation endpoints: bounded concurrency + queue,
+# per-client token buckets, and degraded mode (no LLM calls / scraping) under pressure
+admission = AdmissionController(
+    max_concurrent=int(os.getenv("SHL_MAX_CONCURRENT", "8")),
+    max_queue=int(os.getenv("SHL_MAX_QUEUE", "16")),
+    queue_timeout=float(os.getenv("SHL_QUEUE_TIMEOUT", "2")),
+    degrade_at=float(os.getenv("SHL_DEGRADE_AT", "0.75")),
+    cooldown=float(os.getenv("SHL_DEGRADE_COOLDOWN", "5")),
+)
+client_limiter = ClientRateLimiter(
+    rate=float(os.getenv("SHL_CLIENT_RPS", "2")),
+    burst=float(os.getenv("SHL_CLIENT_BURST", "10")),
+)
+# In-flight work keyed by request (full /recommend bodies, stream candidates) and by JD URL
+flights = {name: SingleFlight(SINGLE_FLIGHT) for name in ("recommend", "stream", "scrape")}
+
+
+def set_catalog(new_catalog: Catalog):
+    """Swap in a catalog with its fragments, query parser and a content hash used in ETags"""
+    global catalog, catalog_fragments, index_version, query_parser, catalog_skills, catalog_minutes, duplicate_groups
+    global catalog_levels, catalog_languages, catalog_test_types
+    catalog = new_catalog
+    catalog_fragments = build_fragments(new_catalog)
+    # Insights are served with use_ai=true, so they are part of the version too
+    digest = hashlib.sha1(b"".join(catalog_fragments))
+    digest.update("".join(record.ai_insights for record in new_catalog.records).encode("utf-8"))
+    index_version = digest.hexdigest()[:12]
+    query_parser = QueryParser.from_catalog(new_catalog)
+    catalog_skills = [query_parser.parse(record.name).skills for record in new_catalog.records]
+    catalog_minutes = [parse_minutes(new_catalog.field(record, "duration")) for record in new_catalog.records]
+    catalog_levels = [new_catalog.field(record, "job_level").lower() for record in new_catalog.records]
+    catalog_languages = [new_catalog.field(record, "languages").lower() for record in new_catalog.records]
+    catalog_test_types = [test_type_letters(new_catalog.field(record, "test_type")) for record in new_catalog.records]
+    groups = load_near_duplicate_groups(INDEX_DIR)
+    duplicate_groups = groups.tolist() if groups is not None and len(groups) == len(new_catalog) else None
+    # Cached rankings point at rows of the previous catalog
+    if semantic_cache is not None:
+        semantic_cache.clear()
+
+
+def load_index():
+    """Retriever and compact catalog for the configured backend, loaded once per process"""
+    global retriever
+    if INDEX_MODE in SHARED_INDEX_MODES:
+        if retriever is None:
+            from sentence_transformers import SentenceTransformer
+            encoder = SentenceTransformer("all-MiniLM-L6-v2")
+            if INDEX_MODE == "fields":
+                retriever = FieldRetriever.load(INDEX_DIR, encoder, FIELD_WEIGHTS)
+            elif INDEX_MODE in ("int8", "binary"):
+                retriever = QuantizedRetriever.load(INDEX_DIR, encoder, INDEX_MODE)
+            elif INDEX_MODE in ANN_KINDS:
+                retriever = load_ann_retriever(INDEX_DIR, encoder, INDEX_MODE, ANN_SEARCH_PARAMS)
+            else:
+                retriever = MmapRetriever.load(INDEX_DIR, encoder)
+            metadatas = load_metadatas(INDEX_DIR)
+            set_catalog(Catalog.from_metadatas(
+                (str(i) for i in range(len(metadatas))), metadatas, SERVE_STUB_INSIGHTS
+            ))
+        return retriever, catalog
+
+    collection = chroma_client.get_collection("shl_assessments")
+    if catalog is None or len(catalog) != collection.count():
+        set_catalog(Catalog.from_collection(collection, SERVE_STUB_INSIGHTS))
+    retriever = ChromaRetriever(collection)
+    return retriever, catalog
+
+
+def get_similar_graph():
+    """Load the (neighbors, scores) lists built by rag.py once per process"""
+    global similar_graph
+    if similar_graph is None:
+        data = np.load(SIMILAR_PATH)
+        similar_graph = (data["neighbors"].tolist(), data["scores"].tolist())
+    return similar_graph
+
+
+# Pooled session for JD pages (records/replays them when SHL_HTTP_FIXTURES is set)
+http_session = fixture_session()
 
 
 class QueryRequest(BaseModel):
     text: str
     use_ai: bool = True
+    # static: per-assessment insights; query: why each result fits this query (one LLM call)
+    insight_mode: Literal["static", "query"] = "static"
 
 
 def scrape_job_description(url: str) -> str:
     """Scrape job description from URL"""
     try:
-        response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
+        response = http_session.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
         response.raise_for_status()
         soup = BeautifulSoup(response.text, "html.parser")
         
@@ -86,53 +263,126 @@ def normalize_score(score: float) -> float:
         return 0.5
 
 
-def generate_gemini_insights(description: str) -> str:
+async def generate_gemini_insights(description: str) -> str:
     """Generate short HR-focused insights using Gemini"""
-    if not model:
-        return "AI insights unavailable"
+    if not gemini_client:
+        return UNAVAILABLE
+    
+    # Insights depend only on the description - share them across workers
+    key = cache_key(description)
+    cached = cache_store.get(key)
+    if cached:
+        return cached
     
     try:
-        prompt = f"""As an HR expert, analyze this assessment and provide 3 concise bullet points (max 15 words each):
-
-Description: {description[:300]}
-
-Format as:
-• Key skill measured
-• Ideal candidate level  
-• Best use case"""
-        
-        response = model.generate_content(
-            prompt,
+        text = await gemini_client.generate(
+            insight_prompt(description),
             generation_config=genai.types.GenerationConfig(
                 max_output_tokens=100,
                 temperature=0.3,
             )
         )
         
-        return response.text.strip()
+        insight = text.strip()
+        cache_store.set(key, insight)
+        return insight
+    except (CircuitOpenError, RateLimitedError):
+        # Upstream unhealthy or quota spent - skip without paying the timeout
+        return UNAVAILABLE
     except Exception as e:
         print(f"Gemini API error: {e}")
-        return "AI insights unavailable"
+        return UNAVAILABLE
+
+
+async def assessment_insight(record, allow_llm: bool = True) -> str:
+    """
+    Insight baked into the index by rag.py - no LLM call
+    Only indexes built without insights (or rows whose generation failed) call Gemini,
+    and not in degraded mode
+    """
+    if record.ai_insights:
+        return record.ai_insights
+    if not allow_llm:
+        return cached_insight(record)
+    return await generate_gemini_insights(record.description) if gemini_client else ""
+
+
+def cached_insight(record) -> str:
+    """Static insight without any LLM call: baked into the index, else the shared cache"""
+    return record.ai_insights or cache_store.get(cache_key(record.description)) or UNAVAILABLE
+
+
+async def query_insights(query_text: str, assessments: Catalog, recommendations: list) -> List[str]:
+    """
+    Why each recommendation fits the query - one structured-output call for the whole list
+    Timeouts, shedding and unparseable answers fall back to the static insights
+    """
+    records = [assessments[rec["row"]] for rec in recommendations]
+    fallback = [cached_insight(record) for record in records]
+    if not gemini_client or not records:
+        return fallback
+
+    ids = [str(record.row) for record in records]
+    key = justification_key(query_text, ids)
+    justifications = cache_store.get(key)
+    if justifications is None:
+        prompt = justification_prompt(query_text, [
+            {"id": str(record.row), "name": record.name, "summary": record.description}
+            for record in records
+        ])
+        try:
+            text = await asyncio.wait_for(
+                gemini_client.generate(prompt, generation_config=JUSTIFICATION_CONFIG),
+                timeout=QUERY_INSIGHT_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            print("Query insights timed out - serving static insights")
+            return fallback
+        except (CircuitOpenError, RateLimitedError):
+            return fallback
+        except Exception as e:
+            print(f"Gemini API error: {e}")
+            return fallback
+        justifications = parse_justifications(text)
+        if justifications:
+            cache_store.set(key, justifications)
+
+    return [justifications.get(row_id) or static for row_id, static in zip(ids, fallback)]
+
+
+def rerank_candidates(results: list, parsed: ParsedQuery) -> list:
+    """
+    Stable rerank with the parsed constraints
+    - Assessments outside the requested duration (max or "at least") drop to the end
+    - Among the rest, in order: more skill matches between query and assessment name,
+      a requested test type, a matching job level, a requested language
+    """
+    if not parsed.has_constraints():
+        return results
+    levels = [level.lower() for level in parsed.seniority]
+
+    def key(rec):
+        row = rec["row"]
+        minutes = catalog_minutes[row]
+        out_of_range = minutes is not None and (
+            (parsed.max_duration is not None and minutes > parsed.max_duration)
+            or (parsed.min_duration is not None and minutes < parsed.min_duration)
+        )
+        return (
+            out_of_range,
+            -len(parsed.skills & catalog_skills[row]),
+            not parsed.test_types & catalog_test_types[row],
+            not any(level in catalog_levels[row] for level in levels),
+            not any(language in catalog_languages[row] for language in parsed.languages),
+        )
+
+    return sorted(results, key=key)
 
 
-def balance_test_types(results: list, query_text: str) -> list:
+def balance_test_types(results: list, parsed: ParsedQuery) -> list:
     """Balance recommendations between Test Type K (Knowledge) and P (Personality)"""
-    # Check if query mentions both technical and soft skills
-    technical_keywords = [
-        'java', 'python', 'sql', 'coding', 'technical', 'developer', 
-        'programming', 'software', 'engineer', 'development'
-    ]
-    soft_keywords = [
-        'communication', 'collaboration', 'teamwork', 'personality', 
-        'leadership', 'behavioral', 'interpersonal', 'management'
-    ]
-    
-    query_lower = query_text.lower()
-    has_technical = any(kw in query_lower for kw in technical_keywords)
-    has_soft = any(kw in query_lower for kw in soft_keywords)
-    
-    # If query needs both, ensure balanced mix
-    if has_technical and has_soft:
+    # If query needs both technical and soft skills, ensure balanced mix
+    if parsed.has_technical and parsed.has_soft:
         k_tests = [r for r in results if 'K' in r.get('test_type', '')]
         p_tests = [r for r in results if 'P' in r.get('test_type', '')]
         
@@ -155,6 +405,8 @@ async def root():
         "endpoints": {
             "health": "/health",
             "recommend": "/recommend (POST)",
+            "recommend_stream": "/recommend/stream (POST, NDJSON)",
+            "similar": "/assessments/{id}/similar",
             "docs": "/docs"
         }
     }
@@ -164,11 +416,13 @@ async def root():
 async def health_check():
     """Health check endpoint"""
     gemini_status = "connected" if model else "unavailable"
+    if gemini_client and gemini_client.breaker.state != "closed":
+        gemini_status = f"degraded (circuit {gemini_client.breaker.state})"
     
     try:
-        collection = chroma_client.get_collection("shl_assessments")
-        db_count = collection.count()
-        db_status = f"ready ({db_count} assessments)"
+        index, _ = load_index()
+        db_count = len(index)
+        db_status = f"ready ({db_count} assessments, {INDEX_MODE})"
     except:
         db_status = "not initialized"
     
@@ -177,24 +431,100 @@ async def health_check():
         "message": "SHL Assessment Recommendation API is running",
         "version": "1.0",
         "gemini_ai": gemini_status,
-        "vector_db": db_status
+        "gemini_client": gemini_client.status() if gemini_client else None,
+        "vector_db": db_status,
+        "semantic_cache": semantic_cache.stats() if semantic_cache is not None else None,
+        "single_flight": {name: flight.stats() for name, flight in flights.items()},
+        "admission": admission.stats(),
+        "rate_limit": client_limiter.stats(),
+        "jobs": jobs.stats()
     }
 
 
-@app.post("/recommend")
-async def recommend(request: QueryRequest):
+def is_url(text: str) -> bool:
+    return text.strip().startswith(("http://", "https://"))
+
+
+def request_etag(request: QueryRequest):
     """
-    Recommend assessments based on query
-    
-    Request body:
-    - text: Job description or search query (or URL to scrape)
-    - use_ai: Enable AI-generated insights (default: True)
-    
-    Returns: {"recommendations": [...]}
+    Weak ETag from the request options and catalog version, known before any work
+    Only sent with responses that are a function of those two (see stable_response);
+    URL queries get none - the page behind the URL can change at any time
+    """
+    if is_url(request.text):
+        return None
+    key = orjson.dumps(request.model_dump(), option=orjson.OPT_SORT_KEYS)
+    return 'W/"' + hashlib.sha1(index_version.encode() + key).hexdigest()[:20] + '"'
+
+
+def stable_response(request: QueryRequest, assessments: Catalog, recommendations: list,
+                    from_cache: bool = False) -> bool:
+    """
+    True when the response depends only on the index and the request options:
+    no insights, or only insights baked into the index - never live Gemini text,
+    cached query justifications or "unavailable" fallbacks - and the ranked
+    list was computed for this text, not reused from a semantic-cache paraphrase
+    """
+    if from_cache:
+        return False
+    if not request.use_ai:
+        return True
+    return request.insight_mode == "static" and all(
+        assessments[rec["row"]].ai_insights for rec in recommendations
+    )
+
+
+def client_id(http_request: Request) -> str:
+    if CLIENT_HEADER:
+        value = http_request.headers.get(CLIENT_HEADER)
+        if value:
+            return value.split(",")[0].strip()
+    return http_request.client.host if http_request.client else "unknown"
+
+
+def check_rate_limit(http_request: Request):
+    """429 with Retry-After once the client's token bucket is empty"""
+    retry_after = client_limiter.check(client_id(http_request))
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=429,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+
+async def admit() -> bool:
+    """
+    Take an admission slot (release with admission.release()), or fail fast with 503
+    Returns True when the request should be served in degraded mode
+    """
+    try:
+        await admission.acquire()
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=e.reason,
+                            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))})
+    degraded = admission.degraded()
+    if degraded:
+        admission.stats_counts["served_degraded"] += 1
+    return degraded
+
+
+def flight_key(request: QueryRequest, degraded: bool = False) -> bytes:
+    """Requests with the same whitespace-normalized text and options compute the same response"""
+    options = request.model_dump()
+    options["text"] = " ".join(request.text.split())
+    options["degraded"] = degraded
+    return index_version.encode() + orjson.dumps(options, option=orjson.OPT_SORT_KEYS)
+
+
+async def retrieve_candidates(request: QueryRequest, degraded: bool = False):
+    """
+    Everything before insights: scrape (for URLs), search and balance
+    Returns (catalog, query_text, total_found, candidates, from_cache)
     """
     try:
-        collection = chroma_client.get_collection("shl_assessments")
-    except ValueError:
+        index, assessments = load_index()
+    except Exception:
         raise HTTPException(
             status_code=500, 
             detail="Vector database not initialized. Please run rag.py first!"
@@ -203,9 +533,17 @@ async def recommend(request: QueryRequest):
     # Handle URL or text query
     query_text = request.text.strip()
     
-    if query_text.startswith(("http://", "https://")):
-        print(f"Scraping job description from: {query_text}")
-        query_text = scrape_job_description(query_text)
+    if is_url(query_text) and degraded:
+        raise HTTPException(
+            status_code=503,
+            detail="URL scraping is paused while the service is under load - paste the job description text instead",
+            headers={"Retry-After": str(max(1, math.ceil(admission.cooldown)))}
+        )
+    if is_url(query_text):
+        # Off the event loop, and fetched once for every concurrent request for the URL
+        url = query_text
+        print(f"Scraping job description from: {url}")
+        query_text = await flights["scrape"].do(url, lambda: asyncio.to_thread(scrape_job_description, url))
         
         if not query_text:
             raise HTTPException(
@@ -213,51 +551,395 @@ async def recommend(request: QueryRequest):
                 detail="Could not extract job description from URL"
             )
 
+    total_found, recommendations, from_cache = search_and_rank(index, assessments, query_text)
+    return assessments, query_text, total_found, recommendations, from_cache
+
+
+def search_and_rank(index, assessments: Catalog, query_text: str) -> tuple:
+    """
+    (total_found, ranked candidates, from_cache) for one query text
+    A paraphrase of a recent query with the same constraints reuses its
+    ranked list from the semantic cache - no search, rerank or balancing;
+    from_cache tells callers the list was ranked for another text
+    """
+    parsed = query_parser.parse(query_text)
+    # Long JDs are chunked and embedded in one batch; the cache key is built from the same vectors
+    chunk_vectors = index.encode(chunk_text(query_text))
+    if semantic_cache is not None:
+        key = query_key(chunk_vectors)
+        cached = semantic_cache.lookup(key, parsed.ranking_key())
+        if cached is not None:
+            total_found, recommendations = cached
+            return total_found, [dict(rec) for rec in recommendations], True
+
     # Semantic search - get top 15 for filtering
-    results = collection.query(
-        query_texts=[query_text],
-        n_results=15,
-        include=["metadatas", "documents", "distances"]
-    )
+    # Metadata comes from the in-memory catalog, so only ids/distances are fetched
+    results = chunk_vector_search(index, chunk_vectors, 15, CHUNK_AGGREGATION)
+    total_found = len(results["ids"][0])
+    recommendations = rank_candidates(assessments, query_text, results, parsed)
+    if semantic_cache is not None:
+        # Copies: callers fill in ai_insights on the returned dicts
+        semantic_cache.store(key, (total_found, [dict(rec) for rec in recommendations]), parsed.ranking_key())
+    return total_found, recommendations, False
 
-    # Build recommendations list
-    recommendations = []
-    for i in range(len(results["ids"][0])):
-        metadata = results["metadatas"][0][i]
-        
-        assessment = {
-            "name": metadata.get("name", "Unknown"),
-            "url": metadata.get("url", ""),
-            "description": metadata.get("description", "No description available"),
-            "duration": metadata.get("duration", "Not specified"),
-            "languages": metadata.get("languages", "Not specified"),
-            "job_level": metadata.get("job_level", "Not specified"),
-            "remote_testing": metadata.get("remote_testing", "Not specified"),
-            "adaptive_support": metadata.get("adaptive_support", "Not specified"),
-            "test_type": metadata.get("test_type", "Not specified"),
-            "relevance_score": normalize_score(results["distances"][0][i]),
-        }
-        
-        # Add AI insights if requested
-        if request.use_ai and model:
-            assessment["ai_insights"] = generate_gemini_insights(
-                metadata.get("description", "")
-            )
-        else:
-            assessment["ai_insights"] = ""
-        
-        recommendations.append(assessment)
 
-    # Apply Test Type balancing
-    recommendations = balance_test_types(recommendations, request.text)
-    
-    # Return top 10 with proper format
+def rank_candidates(assessments: Catalog, query_text: str, results: dict, parsed: ParsedQuery = None) -> list:
+    """
+    Candidate list from one search result, reranked and balanced
+    Shared by /recommend and the offline batch predictor
+    """
+    # Build candidate list - static fields stay in the catalog until rendering
+    # Only the best-ranked assessment of each near-duplicate group is kept
+    recommendations = []
+    seen_groups = set()
+    for chroma_id, distance in zip(results["ids"][0], results["distances"][0]):
+        record = assessments.get(chroma_id)
+        if duplicate_groups is not None:
+            group = duplicate_groups[record.row]
+            if group in seen_groups:
+                continue
+            seen_groups.add(group)
+        recommendations.append({
+            "row": record.row,
+            "test_type": assessments.field(record, "test_type"),
+            "relevance_score": normalize_score(distance),
+            "ai_insights": "",
+        })
+
+    # Parse constraints once, then rerank and apply Test Type balancing
+    parsed = parsed or query_parser.parse(query_text)
+    recommendations = rerank_candidates(recommendations, parsed)
+    return balance_test_types(recommendations, parsed)
+
+
+def response_head(query_text: str, total_found: int, returned: int) -> dict:
     return {
         "query": query_text[:200] + "..." if len(query_text) > 200 else query_text,
-        "total_found": len(results["ids"][0]),
-        "returned": len(recommendations),
-        "recommendations": recommendations
+        "total_found": total_found,
+        "returned": returned,
+    }
+
+
+@app.post("/recommend", response_class=RawJSONResponse)
+async def recommend(request: QueryRequest, http_request: Request):
+    """
+    Recommend assessments based on query
+    
+    Request body:
+    - text: Job description or search query (or URL to scrape)
+    - use_ai: Enable AI-generated insights (default: True)
+    
+    Send the ETag of a previous response as If-None-Match to get a 304
+    without any retrieval work. Only responses whose insights all come from
+    the index carry an ETag.
+    
+    Returns: {"recommendations": [...]}
+    """
+    check_rate_limit(http_request)
+    if index_version:
+        etag = request_etag(request)
+        if etag and http_request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+
+    degraded = await admit()
+    try:
+        # Concurrent identical requests await one computation of the (immutable) body
+        body, stable = await flights["recommend"].do(
+            flight_key(request, degraded), lambda: recommend_body(request, degraded)
+        )
+    finally:
+        admission.release()
+
+    # Degraded bodies must not be cached under the normal ETag
+    if degraded:
+        return RawJSONResponse(body, headers={"X-Degraded": "1"})
+    # After the body: the first request is what loads the index and sets its version
+    etag = request_etag(request) if stable else None
+    return RawJSONResponse(body, headers={"ETag": etag} if etag else None)
+
+
+async def recommend_body(request: QueryRequest, degraded: bool = False) -> tuple:
+    """
+    Encoded /recommend response: search, rerank, insights (no LLM calls when degraded)
+    Returns (body, stable) - stable bodies may be revalidated with the request ETag
+    """
+    assessments, query_text, total_found, recommendations, from_cache = await retrieve_candidates(request, degraded)
+
+    # Add AI insights if requested - precomputed, or generated concurrently for older indexes
+    # (or one batched query-conditioned call)
+    if request.use_ai and request.insight_mode == "query" and not degraded:
+        insights = await query_insights(query_text, assessments, recommendations)
+        for rec, insight in zip(recommendations, insights):
+            rec["ai_insights"] = insight
+    elif request.use_ai:
+        insights = await asyncio.gather(*[
+            assessment_insight(assessments[rec["row"]], allow_llm=not degraded)
+            for rec in recommendations
+        ])
+        for rec, insight in zip(recommendations, insights):
+            rec["ai_insights"] = insight
+    
+    # Return top 10 with proper format - static JSON fragments spliced with scores/insights
+    head = response_head(query_text, total_found, len(recommendations))
+    body = render_payload(head, [
+        render_recommendation(catalog_fragments[rec["row"]], rec["relevance_score"], rec["ai_insights"])
+        for rec in recommendations
+    ])
+    return body, stable_response(request, assessments, recommendations, from_cache)
+
+
+@app.post("/recommend/stream")
+async def recommend_stream(request: QueryRequest, http_request: Request):
+    """
+    Same results as /recommend as NDJSON, for progressive rendering
+    - First line: {"query", "total_found", "returned"}
+    - Then one {"rank", "recommendation"} line per item, as soon as its insight is ready
+    The admission slot is held until the last line is sent, the client
+    disconnects or anything before the first line fails - whichever comes first
+    """
+    check_rate_limit(http_request)
+    degraded = await admit()
+    release = admission.releaser()
+    try:
+        return await stream_response(request, degraded, release)
+    except BaseException:
+        release()
+        raise
+
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """StreamingResponse that gives back its admission slot however sending ends (incl. disconnects)"""
+
+    def __init__(self, content, release, **kwargs):
+        super().__init__(content, **kwargs)
+        self.release = release
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.release()
+
+
+async def stream_response(request: QueryRequest, degraded: bool, release) -> AdmittedStreamingResponse:
+    assessments, query_text, total_found, shared, from_cache = await flights["stream"].do(
+        flight_key(request, degraded), lambda: retrieve_candidates(request, degraded)
+    )
+    # Insights are filled in per stream - never on the list other requests share
+    recommendations = [dict(rec) for rec in shared]
+    head = response_head(query_text, total_found, len(recommendations))
+    # Known before the first line: whether every insight will come from the index
+    stable = not degraded and stable_response(request, assessments, recommendations, from_cache)
+    etag = request_etag(request) if stable else None
+
+    def line(rank: int, rec: dict) -> bytes:
+        item = render_recommendation(catalog_fragments[rec["row"]], rec["relevance_score"], rec["ai_insights"])
+        return b'{"rank":' + str(rank).encode() + b',"recommendation":' + item + b"}\n"
+
+    async def generate():
+        try:
+            async for chunk in events():
+                yield chunk
+        finally:
+            release()
+
+    async def events():
+        yield orjson.dumps(head) + b"\n"
+
+        if not request.use_ai:
+            for rank, rec in enumerate(recommendations):
+                yield line(rank, rec)
+            return
+
+        # One call answers for every item, so they all arrive together
+        if request.insight_mode == "query" and not degraded:
+            insights = await query_insights(query_text, assessments, recommendations)
+            for rank, (rec, insight) in enumerate(zip(recommendations, insights)):
+                rec["ai_insights"] = insight
+                yield line(rank, rec)
+            return
+
+        async def with_insight(rank: int, rec: dict):
+            rec["ai_insights"] = await assessment_insight(assessments[rec["row"]], allow_llm=not degraded)
+            return rank, rec
+
+        for next_done in asyncio.as_completed([
+            with_insight(rank, rec) for rank, rec in enumerate(recommendations)
+        ]):
+            rank, rec = await next_done
+            yield line(rank, rec)
+
+    return AdmittedStreamingResponse(
+        generate(),
+        release,
+        media_type="application/x-ndjson",
+        headers={"ETag": etag} if etag else {"X-Degraded": "1"} if degraded else None
+    )
+
+
+async def run_job(payload: dict) -> bytes:
+    """Background /recommend: fetch, extract and recommend, failures kept as status + detail"""
+    try:
+        body, _ = await recommend_body(QueryRequest(**payload))
+        return body
+    except HTTPException as e:
+        raise JobError(e.status_code, e.detail)
+
+
+# URL queries (or any slow query) as background jobs - see app/jobs.py
+jobs = JobQueue(
+    os.path.join(CACHE_DIR, "jobs"),
+    run_job,
+    workers=int(os.getenv("SHL_JOB_WORKERS", "4")),
+    max_pending=int(os.getenv("SHL_JOB_QUEUE", "256")),
+    ttl=float(os.getenv("SHL_JOB_TTL", "3600")),
+)
+# Profiling of a live worker: GET /admin/profile needs SHL_ADMIN_TOKEN (the
+# endpoint is disabled without it); `kill -USR2 <pid>` writes a sampled
+# profile of SHL_PROFILE_SECONDS to SHL_PROFILE_DIR - see app/profiling.py
+ADMIN_TOKEN = os.getenv("SHL_ADMIN_TOKEN", "")
+PROFILE_MAX_SECONDS = float(os.getenv("SHL_PROFILE_MAX_SECONDS", "60"))
+install_signal_handler(os.getenv("SHL_PROFILE_DIR", "profiles"), float(os.getenv("SHL_PROFILE_SECONDS", "10")))
+
+# Seconds between SSE keep-alive comments while a job has no news
+SSE_KEEPALIVE = 15.0
+
+
+def job_links(job_id: str) -> dict:
+    return {"poll": f"/jobs/{job_id}", "events": f"/jobs/{job_id}/events"}
+
+
+def find_job(job_id: str) -> dict:
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired job: {job_id}")
+    return job
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: QueryRequest, http_request: Request):
+    """
+    Queue a recommendation (typically a JD URL) and return its job id at once
+    Poll GET /jobs/{id} or subscribe to GET /jobs/{id}/events (SSE) for the result
+    """
+    check_rate_limit(http_request)
+    try:
+        job = jobs.submit(request.model_dump())
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=e.reason,
+                            headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))})
+    links = job_links(job["id"])
+    return ORJSONResponse(
+        {"id": job["id"], "status": job["status"], **links},
+        status_code=202,
+        headers={"Location": links["poll"]}
+    )
+
+
+@app.get("/jobs/{job_id}", response_class=RawJSONResponse)
+async def get_job(job_id: str):
+    """
+    Job record: {"id", "status": queued|running|done|failed, "request", "created", "updated"}
+    plus "result" (the /recommend response) when done or "error" ({"status_code", "detail"}) when failed
+    """
+    job = find_job(job_id)
+    headers = None if job["status"] in FINISHED else {"Retry-After": "1"}
+    return RawJSONResponse(orjson.dumps(job), headers=headers)
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    Server-sent events: one event per status change (named after the status, the
+    job record as data), ending after "done" or "failed"
+    """
+    find_job(job_id)
+
+    async def generate():
+        last_status, last_sent = None, time.monotonic()
+        try:
+            while True:
+                job = jobs.get(job_id)
+                if job is None:
+                    yield b'event: failed\ndata: {"error":{"status_code":404,"detail":"Job expired"}}\n\n'
+                    return
+                if job["status"] != last_status:
+                    last_status, last_sent = job["status"], time.monotonic()
+                    yield b"event: " + job["status"].encode() + b"\ndata: " + orjson.dumps(job) + b"\n\n"
+                    if job["status"] in FINISHED:
+                        return
+                elif time.monotonic() - last_sent > SSE_KEEPALIVE:
+                    last_sent = time.monotonic()
+                    yield b": keep-alive\n\n"
+                # Woken at once by workers in this process; polls jobs run by other workers
+                await jobs.wait(job_id, timeout=0.5)
+        finally:
+            jobs.forget(job_id)
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/admin/profile", include_in_schema=False)
+async def admin_profile(http_request: Request, seconds: float = 10, profiler: str = "sample", format: str = None):
+    """
+    Profile this worker for `seconds` while it serves traffic and download the result
+    - profiler=sample (speedscope | collapsed), cprofile (pstats | text) or py-spy (speedscope)
+    Requires the X-Admin-Token header; with several workers, each request profiles one of them
+    """
+    token = http_request.headers.get("x-admin-token", "")
+    if not ADMIN_TOKEN or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        # Indistinguishable from a missing route unless the token is right
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not 0 < seconds <= PROFILE_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be in (0, {PROFILE_MAX_SECONDS:g}]")
+
+    try:
+        data, fmt = await profile_running(seconds, profiler, format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    filename = f"profile-{os.getpid()}-{int(time.time())}{EXTENSIONS[fmt]}"
+    return Response(data, media_type=MEDIA_TYPES[fmt],
+                    headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+@app.get("/assessments/{assessment_id}/similar", response_class=RawJSONResponse)
+async def similar_assessments(assessment_id: str, k: int = 10):
+    """
+    Assessments most similar to `assessment_id` (the `id` field of a recommendation)
+    Served from the neighbour graph precomputed by rag.py - no embedding or search
+    """
+    try:
+        _, assessments = load_index()
+        neighbors, scores = get_similar_graph()
+    except Exception:
+        raise HTTPException(
+            status_code=503,
+            detail="Similarity graph not built. Please run rag.py first!"
+        )
+
+    if not assessment_id.isdigit() or int(assessment_id) >= len(neighbors):
+        raise HTTPException(status_code=404, detail=f"Unknown assessment id: {assessment_id}")
+
+    row = int(assessment_id)
+    k = max(0, min(k, len(neighbors[row])))
+    head = {
+        "id": assessment_id,
+        "name": assessments[row].name,
+        "returned": k,
     }
+    return RawJSONResponse(render_payload(head, [
+        render_recommendation(catalog_fragments[neighbor], score, "")
+        for neighbor, score in zip(neighbors[row][:k], scores[row][:k])
+    ], key="similar"))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,78 @@
+"""
+Assessment IDs
+Canonical slug -> integer ID table, built when the index is created and
+stored next to it, so evaluation and debugging compare assessments with
+integer set operations instead of re-normalizing URL strings
+"""
+
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Set
+
+
+ASSESSMENT_IDS_FILE = "assessment_ids.json"
+
+# Last non-empty path segment, ignoring query string/fragment:
+# https://www.shl.com/solutions/products/product-catalog/view/automata-fix-new/ -> automata-fix-new
+SLUG_PATTERN = re.compile(r"([^/?#]+)/*(?:[?#].*)?$")
+
+
+def slug_of(url: str) -> str:
+    """Canonical slug of a catalog (or foreign) assessment URL"""
+    match = SLUG_PATTERN.search(url.strip().lower())
+    return match.group(1) if match else ""
+
+
+class AssessmentIds:
+    """
+    Slug <-> ID table
+    - IDs 0..n-1 are catalog assessments, in first-seen order
+    - `row_ids` maps every index row (Chroma id) to its assessment ID, so
+      duplicate catalog rows share one ID
+    - Foreign slugs (e.g. labels outside the catalog) are interned on demand
+      with IDs past the catalog, never persisted
+    """
+
+    def __init__(self, slugs: List[str], row_ids: List[int]):
+        self.slugs = list(slugs)
+        self.row_ids = list(row_ids)
+        self.ids: Dict[str, int] = {slug: i for i, slug in enumerate(self.slugs)}
+        self.catalog_size = len(self.slugs)
+
+    @classmethod
+    def from_urls(cls, urls: Iterable[str]) -> "AssessmentIds":
+        table = cls([], [])
+        table.row_ids = [table.intern(url) for url in urls]
+        table.catalog_size = len(table.slugs)
+        return table
+
+    @classmethod
+    def load(cls, index_dir: str) -> "AssessmentIds":
+        with open(os.path.join(index_dir, ASSESSMENT_IDS_FILE), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["slugs"], data["row_ids"])
+
+    def save(self, index_dir: str):
+        with open(os.path.join(index_dir, ASSESSMENT_IDS_FILE), "w", encoding="utf-8") as f:
+            json.dump({"slugs": self.slugs[:self.catalog_size], "row_ids": self.row_ids}, f)
+
+    def __len__(self) -> int:
+        return self.catalog_size
+
+    def intern(self, url: str) -> int:
+        """ID of a URL, assigning a new one to unseen slugs"""
+        slug = slug_of(url)
+        assessment_id = self.ids.get(slug)
+        if assessment_id is None:
+            assessment_id = len(self.slugs)
+            self.ids[slug] = assessment_id
+            self.slugs.append(slug)
+        return assessment_id
+
+    def id_set(self, urls: Iterable[str]) -> Set[int]:
+        return {self.intern(url) for url in urls}
+
+    def rows_to_ids(self, rows: Iterable) -> List[int]:
+        """Assessment IDs of index rows (ints or Chroma id strings), order kept"""
+        return [self.row_ids[int(row)] for row in rows]
@@ -0,0 +1,152 @@
+"""
+Compact In-Memory Catalog
+__slots__ records with interned categorical fields, shared by filtering,
+reranking and response building
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+
+# Fields with a handful of distinct values - stored as int codes into a ValueTable
+CATEGORICAL_FIELDS = ("duration", "languages", "job_level", "remote_testing", "adaptive_support", "test_type")
+
+DEFAULTS = {
+    "name": "Unknown",
+    "url": "",
+    "description": "No description available",
+    "duration": "Not specified",
+    "languages": "Not specified",
+    "job_level": "Not specified",
+    "remote_testing": "Not specified",
+    "adaptive_support": "Not specified",
+    "test_type": "Not specified",
+    # Precomputed by rag.py; empty for indexes built without insights
+    "ai_insights": "",
+}
+
+
+class ValueTable:
+    """Interned value table: every distinct string is stored once and referenced by int code"""
+
+    __slots__ = ("values", "_codes")
+
+    def __init__(self):
+        self.values: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        """Return the code for `value`, adding it on first sight"""
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            self.values.append(value)
+        return code
+
+    def __getitem__(self, code: int) -> str:
+        return self.values[code]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class AssessmentRecord:
+    """One assessment; categorical fields hold int codes into the catalog's value tables"""
+
+    __slots__ = (
+        "row", "name", "url", "description",
+        "duration", "languages", "job_level", "remote_testing", "adaptive_support", "test_type",
+        "ai_insights",
+    )
+
+    def __init__(self, row, name, url, description, duration, languages,
+                 job_level, remote_testing, adaptive_support, test_type, ai_insights=""):
+        self.row = row
+        self.name = name
+        self.url = url
+        self.description = description
+        self.duration = duration
+        self.languages = languages
+        self.job_level = job_level
+        self.remote_testing = remote_testing
+        self.adaptive_support = adaptive_support
+        self.test_type = test_type
+        self.ai_insights = ai_insights
+
+
+class Catalog:
+    """
+    Whole catalog kept once per process
+    - Records are indexed by row (the Chroma id is the row number as a string)
+    - Decoding a field returns the shared interned string, never a copy
+    """
+
+    def __init__(self, allow_stub_insights: bool = False):
+        self.records: List[AssessmentRecord] = []
+        # Insights from the offline stub provider (see app/insights.py) are dropped unless allowed
+        self.allow_stub_insights = allow_stub_insights
+        self.tables: Dict[str, ValueTable] = {field: ValueTable() for field in CATEGORICAL_FIELDS}
+
+    @classmethod
+    def from_metadatas(cls, ids: Iterable[str], metadatas: Iterable[dict],
+                       allow_stub_insights: bool = False) -> "Catalog":
+        """
+        Build from Chroma ids/metadatas (ids are row numbers as strings)
+        Raises ValueError unless the ids are exactly 0..N-1 - get() indexes rows by id
+        """
+        catalog = cls(allow_stub_insights)
+        pairs = sorted(zip(ids, metadatas), key=lambda pair: int(pair[0]))
+        for row, (chroma_id, metadata) in enumerate(pairs):
+            if int(chroma_id) != row:
+                raise ValueError(f"Catalog ids must be 0..{len(pairs) - 1}, found {chroma_id!r} at row {row} "
+                                 f"- rebuild the index with rag.py")
+            catalog.add(metadata, row)
+        return catalog
+
+    @classmethod
+    def from_collection(cls, collection, allow_stub_insights: bool = False) -> "Catalog":
+        """Load every assessment's metadata from a Chroma collection"""
+        data = collection.get(include=["metadatas"])
+        return cls.from_metadatas(data["ids"], data["metadatas"], allow_stub_insights)
+
+    def add(self, metadata: dict, row: Optional[int] = None) -> AssessmentRecord:
+        row = len(self.records) if row is None else row
+        tables = self.tables
+
+        def text(field):
+            return metadata.get(field, DEFAULTS[field])
+
+        ai_insights = text("ai_insights")
+        if metadata.get("ai_insights_provider") == "stub" and not self.allow_stub_insights:
+            ai_insights = ""
+
+        record = AssessmentRecord(
+            row,
+            text("name"),
+            text("url"),
+            text("description"),
+            tables["duration"].code(text("duration")),
+            tables["languages"].code(text("languages")),
+            tables["job_level"].code(text("job_level")),
+            tables["remote_testing"].code(text("remote_testing")),
+            tables["adaptive_support"].code(text("adaptive_support")),
+            tables["test_type"].code(text("test_type")),
+            ai_insights,
+        )
+        self.records.append(record)
+        return record
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, row: int) -> AssessmentRecord:
+        return self.records[row]
+
+    def get(self, chroma_id: str) -> AssessmentRecord:
+        return self.records[int(chroma_id)]
+
+    def field(self, record: AssessmentRecord, name: str) -> str:
+        """Decode one field of `record` to its (interned) string"""
+        value = getattr(record, name)
+        table = self.tables.get(name)
+        return table.values[value] if table is not None else value
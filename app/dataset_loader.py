@@ -0,0 +1,117 @@
+"""
+Dataset Loader
+Reads the labeled/unlabeled query CSVs in one pass: the encoding is sniffed
+once from a byte sample, queries are grouped with vectorized pandas ops and
+the normalized result is cached as Parquet keyed by the file's hash
+"""
+
+import codecs
+import hashlib
+import os
+from typing import Dict, List
+
+import pandas as pd
+
+from app.assessment_ids import SLUG_PATTERN
+
+
+CACHE_DIR = os.path.join("data", "cache")
+SAMPLE_SIZE = 64 * 1024
+# The labeled CSVs are Windows exports - tried before asking charset-normalizer
+WINDOWS_ENCODING = "cp1252"
+FALLBACK_ENCODING = "latin-1"
+
+
+def url_slugs(urls: pd.Series) -> pd.Series:
+    """Vectorized assessment_ids.slug_of (same compiled pattern)"""
+    return urls.astype(str).str.strip().str.lower().str.extract(SLUG_PATTERN, expand=False).fillna("")
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def detect_encoding(path: str, sample_size: int = SAMPLE_SIZE) -> str:
+    """UTF-8 or cp1252 if the sample decodes cleanly, otherwise charset-normalizer's best guess"""
+    with open(path, "rb") as f:
+        sample = f.read(sample_size)
+
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        # Incremental decode so a multi-byte char cut at the sample edge is not an error
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    try:
+        sample.decode(WINDOWS_ENCODING)
+        return WINDOWS_ENCODING
+    except UnicodeDecodeError:
+        pass
+
+    try:
+        from charset_normalizer import from_bytes
+        best = from_bytes(sample).best()
+        if best is not None:
+            return best.encoding
+    except ImportError:
+        pass
+    return FALLBACK_ENCODING
+
+
+def read_csv(path: str) -> pd.DataFrame:
+    """Parse a CSV once with its detected encoding"""
+    return pd.read_csv(path, encoding=detect_encoding(path))
+
+
+def _cache_path(csv_path: str, digest: str, cache_dir: str) -> str:
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, f"{name}-{digest[:16]}.parquet")
+
+
+def load_labeled_queries(csv_path: str, cache_dir: str = CACHE_DIR) -> pd.DataFrame:
+    """
+    One row per unique query: query, relevant_urls (list), relevant_slugs (unique list)
+    Expected columns: Query, Assessment_url
+    """
+    digest = file_hash(csv_path)
+    cache_path = _cache_path(csv_path, digest, cache_dir)
+    if os.path.exists(cache_path):
+        try:
+            return pd.read_parquet(cache_path)
+        except (ImportError, OSError, ValueError):
+            pass
+
+    df = read_csv(csv_path)
+    df = df.assign(slug=url_slugs(df['Assessment_url']))
+    grouped = df.groupby('Query', sort=True).agg(
+        relevant_urls=('Assessment_url', list),
+        relevant_slugs=('slug', 'unique'),
+    ).reset_index().rename(columns={'Query': 'query'})
+    grouped['relevant_slugs'] = grouped['relevant_slugs'].map(list)
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        grouped.to_parquet(cache_path, index=False)
+    except (ImportError, OSError):
+        pass  # no Parquet engine or read-only checkout - just skip caching
+    return grouped
+
+
+def load_train_queries(csv_path: str, cache_dir: str = CACHE_DIR) -> List[Dict]:
+    """Labeled queries as dicts: {'query', 'relevant_urls', 'relevant_slugs'}"""
+    grouped = load_labeled_queries(csv_path, cache_dir)
+    return [
+        {'query': query, 'relevant_urls': list(urls), 'relevant_slugs': list(slugs)}
+        for query, urls, slugs in zip(grouped['query'], grouped['relevant_urls'], grouped['relevant_slugs'])
+    ]
+
+
+def load_queries(csv_path: str) -> List[str]:
+    """Queries of an unlabeled CSV (expected column: Query), in file order"""
+    return read_csv(csv_path)['Query'].astype(str).tolist()
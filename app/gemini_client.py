@@ -0,0 +1,327 @@
+"""
+Gemini Client Wrapper
+Shared async access to Gemini with a concurrency limit, token-bucket rate
+limiting, jittered retries and a circuit breaker
+"""
+
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from typing import Optional
+
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit breaker is open and calls are short-circuited"""
+
+
+class RateLimitedError(Exception):
+    """Raised when no rate limit token becomes available in time"""
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        # Created lazily so it binds to the running event loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available right now"""
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def wait_time(self) -> float:
+        """Seconds until a token is available (0 if one is available now)"""
+        self._refill()
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+    async def acquire(self, max_wait: float) -> bool:
+        """Wait for a token, giving up if it would take longer than `max_wait` seconds"""
+        async with self._get_lock():
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+
+            wait = (1 - self._tokens) / self.rate
+            if wait > max_wait:
+                return False
+
+            await asyncio.sleep(wait)
+            self._refill()
+            self._tokens -= 1
+            return True
+
+
+class CircuitBreaker:
+    """
+    Classic closed -> open -> half-open breaker
+    - Opens after `failure_threshold` consecutive failures (GeminiClient only
+      records transient ones: 429, 5xx, timeouts)
+    - After `reset_timeout` seconds lets a single probe call through
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.total_short_circuited = 0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+
+        if self.state == "half_open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+
+        self.total_short_circuited += 1
+        return False
+
+    def record_success(self):
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """Give back a half-open probe slot without recording an outcome"""
+        self._probe_in_flight = False
+
+    def snapshot(self) -> dict:
+        retry_in = None
+        if self.state == "open":
+            retry_in = max(0.0, round(self.reset_timeout - (time.monotonic() - self.opened_at), 1))
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "short_circuited": self.total_short_circuited,
+            "retry_in_seconds": retry_in,
+        }
+
+
+def status_code_of(exc: Exception) -> Optional[int]:
+    """Best-effort HTTP status of an upstream error (google.api_core errors expose `.code`)"""
+    for attr in ("code", "status_code"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def is_retryable(exc: Exception) -> bool:
+    """Transient upstream errors - timeouts, 429 and 5xx - are retried and trip the breaker"""
+    if isinstance(exc, asyncio.TimeoutError):
+        return True
+    return status_code_of(exc) in RETRYABLE_STATUS_CODES
+
+
+class GeminiClient:
+    """
+    Async wrapper shared by every request
+    - Semaphore caps concurrent upstream calls
+    - Token bucket keeps us inside the requests-per-minute quota
+    - 429/5xx/timeouts are retried with full-jitter exponential backoff
+    - Circuit breaker short-circuits calls while the upstream is unhealthy;
+      other 4xx errors and blocked prompts are the request's fault and don't count
+    """
+
+    def __init__(
+        self,
+        model,
+        max_concurrency: int = 4,
+        requests_per_minute: float = 15,
+        max_retries: int = 2,
+        base_delay: float = 0.5,
+        max_delay: float = 4.0,
+        timeout: float = 10.0,
+        max_queue_wait: float = 5.0,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.max_queue_wait = max_queue_wait
+        self.breaker = breaker or CircuitBreaker()
+        self.bucket = TokenBucket(
+            rate=requests_per_minute / 60.0,
+            capacity=max(1.0, min(requests_per_minute, max_concurrency)),
+        )
+        self.stats = {"calls": 0, "retries": 0, "failures": 0, "rate_limited": 0}
+        self._semaphore = None
+
+    @classmethod
+    def from_env(cls, model) -> "GeminiClient":
+        """Build a client from GEMINI_* environment variables"""
+        return cls(
+            model,
+            max_concurrency=int(os.getenv("GEMINI_MAX_CONCURRENCY", "4")),
+            requests_per_minute=float(os.getenv("GEMINI_RPM", "15")),
+            max_retries=int(os.getenv("GEMINI_MAX_RETRIES", "2")),
+            timeout=float(os.getenv("GEMINI_TIMEOUT", "10")),
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.getenv("GEMINI_BREAKER_THRESHOLD", "5")),
+                reset_timeout=float(os.getenv("GEMINI_BREAKER_RESET", "30")),
+            ),
+        )
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    async def generate(self, prompt: str, generation_config=None) -> str:
+        """Generate text for `prompt`, raising CircuitOpenError/RateLimitedError when shedding"""
+        if not self.breaker.allow():
+            raise CircuitOpenError("Gemini circuit is open")
+
+        attempt = 0
+        while True:
+            try:
+                async with self._get_semaphore():
+                    if not await self.bucket.acquire(self.max_queue_wait):
+                        self.stats["rate_limited"] += 1
+                        # Local shedding says nothing about upstream health
+                        self.breaker.release()
+                        raise RateLimitedError("Gemini rate limit budget exhausted")
+
+                    self.stats["calls"] += 1
+                    response = await asyncio.wait_for(
+                        self.model.generate_content_async(
+                            prompt, generation_config=generation_config
+                        ),
+                        timeout=self.timeout,
+                    )
+                    # Blocked prompts raise here, after a healthy round trip
+                    text = response.text
+                self.breaker.record_success()
+                return text
+            except RateLimitedError:
+                raise
+            except asyncio.CancelledError:
+                # Caller gave up (e.g. its own deadline) - free a half-open probe slot
+                self.breaker.release()
+                raise
+            except Exception as e:
+                if attempt < self.max_retries and is_retryable(e):
+                    attempt += 1
+                    self.stats["retries"] += 1
+                    await asyncio.sleep(self._backoff(attempt))
+                    continue
+
+                self.stats["failures"] += 1
+                if is_retryable(e):
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.release()
+                raise
+
+    def status(self) -> dict:
+        """Breaker state and counters for /health"""
+        return {
+            "circuit": self.breaker.snapshot(),
+            "max_concurrency": self.max_concurrency,
+            "requests_per_minute": round(self.bucket.rate * 60, 2),
+            **self.stats,
+        }
+
+
+class FakeGeminiError(Exception):
+    """Upstream-style error carrying an HTTP status code"""
+
+    def __init__(self, code: int, message: str = "injected failure"):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+class FakeGeminiResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGeminiModel:
+    """
+    Local stand-in for genai.GenerativeModel
+    Injects latency and failures so the client can be exercised offline
+    """
+
+    def __init__(self, latency: float = 0.05, failure_rate: float = 0.0,
+                 failure_codes=(429, 503), hang_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.failure_codes = tuple(failure_codes)
+        self.hang_rate = hang_rate
+        self.calls = 0
+        self._random = random.Random(seed)
+
+    @classmethod
+    def from_env(cls) -> "FakeGeminiModel":
+        return cls(
+            latency=float(os.getenv("GEMINI_FAKE_LATENCY", "0.05")),
+            failure_rate=float(os.getenv("GEMINI_FAKE_FAILURE_RATE", "0")),
+            hang_rate=float(os.getenv("GEMINI_FAKE_HANG_RATE", "0")),
+        )
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        self.calls += 1
+        if self._random.random() < self.hang_rate:
+            await asyncio.sleep(3600)
+
+        await asyncio.sleep(self.latency)
+
+        if self._random.random() < self.failure_rate:
+            raise FakeGeminiError(self._random.choice(self.failure_codes))
+
+        # JSON-output prompts (query justifications) get one entry per listed id
+        if isinstance(generation_config, dict) and generation_config.get("response_mime_type") == "application/json":
+            ids = re.findall(r'"id": "([^"]+)"', prompt)
+            return FakeGeminiResponse(json.dumps({"items": [{"id": i, "why": "fake justification"} for i in ids]}))
+
+        return FakeGeminiResponse(
+            "• Key skill measured: fake insight\n"
+            "• Ideal candidate level: any\n"
+            "• Best use case: offline testing"
+        )
@@ -0,0 +1,171 @@
+"""
+HTTP Fixtures
+Record/replay transport for requests, so the scraper and JD fetching can run
+offline, fast and deterministically
+- record: real requests go out and every response is kept in a compressed
+  archive (zip: one deflated body per response + index.json)
+- replay: responses are served from the archive; nothing touches the network
+  and rate-limit sleeps are skipped
+
+Configured with SHL_HTTP_FIXTURES=record|replay and SHL_HTTP_ARCHIVE
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+import zipfile
+from typing import Optional
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+
+DEFAULT_ARCHIVE = os.path.join("data", "fixtures", "shl_pages.zip")
+INDEX_MEMBER = "index.json"
+# Headers worth replaying - the rest (dates, cookies, CDN ids) only add noise
+KEPT_HEADERS = ("content-type", "location")
+# Bodies are archived decoded, so the wire encoding/length no longer describe
+# them; dropped on replay too, for archives recorded with them
+BODY_HEADERS = ("content-encoding", "content-length")
+
+MODE = os.getenv("SHL_HTTP_FIXTURES", "")
+ARCHIVE_PATH = os.getenv("SHL_HTTP_ARCHIVE", DEFAULT_ARCHIVE)
+
+
+def request_key(method: str, url: str) -> str:
+    return f"{method.upper()} {url}"
+
+
+class FixtureArchive:
+    """In-memory {request key: response entry} with zip load/save"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+        self.bodies = {}
+        self._lock = threading.Lock()
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: str) -> "FixtureArchive":
+        archive = cls(path)
+        if os.path.exists(path):
+            with zipfile.ZipFile(path) as zf:
+                archive.entries = json.loads(zf.read(INDEX_MEMBER))
+                archive.bodies = {key: zf.read(entry["member"]) for key, entry in archive.entries.items()}
+        return archive
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, response: requests.Response):
+        key = request_key(response.request.method, response.request.url)
+        with self._lock:
+            member = self.entries.get(key, {}).get("member") or f"bodies/{len(self.entries):06d}"
+            self.entries[key] = {
+                "member": member,
+                "status": response.status_code,
+                "reason": response.reason,
+                "url": response.url,
+                "encoding": response.encoding,
+                "headers": {k: v for k, v in response.headers.items() if k.lower() in KEPT_HEADERS},
+            }
+            self.bodies[key] = response.content
+            self.dirty = True
+
+    def get(self, method: str, url: str):
+        key = request_key(method, url)
+        entry = self.entries.get(key)
+        return (entry, self.bodies[key]) if entry else (None, None)
+
+    def save(self):
+        with self._lock:
+            if not self.dirty:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+                zf.writestr(INDEX_MEMBER, json.dumps(self.entries, indent=1, sort_keys=True))
+                for key, entry in self.entries.items():
+                    zf.writestr(entry["member"], self.bodies[key])
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Normal HTTP adapter that also stores every response in the archive"""
+
+    def __init__(self, archive: FixtureArchive, **kwargs):
+        super().__init__(**kwargs)
+        self.archive = archive
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        response.content  # read the body before it is archived
+        self.archive.add(response)
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """Serves archived responses; unknown requests fail like a dead network"""
+
+    def __init__(self, archive: FixtureArchive):
+        super().__init__()
+        self.archive = archive
+
+    def send(self, request, **kwargs):
+        entry, body = self.archive.get(request.method, request.url)
+        if entry is None:
+            raise requests.ConnectionError(f"No recorded response for {request.method} {request.url}")
+
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.reason = entry["reason"]
+        response.headers = CaseInsensitiveDict(
+            {k: v for k, v in entry["headers"].items() if k.lower() not in BODY_HEADERS}
+        )
+        response.encoding = entry["encoding"]
+        response.url = entry["url"]
+        response.request = request
+        response._content = body
+        return response
+
+    def close(self):
+        pass
+
+
+_archive: Optional[FixtureArchive] = None
+
+
+def get_archive() -> FixtureArchive:
+    """The process-wide archive, loaded once (and saved at exit when recording)"""
+    global _archive
+    if _archive is None:
+        _archive = FixtureArchive.load(ARCHIVE_PATH)
+        if MODE == "record":
+            atexit.register(_archive.save)
+    return _archive
+
+
+def fixture_session(mode: Optional[str] = None) -> requests.Session:
+    """requests.Session that records, replays, or (default) just pools connections"""
+    mode = MODE if mode is None else mode
+    session = requests.Session()
+    if mode == "record":
+        adapter = RecordingAdapter(get_archive())
+    elif mode == "replay":
+        adapter = ReplayAdapter(get_archive())
+    else:
+        return session
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def throttle(seconds: float):
+    """Politeness delay between live requests - a no-op when replaying"""
+    if MODE != "replay":
+        time.sleep(seconds)
@@ -0,0 +1,247 @@
+"""
+Ingestion - cleans scraped assessments before indexing
+- Error records from the scrapers are quarantined instead of indexed
+- Exact duplicates (same canonical slug, e.g. /solutions/products/ vs
+  /products/ URLs) collapse to the most complete record
+- Near-duplicates are grouped with MinHash over name + description shingles,
+  candidates found by LSH banding; the API shows one assessment per group
+- Only rows with the same name, test type and duration can share a group:
+  variants like "Automata" / "Automata Pro" or a test and its "Narrative
+  Report" are distinct products despite near-identical descriptions
+
+Usage: python -m app.ingest check   (groups of the exported catalog, exit 1 on mixed groups)
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import zlib
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.assessment_ids import slug_of
+
+
+QUARANTINE_PATH = os.path.join("data", "quarantine.json")
+# Group id (smallest row of the group) per index row, next to the Chroma files
+NEAR_DUPLICATES_FILE = "near_duplicate_groups.npy"
+NEAR_DUPLICATE_THRESHOLD = 0.9
+NUM_PERM = 128
+# 16 bands x 8 rows: pairs at Jaccard 0.9 become candidates with p > 0.9999
+LSH_BANDS = 16
+# Candidate pairs verified per numpy step
+ASSIGN_BLOCK = 65536
+SHINGLE_SIZE = 3
+# Fields that must match exactly before two rows can be near-duplicates
+DUPLICATE_KEY_FIELDS = ("name", "test_type", "duration")
+
+# Placeholder values that carry no meaning
+MISSING_VALUES = {"", "not specified", "no description", "unknown", "duration not specified"}
+
+TOKEN_PATTERN = re.compile(r"\w+")
+SPACE_PATTERN = re.compile(r"\s+")
+ERROR_PATTERN = re.compile(r"^\s*(error\b|failed to\b)", re.IGNORECASE)
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+def is_missing(value) -> bool:
+    return str(value if value is not None else "").strip().lower() in MISSING_VALUES
+
+
+def quarantine_reason(item) -> Optional[str]:
+    """Why a scraped item must not be indexed (None when it is fine)"""
+    if not isinstance(item, dict):
+        return "not an object"
+    if is_missing(item.get("name")) or is_missing(item.get("url")):
+        return "missing name or url"
+    if not slug_of(item["url"]):
+        return "url has no assessment slug"
+    if ERROR_PATTERN.match(str(item.get("description", ""))):
+        return "scrape error"
+    return None
+
+
+def completeness(item: dict) -> Tuple[int, int]:
+    """(filled fields, description length) - higher is better"""
+    filled = sum(1 for value in item.values() if not is_missing(value if not isinstance(value, list) else ",".join(value)))
+    return filled, len(str(item.get("description", "")))
+
+
+def dedup_by_slug(items: List[dict]) -> Tuple[List[dict], List[dict]]:
+    """Keep the most complete record per slug, in first-seen order; return (kept, dropped)"""
+    best = {}
+    order = []
+    dropped = []
+    for item in items:
+        slug = slug_of(item["url"])
+        if slug not in best:
+            best[slug] = item
+            order.append(slug)
+        elif completeness(item) > completeness(best[slug]):
+            dropped.append(best[slug])
+            best[slug] = item
+        else:
+            dropped.append(item)
+    return [best[slug] for slug in order], dropped
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> List[str]:
+    words = TOKEN_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        return [" ".join(words)]
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+def minhash_signatures(texts: List[str], num_perm: int = NUM_PERM, seed: int = 1) -> np.ndarray:
+    """(n, num_perm) MinHash signatures from universal hashes of CRC32 shingle ids"""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+    b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint64)
+    for row, text in enumerate(texts):
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in set(shingles(text))), dtype=np.uint64
+        )
+        # uint64 arithmetic wraps - fine for hashing
+        signatures[row] = ((hashes[:, None] * a + b) % MERSENNE_PRIME).min(axis=0)
+    return signatures
+
+
+def duplicate_key(metadata: dict) -> tuple:
+    """Case/whitespace-insensitive (name, test_type, duration) - rows with different keys never group"""
+    return tuple(SPACE_PATTERN.sub(" ", str(metadata.get(field) or "")).strip().lower()
+                 for field in DUPLICATE_KEY_FIELDS)
+
+
+def near_duplicate_groups(signatures: np.ndarray, key_codes: Optional[np.ndarray] = None,
+                          threshold: float = NEAR_DUPLICATE_THRESHOLD, bands: int = LSH_BANDS) -> np.ndarray:
+    """
+    Group id per row (smallest row in its group) for rows with equal
+    `key_codes` whose estimated Jaccard similarity reaches `threshold`
+    Rows sharing any band of their signature (and their key) are candidates;
+    only candidates are compared, and every step is a numpy pass over the
+    rows - Python only loops over bands and bucket sizes
+    """
+    n, num_perm = signatures.shape
+    rows = num_perm // bands
+    key_codes = np.zeros(n, dtype=np.uint64) if key_codes is None else np.asarray(key_codes, dtype=np.uint64)
+
+    # Candidate pairs: rows with the same (key, band values), per band
+    pairs = []
+    for band in range(bands):
+        columns = np.column_stack([key_codes, signatures[:, band * rows:(band + 1) * rows]])
+        _, bucket = np.unique(columns, axis=0, return_inverse=True)
+        bucket = bucket.reshape(-1)
+        order = np.argsort(bucket, kind="stable")
+        sorted_buckets = bucket[order]
+        # Members of a bucket are adjacent once sorted: pair every row with the
+        # rows `offset` places after it, up to the largest bucket
+        offset = 1
+        while offset < n:
+            same = sorted_buckets[:-offset] == sorted_buckets[offset:]
+            if not same.any():
+                break
+            pairs.append(np.stack([order[:-offset][same], order[offset:][same]], axis=1))
+            offset += 1
+    if not pairs:
+        return np.arange(n, dtype=np.int32)
+    pairs = np.unique(np.sort(np.concatenate(pairs), axis=1), axis=0)
+
+    # Verify candidates on the full signatures, in blocks to bound memory
+    similar = []
+    for start in range(0, len(pairs), ASSIGN_BLOCK):
+        block = pairs[start:start + ASSIGN_BLOCK]
+        agreement = (signatures[block[:, 0]] == signatures[block[:, 1]]).mean(axis=1)
+        similar.append(block[agreement >= threshold])
+    edges = np.concatenate(similar)
+
+    # Connected components: propagate the smallest row id along edges until stable
+    groups = np.arange(n)
+    while len(edges):
+        smallest = np.minimum(groups[edges[:, 0]], groups[edges[:, 1]])
+        updated = groups.copy()
+        np.minimum.at(updated, edges[:, 0], smallest)
+        np.minimum.at(updated, edges[:, 1], smallest)
+        # Pointer jumping: follow each row's group to that group's own group
+        updated = updated[updated]
+        if np.array_equal(updated, groups):
+            break
+        groups = updated
+    return groups.astype(np.int32)
+
+
+def catalog_near_duplicate_groups(metadatas: List[dict]) -> np.ndarray:
+    """Near-duplicate groups of catalog rows (MinHash over name + description)"""
+    signatures = minhash_signatures([f"{m.get('name', '')} {m.get('description', '')}" for m in metadatas])
+    keys = np.array(["\x1f".join(duplicate_key(m)) for m in metadatas])
+    _, key_codes = np.unique(keys, return_inverse=True)
+    return near_duplicate_groups(signatures, key_codes.reshape(-1))
+
+
+def mixed_groups(metadatas: List[dict], groups: np.ndarray) -> List[List[str]]:
+    """Names per group whose members differ in name, test type or duration (should be empty)"""
+    return [
+        [metadatas[row].get("name", "") for row in rows]
+        for rows in group_members(groups).values()
+        if len({duplicate_key(metadatas[row]) for row in rows}) > 1
+    ]
+
+
+def ingest(items: list) -> Tuple[List[dict], List[dict]]:
+    """
+    Quarantine bad records and collapse exact duplicates
+    Returns (clean items, quarantined entries as {"reason", "item"})
+    """
+    quarantined = []
+    valid = []
+    for item in items:
+        reason = quarantine_reason(item)
+        if reason:
+            quarantined.append({"reason": reason, "item": item})
+        else:
+            valid.append(item)
+
+    clean, duplicates = dedup_by_slug(valid)
+    quarantined.extend({"reason": "duplicate slug", "item": item} for item in duplicates)
+    return clean, quarantined
+
+
+def load_near_duplicate_groups(index_dir: str) -> Optional[np.ndarray]:
+    """Groups written by rag.py, or None for indexes built before grouping"""
+    try:
+        return np.load(os.path.join(index_dir, NEAR_DUPLICATES_FILE))
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check near-duplicate grouping over the exported catalog")
+    parser.add_argument("command", choices=["check"])
+    parser.add_argument("--index-dir", default=os.path.join("app", "chroma_db"))
+    args = parser.parse_args()
+
+    from app.retrieval import METADATA_FILE
+    with open(os.path.join(args.index_dir, METADATA_FILE), encoding="utf-8") as f:
+        metadatas = json.load(f)
+    groups = catalog_near_duplicate_groups(metadatas)
+
+    shared = [rows for rows in group_members(groups).values() if len(rows) > 1]
+    for rows in shared:
+        print(f"   {len(rows)} x {metadatas[rows[0]].get('name', '')}")
+    print(f"✅ {len(metadatas)} assessments, {sum(len(rows) for rows in shared)} in {len(shared)} near-duplicate groups")
+
+    saved = load_near_duplicate_groups(args.index_dir)
+    if saved is not None and not np.array_equal(saved, groups):
+        print(f"⚠️  {NEAR_DUPLICATES_FILE} differs from the current grouping - rebuild with python app/rag.py")
+    mixed = mixed_groups(metadatas, groups)
+    for names in mixed:
+        print(f"❌ Distinct assessments grouped: {names}")
+    sys.exit(1 if mixed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Assessment Insights
+The "Key skill measured / Ideal candidate level / Best use case" bullets
+depend only on the assessment, so rag.py generates them once per assessment
+and stores them in the index metadata (`ai_insights`) - /recommend then
+serves them without any LLM call
+- identical descriptions share one call
+- calls go through GeminiClient: concurrency cap, RPM budget, retries, breaker
+- SHL_INSIGHTS=stub (opt-in only) swaps in a deterministic local provider so
+  the build runs offline; rows it writes are tagged and the API only serves
+  them with GEMINI_FAKE=1. SHL_INSIGHTS=off skips insights
+
+Query-conditioned justifications ("why this fits this JD") are the one
+exception: the query and the final top-K go out in a single JSON-output
+prompt per request, parsed back into one line per assessment
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+from typing import Dict, List, Optional
+
+from app.gemini_client import FakeGeminiResponse, GeminiClient
+
+
+INSIGHT_PROVIDERS = ("gemini", "stub", "off")
+# Metadata field naming the provider of a row's ai_insights
+PROVIDER_FIELD = "ai_insights_provider"
+UNAVAILABLE = "AI insights unavailable"
+# Descriptions are cut here in the prompt (and in the insight cache key)
+DESCRIPTION_CHARS = 300
+GENERATION_CONFIG = {"max_output_tokens": 100, "temperature": 0.3}
+# Progress is reported once per batch of unique descriptions
+BUILD_BATCH = 50
+
+# Query-conditioned justifications: one JSON answer for the whole top-K
+JUSTIFY_MARKER = "Return JSON only"
+QUERY_CHARS = 1500
+SUMMARY_CHARS = 200
+JUSTIFICATION_CONFIG = {"max_output_tokens": 600, "temperature": 0.3, "response_mime_type": "application/json"}
+
+LEVEL_TERMS = (
+    ("graduate", "Graduates and entry-level candidates"),
+    ("entry", "Graduates and entry-level candidates"),
+    ("executive", "Executives and senior leaders"),
+    ("director", "Executives and senior leaders"),
+    ("manager", "Managers and supervisors"),
+    ("supervisor", "Managers and supervisors"),
+    ("senior", "Experienced professionals"),
+    ("professional", "Experienced professionals"),
+)
+USE_CASE_TERMS = (
+    ("personality", "Judging behavioural and cultural fit"),
+    ("simulation", "Realistic job previews and work-sample screening"),
+    ("situational", "Judging decisions in realistic work scenarios"),
+    ("reasoning", "Early aptitude screening of large applicant pools"),
+    ("knowledge", "Technical screening before interviews"),
+    ("skills", "Technical screening before interviews"),
+)
+
+
+def insight_prompt(description: str) -> str:
+    return f"""As an HR expert, analyze this assessment and provide 3 concise bullet points (max 15 words each):
+
+Description: {description[:DESCRIPTION_CHARS]}
+
+Format as:
+• Key skill measured
+• Ideal candidate level
+• Best use case"""
+
+
+def cache_key(description: str) -> str:
+    """Key of a generated insight in the shared LocalStore"""
+    return f"insight:{description[:DESCRIPTION_CHARS]}"
+
+
+def justification_prompt(query: str, items: List[dict]) -> str:
+    """One prompt for the whole list; items are {"id", "name", "summary"}"""
+    listing = "\n".join(
+        json.dumps({"id": item["id"], "name": item["name"], "summary": item["summary"][:SUMMARY_CHARS]},
+                   ensure_ascii=False)
+        for item in items
+    )
+    return f"""As an HR expert, explain in one sentence (max 25 words) why each assessment fits this hiring need.
+
+Hiring need: {query[:QUERY_CHARS]}
+
+Assessments (one JSON object per line):
+{listing}
+
+{JUSTIFY_MARKER}: {{"items": [{{"id": "<id>", "why": "<sentence>"}}, ...]}} with one entry per assessment id."""
+
+
+def justification_key(query: str, ids: List[str]) -> str:
+    """LocalStore key of one query's justifications for one result list"""
+    digest = hashlib.sha1(f"{query}\n{','.join(ids)}".encode("utf-8")).hexdigest()
+    return f"justify:{digest}"
+
+
+def parse_justifications(text: str) -> Dict[str, str]:
+    """
+    {id: sentence} from the model's JSON answer
+    Tolerates code fences and a bare list; malformed output gives {}
+    """
+    text = text.strip()
+    if text.startswith("```"):
+        text = re.sub(r"^```(?:json)?\s*|\s*```$", "", text)
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return {}
+    items = data.get("items", []) if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        return {}
+    return {
+        str(item["id"]): str(item["why"]).strip()
+        for item in items
+        if isinstance(item, dict) and "id" in item and str(item.get("why", "")).strip()
+    }
+
+
+class StubInsightModel:
+    """
+    Offline stand-in for genai.GenerativeModel that answers insight prompts
+    from the description itself (keyword rules, same text every run)
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    @staticmethod
+    def description_of(prompt: str) -> str:
+        match = re.search(r"Description: (.*?)\n\nFormat as:", prompt, re.DOTALL)
+        return match.group(1).strip() if match else prompt
+
+    @staticmethod
+    def justify(prompt: str) -> str:
+        """Names the query words each summary shares"""
+        query = re.search(r"Hiring need: (.*?)\n\nAssessments", prompt, re.DOTALL)
+        query_words = set(re.findall(r"[a-z]{4,}", query.group(1).lower())) if query else set()
+        items = []
+        for line in prompt.splitlines():
+            if line.startswith("{") and '"id"' in line:
+                item = json.loads(line)
+                shared = sorted(query_words & set(re.findall(r"[a-z]{4,}", item["summary"].lower())))
+                why = (f"Covers {', '.join(shared[:4])} from the role description" if shared
+                       else f"{item['name']} complements the other recommended assessments")
+                items.append({"id": item["id"], "why": why})
+        return json.dumps({"items": items})
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        self.calls += 1
+        if JUSTIFY_MARKER in prompt:
+            return FakeGeminiResponse(self.justify(prompt))
+        description = self.description_of(prompt)
+        lower = description.lower()
+
+        words = re.split(r"(?<=[.!?])\s", description, maxsplit=1)[0].split()
+        skill = " ".join(words[:12]).rstrip(".,;:") or "General job-related ability"
+        level = next((label for term, label in LEVEL_TERMS if term in lower), "Candidates at any level")
+        use_case = next((label for term, label in USE_CASE_TERMS if term in lower), "General pre-hire screening")
+        return FakeGeminiResponse(
+            f"• Key skill measured: {skill}\n"
+            f"• Ideal candidate level: {level}\n"
+            f"• Best use case: {use_case}"
+        )
+
+
+def default_provider() -> str:
+    provider = os.getenv("SHL_INSIGHTS")
+    if provider:
+        if provider not in INSIGHT_PROVIDERS:
+            raise ValueError(f"Unknown insight provider: {provider}")
+        return provider
+    # Never the stub by default: its keyword text must not reach a production index
+    return "gemini" if os.getenv("GEMINI_API_KEY") else "off"
+
+
+def insight_client(provider: str) -> GeminiClient:
+    """Client for the build: Gemini within the GEMINI_* limits, or the unthrottled stub"""
+    if provider == "stub":
+        return GeminiClient(StubInsightModel(), max_concurrency=16, requests_per_minute=1e9)
+    import google.generativeai as genai
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    return GeminiClient.from_env(genai.GenerativeModel('gemini-1.5-flash'))
+
+
+async def generate_insights(client: GeminiClient, descriptions: List[str], store=None) -> List[str]:
+    """
+    Insight per description ("" where generation failed, so the API can fall back)
+    Concurrency and rate limits come from the client; `store` reuses earlier insights
+    """
+    unique = list(dict.fromkeys(descriptions))
+    insights = {}
+
+    async def one(description: str) -> str:
+        cached = store.get(cache_key(description)) if store is not None else None
+        if cached:
+            return cached
+        try:
+            text = (await client.generate(insight_prompt(description), generation_config=GENERATION_CONFIG)).strip()
+        except Exception as e:
+            print(f"   ⚠️  Insight failed: {e}")
+            return ""
+        if store is not None and text:
+            store.set(cache_key(description), text)
+        return text
+
+    for start in range(0, len(unique), BUILD_BATCH):
+        batch = unique[start:start + BUILD_BATCH]
+        for description, text in zip(batch, await asyncio.gather(*[one(d) for d in batch])):
+            insights[description] = text
+        print(f"   Generated insights {min(start + BUILD_BATCH, len(unique))}/{len(unique)}...")
+
+    return [insights[description] for description in descriptions]
+
+
+def build_insights(descriptions: List[str], provider: Optional[str] = None, store=None) -> List[str]:
+    """Synchronous entry point for rag.py; [] when insights are turned off"""
+    provider = provider or default_provider()
+    if provider == "off":
+        return []
+    client = insight_client(provider)
+    # Stub text must never land in the cache the live API reads
+    return asyncio.run(generate_insights(client, descriptions, store if provider == "gemini" else None))
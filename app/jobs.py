@@ -0,0 +1,136 @@
+"""
+Background Jobs
+Slow queries (JD URLs: page fetch + extraction + recommendation) run off the
+request path - the client gets a job id at once and polls or subscribes (SSE)
+- a bounded in-process queue feeds a fixed pool of asyncio workers, so a slow
+  external page ties up a job worker, never an HTTP request
+- job records live in a LocalStore, the same file-per-key store the insight
+  cache uses: any forked worker can answer a poll for a job another worker
+  runs, and records expire after `ttl` seconds
+- a full queue raises Overloaded (-> 503) instead of growing without bound
+Jobs are not persisted across restarts: a job whose worker died stays
+"queued"/"running" until its record expires
+"""
+
+import asyncio
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional
+
+import orjson
+
+from app.admission import Overloaded
+from app.local_store import LocalStore
+
+
+FINISHED = ("done", "failed")
+
+
+class JobError(Exception):
+    """A job failure to report to the client as-is (HTTP status + detail)"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class JobQueue:
+    """
+    `submit(payload)` -> job record; `workers` tasks run `runner(payload)` -> encoded JSON body
+    Job record: {"id", "status", "created", "updated", "request", "result" | "error"}
+    """
+
+    def __init__(self, root: str, runner: Callable[[dict], Awaitable[bytes]], workers: int = 4,
+                 max_pending: int = 256, ttl: float = 3600.0):
+        self.store = LocalStore(root, ttl=ttl)
+        self.runner = runner
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.stats_counts = {"submitted": 0, "done": 0, "failed": 0, "rejected": 0}
+        self.running = 0
+        self._queue = None
+        self._tasks = []
+        # Job id -> event set on every state change, for SSE subscribers in this process
+        self._changed: Dict[str, asyncio.Event] = {}
+
+    def _start(self) -> asyncio.Queue:
+        # Created lazily so queue and workers bind to the running event loop
+        if self._queue is None:
+            self._queue = asyncio.Queue(self.max_pending)
+            self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+        return self._queue
+
+    def _key(self, job_id: str) -> str:
+        return f"job:{job_id}"
+
+    def _update(self, job: dict, **fields):
+        job.update(fields, updated=time.time())
+        self.store.set(self._key(job["id"]), job)
+        event = self._changed.get(job["id"])
+        if event is not None:
+            event.set()
+
+    def submit(self, payload: dict) -> dict:
+        """Queue a job; raises Overloaded when `max_pending` jobs are already waiting"""
+        queue = self._start()
+        if queue.full():
+            self.stats_counts["rejected"] += 1
+            raise Overloaded("Job queue full", retry_after=5.0)
+        now = time.time()
+        job = {"id": uuid.uuid4().hex, "status": "queued", "created": now, "updated": now, "request": payload}
+        self.store.set(self._key(job["id"]), job)
+        queue.put_nowait(job)
+        self.stats_counts["submitted"] += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[dict]:
+        # Ids are hex uuids; anything else cannot name a job
+        if len(job_id) != 32 or not all(c in "0123456789abcdef" for c in job_id):
+            return None
+        return self.store.get(self._key(job_id))
+
+    async def wait(self, job_id: str, timeout: float):
+        """Return on the job's next state change here, or after `timeout` (it may run in another worker)"""
+        event = self._changed.setdefault(job_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        event.clear()
+
+    def forget(self, job_id: str):
+        """Drop a subscriber's wakeup event once its stream ends"""
+        self._changed.pop(job_id, None)
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            self.running += 1
+            try:
+                self._update(job, status="running")
+                try:
+                    body = await self.runner(job["request"])
+                except JobError as e:
+                    self.stats_counts["failed"] += 1
+                    self._update(job, status="failed", error={"status_code": e.status_code, "detail": e.detail})
+                except Exception as e:
+                    self.stats_counts["failed"] += 1
+                    self._update(job, status="failed", error={"status_code": 500, "detail": f"Job error: {e}"})
+                else:
+                    self.stats_counts["done"] += 1
+                    # Fragment: the body is already JSON, stored without a decode/encode round trip
+                    self._update(job, status="done", result=orjson.Fragment(body))
+            finally:
+                self.running -= 1
+                self._queue.task_done()
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "running": self.running,
+            "max_pending": self.max_pending,
+            **self.stats_counts,
+        }
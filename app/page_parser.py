@@ -0,0 +1,173 @@
+"""
+Page Parser
+lxml-based extraction for SHL catalog pages
+- Catalog pages: precompiled XPath for the Individual Test Solutions table
+- Assessment pages: every field is extracted in ONE walk over the tree
+  (no repeated whole-document searches)
+- Pure functions of the HTML, so parsing can run in a process pool apart
+  from fetching
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from urllib.parse import urljoin
+
+from lxml import etree, html as lxml_html
+
+
+BASE_URL = "https://www.shl.com"
+
+TABLES = etree.XPath("//table")
+TABLE_ROWS = etree.XPath(".//tr[td]")
+ROW_LINK = etree.XPath("td[1]//a[@href][1]")
+
+HEADINGS = {"h1", "h2", "h3", "h4"}
+DESCRIPTION_KEYWORDS = ("assessment", "measure", "candidate", "skill", "test", "evaluates")
+
+
+def text_of(element, separator: str = "") -> str:
+    """bs4-style get_text(separator, strip=True)"""
+    return separator.join(t.strip() for t in element.itertext() if t.strip())
+
+
+def has_class(element, name: str) -> bool:
+    return name in (element.get("class") or "").split()
+
+
+def parse_catalog_page(page_html: str, base_url: str = BASE_URL) -> List[Tuple[str, str]]:
+    """(name, url) of every Individual Test Solution row on a catalog page"""
+    root = lxml_html.fromstring(page_html)
+    tables = TABLES(root)
+    if not tables:
+        return []
+    if len(tables) < 2:
+        print(f"   ⚠️  Expected 2 tables (Pre-packaged + Individual), found {len(tables)}")
+
+    # The SECOND table contains "Individual Test Solutions"
+    individual_table = tables[1] if len(tables) >= 2 else tables[0]
+
+    rows = []
+    for row in TABLE_ROWS(individual_table):
+        links = ROW_LINK(row)
+        if not links:
+            continue
+        url = urljoin(base_url, links[0].get("href").strip())
+        # Clean duplicate path in URL
+        url = url.replace("solutions/products/product-catalog/solutions/products", "solutions/products")
+        rows.append((text_of(links[0]), url))
+    return rows
+
+
+def _spec_fields(spec, data: dict):
+    spec_text = text_of(spec, " ").lower()
+
+    # Duration
+    if "duration" in spec_text or "assessment length" in spec_text:
+        for text in spec.itertext():
+            if "minutes" in text.lower():
+                data["duration"] = text.strip()
+                break
+
+    # Languages
+    if "language" in spec_text:
+        lang_text = text_of(spec)
+        if "," in lang_text:
+            data["languages"] = [l.strip() for l in lang_text.split(",")]
+
+    # Job Level
+    if "job level" in spec_text:
+        data["job_level"] = text_of(spec)
+
+
+def parse_assessment_page(page_html: str, name: str, url: str, page_num: Optional[int] = None) -> dict:
+    """Assessment record from a detail page, same fields and fallbacks as the scraper always used"""
+    data = {
+        "name": name,
+        "url": url,
+        "category": "Individual Test Solutions",
+        "description": "Description unavailable",
+        "duration": "Duration not specified",
+        "languages": [],
+        "job_level": "Level not specified",
+        "remote_testing": "Not specified",
+        "adaptive_support": "Not specified",
+        "test_type": "Type not specified",
+        "source_page": page_num,
+    }
+    root = lxml_html.fromstring(page_html)
+
+    heading_found = waiting_for_p = False
+    heading_description = keyword_description = ""
+    test_type_parent = remote_parent = None
+
+    for element in root.iter(etree.Element):
+        tag = element.tag
+
+        # Description, method 1: first <p> after the first "description" heading
+        if tag in HEADINGS and not heading_found and "description" in text_of(element, " ").lower():
+            heading_found = waiting_for_p = True
+        elif tag == "p":
+            if waiting_for_p:
+                heading_description = text_of(element, " ")
+                waiting_for_p = False
+            # Method 2: first keyword paragraph that is long enough
+            if not keyword_description:
+                text = text_of(element, " ")
+                if len(text) > 50 and any(kw in text.lower() for kw in DESCRIPTION_KEYWORDS):
+                    keyword_description = text
+        elif tag == "div" and has_class(element, "specification"):
+            _spec_fields(element, data)
+
+        # Text-node matches: element.text belongs to the element, .tail to its parent
+        if test_type_parent is None or remote_parent is None:
+            for text, parent in ((element.text, element), (element.tail, element.getparent())):
+                if not text or parent is None:
+                    continue
+                lower = text.lower()
+                if test_type_parent is None and "test type:" in lower:
+                    test_type_parent = parent
+                if remote_parent is None and "remote testing" in lower:
+                    remote_parent = parent
+
+    description = heading_description or keyword_description
+    if description:
+        data["description"] = description
+
+    if test_type_parent is not None:
+        data["test_type"] = text_of(test_type_parent).replace("Test Type:", "").strip()
+
+    if remote_parent is not None:
+        green = any(has_class(e, "green") for e in remote_parent.iterdescendants(etree.Element))
+        if green or "yes" in "".join(remote_parent.itertext()).lower():
+            data["remote_testing"] = "Yes"
+        else:
+            data["remote_testing"] = "No"
+
+    return data
+
+
+def _parse_job(job: tuple) -> dict:
+    page_html, name, url, page_num = job
+    try:
+        return parse_assessment_page(page_html, name, url, page_num)
+    except (etree.ParserError, ValueError) as e:
+        return {
+            "name": name,
+            "url": url,
+            "category": "Individual Test Solutions",
+            "description": f"Error: {str(e)}",
+            "source_page": page_num,
+        }
+
+
+def parse_assessment_pages(jobs: List[tuple], workers: Optional[int] = None) -> List[dict]:
+    """
+    Parse (html, name, url, page_num) jobs, in order
+    workers=1 parses inline; otherwise a process pool spreads pages over cores
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) < 2:
+        return [_parse_job(job) for job in jobs]
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(_parse_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
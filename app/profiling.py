@@ -0,0 +1,298 @@
+"""
+Profiling
+Time-bounded profiles of a live API worker, or of an offline replay of the
+train queries through the same /recommend code path
+- cprofile: deterministic cProfile of the event-loop thread (encoding,
+  search, ranking, pydantic and serialization all run there) -> pstats
+  file (open with `python -m pstats` or snakeviz) or a text summary
+- sample: stack sampler thread, py-spy style but in-process and dependency
+  free: all threads (incl. scraping / to_thread work) every `interval`
+  seconds -> speedscope JSON (https://www.speedscope.app) or collapsed
+  stacks for flamegraph.pl
+- py-spy: the real py-spy attached to this process, if installed (needs
+  ptrace permission) -> speedscope JSON
+
+Usage (offline): python -m app.profiling replay --profiler sample --out replay.speedscope.json
+(run rag.py first - it exports catalog_embeddings.npy / catalog_metadata.json)
+"""
+
+import argparse
+import asyncio
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Optional, Tuple
+
+import orjson
+
+
+PROFILERS = ("cprofile", "sample", "py-spy")
+# Output formats per profiler; the first is the default
+FORMATS = {
+    "cprofile": ("pstats", "text"),
+    "sample": ("speedscope", "collapsed"),
+    "py-spy": ("speedscope",),
+}
+EXTENSIONS = {"pstats": ".pstats", "text": ".txt", "speedscope": ".speedscope.json", "collapsed": ".collapsed.txt"}
+MEDIA_TYPES = {"pstats": "application/octet-stream", "text": "text/plain", "speedscope": "application/json",
+               "collapsed": "text/plain"}
+DEFAULT_INTERVAL = 0.005
+
+
+class ProfilerBusy(Exception):
+    """Only one profile per process at a time (cProfile cannot nest)"""
+
+
+_active = threading.Lock()
+
+
+class StackSampler:
+    """Samples the Python stacks of every other thread; counts identical stacks"""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                    frame = frame.f_back
+                self.stacks[(names.get(ident, str(ident)), tuple(reversed(stack)))] += 1
+            self.samples += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> bytes:
+        """`thread;outer;...;inner count` lines (Brendan Gregg's flamegraph input)"""
+        lines = [
+            ";".join([thread] + [f"{name} ({os.path.basename(path)}:{line})" for name, path, line in stack])
+            + f" {count}"
+            for (thread, stack), count in self.stacks.most_common()
+        ]
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    def speedscope(self, name: str) -> bytes:
+        """Speedscope file: one sampled profile per thread, weights in seconds"""
+        frames, frame_index, profiles = [], {}, {}
+        for (thread, stack), count in self.stacks.items():
+            indices = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                indices.append(frame_index[frame])
+            profile = profiles.setdefault(thread, {"samples": [], "weights": []})
+            profile["samples"].append(indices)
+            profile["weights"].append(count * self.interval)
+        return orjson.dumps({
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "app.profiling",
+            "shared": {"frames": frames},
+            "profiles": [
+                {"type": "sampled", "name": thread, "unit": "seconds", "startValue": 0,
+                 "endValue": sum(profile["weights"]), **profile}
+                for thread, profile in profiles.items()
+            ],
+        })
+
+
+def cprofile_output(profile: cProfile.Profile, fmt: str, limit: int = 60) -> bytes:
+    if fmt == "pstats":
+        # What Profile.dump_stats writes, without the temp file
+        profile.create_stats()
+        return marshal.dumps(profile.stats)
+    stream = io.StringIO()
+    pstats.Stats(profile, stream=stream).sort_stats("cumulative").print_stats(limit)
+    return stream.getvalue().encode("utf-8")
+
+
+def check_options(profiler: str, fmt: Optional[str]) -> str:
+    """The output format to use; ValueError for unknown profiler/format pairs"""
+    if profiler not in PROFILERS:
+        raise ValueError(f"Unknown profiler: {profiler} (expected one of {', '.join(PROFILERS)})")
+    fmt = fmt or FORMATS[profiler][0]
+    if fmt not in FORMATS[profiler]:
+        raise ValueError(f"{profiler} writes {' or '.join(FORMATS[profiler])}, not {fmt}")
+    if profiler == "py-spy" and shutil.which("py-spy") is None:
+        raise ValueError("py-spy is not installed (pip install py-spy)")
+    return fmt
+
+
+async def py_spy(seconds: float) -> bytes:
+    fd, path = tempfile.mkstemp(suffix=".speedscope.json")
+    os.close(fd)
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "py-spy", "record", "--pid", str(os.getpid()), "--duration", str(max(1, round(seconds))),
+            "--format", "speedscope", "--output", path, "--nonblocking",
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE,
+        )
+        _, stderr = await process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError(f"py-spy failed: {stderr.decode(errors='replace').strip()}")
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.unlink(path)
+
+
+async def profile_running(seconds: float, profiler: str = "sample", fmt: Optional[str] = None,
+                          interval: float = DEFAULT_INTERVAL) -> Tuple[bytes, str]:
+    """
+    Profile whatever this process does for the next `seconds` (call from the event loop)
+    Returns (data, format); raises ProfilerBusy while another profile runs
+    """
+    fmt = check_options(profiler, fmt)
+    if not _active.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running in this worker")
+    try:
+        if profiler == "py-spy":
+            return await py_spy(seconds), fmt
+        if profiler == "cprofile":
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                profile.disable()
+            return cprofile_output(profile, fmt), fmt
+        sampler = StackSampler(interval)
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            sampler.stop()
+        return (sampler.speedscope(f"worker {os.getpid()}") if fmt == "speedscope" else sampler.collapsed()), fmt
+    finally:
+        _active.release()
+
+
+def install_signal_handler(out_dir: str, seconds: float = 10.0, signum: Optional[int] = None) -> bool:
+    """
+    `kill -USR2 <worker pid>` samples the worker for `seconds` and writes a
+    speedscope file to `out_dir` - no endpoint, token or event loop needed
+    False where the signal is unavailable (Windows) or not on the main thread
+    """
+    signum = signum if signum is not None else getattr(signal, "SIGUSR2", None)
+    if signum is None or threading.current_thread() is not threading.main_thread():
+        return False
+
+    def capture():
+        sampler = StackSampler()
+        sampler.start()
+        time.sleep(seconds)
+        sampler.stop()
+        os.makedirs(out_dir, exist_ok=True)
+        path = os.path.join(out_dir, f"profile-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.speedscope.json")
+        with open(path, "wb") as f:
+            f.write(sampler.speedscope(f"worker {os.getpid()}"))
+        print(f"📊 Profile written to {path} ({sampler.samples} samples)")
+        _active.release()
+
+    def handler(signum, frame):
+        # Handlers run between bytecodes on the main thread: hand off at once
+        if not _active.acquire(blocking=False):
+            print("⚠️  Profile already running - signal ignored")
+            return
+        threading.Thread(target=capture, name="signal-profile", daemon=True).start()
+
+    signal.signal(signum, handler)
+    return True
+
+
+async def replay(queries: list, use_ai: bool, repeat: int):
+    """The train queries through recommend_body - the /recommend path minus HTTP"""
+    from app import api_fixed
+    for _ in range(repeat):
+        for text in queries:
+            await api_fixed.recommend_body(api_fixed.QueryRequest(text=text, use_ai=use_ai))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline profile of the /recommend path")
+    parser.add_argument("command", choices=["replay"])
+    parser.add_argument("--csv", default=os.path.join("data", "Gen_AI_Dataset_Train.csv"))
+    parser.add_argument("--profiler", choices=["cprofile", "sample"], default="cprofile")
+    parser.add_argument("--format", help="pstats/text (cprofile), speedscope/collapsed (sample)")
+    parser.add_argument("--out", help="Output file (default: replay + format extension)")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the queries this many times")
+    parser.add_argument("--use-ai", action="store_true", help="Include insights (GEMINI_FAKE=1 for offline runs)")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help="Sampling interval (seconds)")
+    args = parser.parse_args()
+    fmt = check_options(args.profiler, args.format)
+
+    from app.retrieval import require_shared_index
+    # Must run before the API module reads SHL_INDEX
+    require_shared_index("app.profiling replay")
+    from app import api_fixed
+    from app.dataset_loader import load_train_queries
+    from app.local_store import LocalStore
+
+    print("🚀 Replay Profile")
+    print("=" * 70)
+    queries = [item["query"] for item in load_train_queries(args.csv)]
+    print(f"✅ {len(queries)} queries x {args.repeat}, profiler={args.profiler}")
+
+    async def run():
+        # Model, index and first-call costs stay out of the profile, like in a warm worker
+        api_fixed.load_index()
+        await replay(queries[:1], args.use_ai, 1)
+        api_fixed.cache_store = LocalStore(tempfile.mkdtemp(prefix="shl_profile_"))
+        if api_fixed.semantic_cache is not None:
+            api_fixed.semantic_cache.clear()
+
+        start = time.perf_counter()
+        if args.profiler == "cprofile":
+            profile = cProfile.Profile()
+            profile.enable()
+            await replay(queries, args.use_ai, args.repeat)
+            profile.disable()
+            data, summary = cprofile_output(profile, fmt), cprofile_output(profile, "text", limit=15)
+        else:
+            sampler = StackSampler(args.interval)
+            sampler.start()
+            await replay(queries, args.use_ai, args.repeat)
+            sampler.stop()
+            data = sampler.speedscope("replay") if fmt == "speedscope" else sampler.collapsed()
+            summary = b"\n".join(line[-160:] for line in sampler.collapsed().splitlines()[:5])
+        return data, summary.decode("utf-8"), time.perf_counter() - start
+
+    data, summary, elapsed = asyncio.run(run())
+
+    out = args.out or f"replay{EXTENSIONS[fmt]}"
+    with open(out, "wb") as f:
+        f.write(data)
+    print(summary)
+    print("=" * 70)
+    print(f"✅ {len(queries) * args.repeat / elapsed:.1f} queries/s, profile written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Quantized Index
+Compact single-file index for memory-constrained hosts
+- int8 codes (per-row scale) or sign bits are scanned for a shortlist
+- the shortlist is rescored against float16 vectors in the same file,
+  memory-mapped, so only shortlisted rows are ever paged in
+- only the requested quantization is written: int8 + float16 is ~3/4 of the
+  float32 matrix, binary + float16 ~1/2; the file needs no .npy next to it
+  (the API still reads the row-ordered catalog_metadata.json)
+
+File layout: MAGIC, 8-byte header length, JSON header, then 64-byte aligned
+sections (int8: codes, scales / binary: bits; both: rescore) whose offsets,
+dtypes and shapes are listed in the header
+Usage: python -m app.quantized_index int8   (or: binary; run rag.py first)
+"""
+
+import argparse
+import json
+import os
+import struct
+
+import numpy as np
+
+from app.retrieval import EMBEDDINGS_FILE, MmapRetriever
+
+
+QUANTIZED_FILES = {"int8": "catalog_index.int8.shlq", "binary": "catalog_index.binary.shlq"}
+MAGIC = b"SHLQ3\n"
+ALIGN = 64
+QUANTIZATIONS = ("int8", "binary")
+# Shortlist size = k * factor; sign bits lose far more than int8 codes
+RESCORE_FACTORS = {"int8": 4, "binary": 32}
+# int8 rows upcast per scan step - bounds the temporary float32 copy
+SCAN_BLOCK = 8192
+
+# Set bits per byte value, for Hamming distances over packed sign bits
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def quantize(embeddings: np.ndarray, quantization: str) -> dict:
+    """Scan sections for one quantization of unit-normalized float32 embeddings"""
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization: {quantization}")
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    # Shortlist rescoring: float16 keeps cosine errors around 1e-3, half the float32 bytes
+    rescore = vectors.astype(np.float16)
+    if quantization == "binary":
+        return {"bits": np.packbits(vectors > 0, axis=1), "rescore": rescore}
+    scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+    return {
+        "codes": np.round(vectors / scales[:, None]).astype(np.int8),
+        "scales": scales.astype(np.float32),
+        "rescore": rescore,
+    }
+
+
+def write_quantized_index(path: str, embeddings: np.ndarray, quantization: str):
+    """Quantize embeddings and write the sections `quantization` scans plus the rescoring vectors"""
+    sections = quantize(embeddings, quantization)
+
+    # Offsets depend on the header size, so lay out against a generous fixed header slot
+    header_slot = 4096
+    offset = _aligned(len(MAGIC) + 8 + header_slot)
+    layout = {}
+    for name, array in sections.items():
+        layout[name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+        offset = _aligned(offset + array.nbytes)
+    header = json.dumps({
+        "quantization": quantization, "n": embeddings.shape[0], "dim": embeddings.shape[1], "sections": layout,
+    }).encode("utf-8")
+    if len(header) > header_slot:
+        raise ValueError("Quantized index header too large")
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for name, array in sections.items():
+            f.seek(layout[name]["offset"])
+            f.write(array.tobytes())
+        f.truncate(offset)
+    os.replace(tmp_path, path)
+
+
+def read_quantized_index(path: str) -> tuple:
+    """(quantization, memory-mapped sections) of a quantized index file"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Not a quantized index (rebuild with python -m app.quantized_index): {path}")
+        (header_size,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_size))
+    sections = {
+        name: np.memmap(path, mode="r", dtype=np.dtype(spec["dtype"]),
+                        offset=spec["offset"], shape=tuple(spec["shape"]))
+        for name, spec in header["sections"].items()
+    }
+    return header["quantization"], sections
+
+
+def build_quantized_index(index_dir: str, quantization: str) -> str:
+    """Quantize the exported embeddings and save the codes next to them"""
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization: {quantization}")
+    embeddings = np.load(os.path.join(index_dir, EMBEDDINGS_FILE), mmap_mode="r")
+    path = os.path.join(index_dir, QUANTIZED_FILES[quantization])
+    write_quantized_index(path, embeddings, quantization)
+    return path
+
+
+class QuantizedRetriever(MmapRetriever):
+    """
+    Two-stage search over a quantized index
+    - int8: approximate cosine = (codes @ q) * scale
+    - binary: Hamming distance between sign bits
+    - top `k * rescore_factor` are rescored with the float16 vectors of the file
+    """
+
+    def __init__(self, sections: dict, encoder, quantization: str = "int8", rescore_factor: int = None):
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization: {quantization}")
+        # float16 rescoring vectors, stored in the index file
+        super().__init__(sections["rescore"], encoder)
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor or RESCORE_FACTORS[quantization]
+        # Only the compact scan arrays are read in full on every query
+        if quantization == "int8":
+            self.codes = sections["codes"]
+            self.scales = np.asarray(sections["scales"])
+        else:
+            self.bits = sections["bits"]
+        rows = (self.codes if quantization == "int8" else self.bits).shape[0]
+        if rows != len(self):
+            raise ValueError(f"Quantized index has {rows} rows but {len(self)} rescoring vectors - rebuild it")
+
+    @classmethod
+    def load(cls, index_dir: str, encoder, quantization: str = "int8") -> "QuantizedRetriever":
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization: {quantization}")
+        path = os.path.join(index_dir, QUANTIZED_FILES[quantization])
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found - build it with python -m app.quantized_index {quantization}")
+        written, sections = read_quantized_index(path)
+        if written != quantization:
+            raise ValueError(f"{path} holds {written} codes, not {quantization}")
+        return cls(sections, encoder, quantization)
+
+    def resident_bytes(self) -> int:
+        """Bytes held in RAM for the scan stage (float16 rows are paged in on demand)"""
+        if self.quantization == "int8":
+            return self.codes.nbytes + self.scales.nbytes
+        return self.bits.nbytes
+
+    def shortlist(self, query_vector: np.ndarray, size: int) -> np.ndarray:
+        if self.quantization == "int8":
+            scores = np.empty(len(self), dtype=np.float32)
+            for start in range(0, len(self), SCAN_BLOCK):
+                block = self.codes[start:start + SCAN_BLOCK].astype(np.float32)
+                scores[start:start + SCAN_BLOCK] = block @ query_vector
+            scores *= self.scales
+            return np.argpartition(-scores, size - 1)[:size]
+        query_bits = np.packbits(query_vector > 0)
+        distances = POPCOUNT[np.bitwise_xor(self.bits, query_bits)].sum(axis=1, dtype=np.int32)
+        return np.argpartition(distances, size - 1)[:size]
+
+    def search_vectors(self, query_vectors: np.ndarray, k: int) -> dict:
+        k = min(k, len(self))
+        size = min(len(self), k * self.rescore_factor)
+        ids, distances = [], []
+        for query_vector in query_vectors:
+            candidates = np.sort(self.shortlist(query_vector, size))
+            exact = np.asarray(self.embeddings[candidates], dtype=np.float32) @ query_vector
+            order = np.argsort(-exact)[:k]
+            ids.append([str(i) for i in candidates[order]])
+            distances.append((2.0 - 2.0 * exact[order]).tolist())
+        return {"ids": ids, "distances": distances}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantize the exported embeddings for SHL_INDEX=int8 / binary")
+    parser.add_argument("quantization", choices=QUANTIZATIONS)
+    parser.add_argument("--index-dir", default=os.path.join("app", "chroma_db"))
+    args = parser.parse_args()
+
+    path = build_quantized_index(args.index_dir, args.quantization)
+    print(f"✅ Wrote {args.quantization} codes ({os.path.getsize(path) / 1e6:.2f} MB): {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Query Understanding
+Extracts constraints (duration, seniority, languages, skills, test types)
+from a query once, with precompiled regexes and an Aho-Corasick trie, so
+filtering, reranking and balancing reuse one structured result
+"""
+
+import re
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+
+# Vocabulary kinds
+TECHNICAL = "technical"
+SOFT = "soft"
+SKILL = "skill"
+TEST_TYPE = "test_type"
+LANGUAGE = "language"
+
+# Balancing keywords match anywhere in a word, as they always have
+# ("engineering", "programmer", "mysql"); everything else matches whole words
+TECHNICAL_KEYWORDS = [
+    'java', 'python', 'sql', 'coding', 'technical', 'developer',
+    'programming', 'software', 'engineer', 'development',
+]
+SOFT_KEYWORDS = [
+    'communication', 'collaboration', 'teamwork', 'personality',
+    'leadership', 'behavioral', 'interpersonal', 'management',
+]
+
+# Phrase -> SHL test type letter
+TEST_TYPE_KEYWORDS = {
+    'cognitive': 'A', 'aptitude': 'A', 'ability': 'A', 'reasoning': 'A', 'numerical': 'A', 'verbal': 'A',
+    'situational judgement': 'B', 'situational judgment': 'B', 'biodata': 'B',
+    'competency': 'C', 'competencies': 'C',
+    '360': 'D', 'development report': 'D',
+    'assessment exercise': 'E', 'assessment centre': 'E', 'assessment center': 'E',
+    'knowledge': 'K', 'skills test': 'K',
+    'personality': 'P', 'behavior': 'P', 'behaviour': 'P', 'motivation': 'P',
+    'simulation': 'S', 'coding simulation': 'S',
+}
+
+LANGUAGE_KEYWORDS = [
+    'english', 'spanish', 'french', 'german', 'italian', 'portuguese', 'dutch',
+    'chinese', 'japanese', 'korean', 'arabic', 'russian', 'polish', 'turkish',
+]
+
+SENIORITY_PATTERN = re.compile(
+    r"\b(?P<level>entry[- ]level|graduates?|interns?|junior|mid[- ]level|mid[- ]professional|"
+    r"senior|lead|principal|supervisors?|managers?|directors?|executives?|c[- ]suite)\b",
+    re.IGNORECASE
+)
+SENIORITY_LEVELS = {
+    "entry": "Entry-Level", "graduate": "Graduate", "intern": "Entry-Level", "junior": "Entry-Level",
+    "mid": "Mid-Professional", "senior": "Professional Individual Contributor",
+    "lead": "Supervisor", "principal": "Professional Individual Contributor",
+    "supervisor": "Supervisor", "manager": "Manager", "director": "Director",
+    "executive": "Executive", "c": "Executive",
+}
+
+# "under 60 minutes", "30 min", "max 1 hour", "45-minute", "1.5 hrs" are upper bounds;
+# "at least 30 minutes", "over 1 hour" are lower bounds
+DURATION_PATTERN = re.compile(
+    r"(?:(?P<min>at least|more than|longer than|over|above|minimum(?: of)?|no less than|>=?)|"
+    r"(?P<max>under|less than|within|below|up to|at most|max(?:imum)?|no more than|<=?))?\s*"
+    r"(?P<value>\d{1,3}(?:\.\d+)?)\s*-?\s*(?P<unit>min(?:ute)?s?|hours?|hrs?)\b",
+    re.IGNORECASE
+)
+
+# Catalog durations look like "Approximate Completion Time in minutes = 20" or "30 minutes"
+CATALOG_MINUTES_PATTERN = re.compile(r"(\d{1,3})")
+
+# Catalog test types are letter codes, run together or separated: "K", "AEBCDP", "A, P"
+TEST_TYPE_CODES_PATTERN = re.compile(r"^[A-Z][A-Z, ]*$")
+
+# Catalog names carry noise like "(New)" or "8" versions that queries never mention
+NAME_NOISE_PATTERN = re.compile(r"\([^)]*\)|\bv?\d+(?:\.\d+)*\b|[^\w#+. -]")
+
+
+def parse_minutes(duration: str) -> Optional[int]:
+    """Minutes from a catalog duration string (None when not specified)"""
+    match = CATALOG_MINUTES_PATTERN.search(duration or "")
+    return int(match.group(1)) if match else None
+
+
+def test_type_letters(test_type: str) -> FrozenSet[str]:
+    """{"A", "P"} from a catalog test type like "AP" or "A, P" (empty when not specified)"""
+    test_type = (test_type or "").strip()
+    if not TEST_TYPE_CODES_PATTERN.match(test_type):
+        return frozenset()
+    return frozenset(test_type.replace(",", "").replace(" ", ""))
+
+
+class KeywordTrie:
+    """
+    Aho-Corasick automaton over lowercase terms
+    One pass over the text finds every term occurrence on word boundaries
+    """
+
+    def __init__(self, terms: Dict[str, List[Tuple[str, str]]], anywhere: FrozenSet[str] = frozenset()):
+        # terms: phrase -> [(kind, value), ...]; kinds in `anywhere` also match inside words
+        self.anywhere = anywhere
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, Tuple[str, str]]]] = [[]]
+
+        for phrase, payloads in terms.items():
+            node = 0
+            for char in phrase:
+                nxt = self._goto[node].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].extend((len(phrase), payload) for payload in payloads)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> List[Tuple[str, str]]:
+        """(kind, value) of every match in lowercase `text` - whole words unless the kind matches anywhere"""
+        goto, fail, out, anywhere = self._goto, self._fail, self._out, self.anywhere
+        matches = []
+        node = 0
+        length = len(text)
+        for end, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if not out[node]:
+                continue
+            word_end = end + 1 >= length or not text[end + 1].isalnum()
+            for size, payload in out[node]:
+                if payload[0] in anywhere:
+                    matches.append(payload)
+                elif word_end:
+                    start = end - size + 1
+                    if start == 0 or not text[start - 1].isalnum():
+                        matches.append(payload)
+        return matches
+
+
+class ParsedQuery:
+    """Structured constraints extracted from one query"""
+
+    __slots__ = ("text", "min_duration", "max_duration", "seniority", "languages", "skills",
+                 "test_types", "has_technical", "has_soft")
+
+    def __init__(self, text, min_duration, max_duration, seniority, languages, skills,
+                 test_types, has_technical, has_soft):
+        self.text = text
+        self.min_duration: Optional[int] = min_duration
+        self.max_duration: Optional[int] = max_duration
+        self.seniority: FrozenSet[str] = seniority
+        self.languages: FrozenSet[str] = languages
+        self.skills: FrozenSet[str] = skills
+        self.test_types: FrozenSet[str] = test_types
+        self.has_technical: bool = has_technical
+        self.has_soft: bool = has_soft
+
+    def ranking_key(self) -> tuple:
+        """The constraints reranking and balancing use - equal keys order a result list the same way"""
+        return (self.min_duration, self.max_duration, self.seniority, self.languages, self.skills,
+                self.test_types, self.has_technical, self.has_soft)
+
+    def has_constraints(self) -> bool:
+        """Anything for reranking to act on"""
+        return bool(self.skills or self.seniority or self.languages or self.test_types
+                    or self.min_duration is not None or self.max_duration is not None)
+
+
+def skill_terms(name: str) -> List[str]:
+    """Skill phrases from a catalog name: "Core Java (Entry Level) (New)" -> ["core java"]"""
+    cleaned = " ".join(NAME_NOISE_PATTERN.sub(" ", name.lower()).split()).strip(" .-")
+    return [cleaned] if len(cleaned) >= 2 else []
+
+
+class QueryParser:
+    """Compiled once per catalog; `parse` is a single pass over the query"""
+
+    def __init__(self, skill_vocabulary: Iterable[str] = ()):
+        terms: Dict[str, List[Tuple[str, str]]] = {}
+
+        def add(phrase, kind, value):
+            payloads = terms.setdefault(phrase, [])
+            if (kind, value) not in payloads:
+                payloads.append((kind, value))
+
+        for phrase in skill_vocabulary:
+            add(phrase, SKILL, phrase)
+        for word in LANGUAGE_KEYWORDS:
+            add(word, LANGUAGE, word)
+        for phrase, letter in TEST_TYPE_KEYWORDS.items():
+            add(phrase, TEST_TYPE, letter)
+        for word in SOFT_KEYWORDS:
+            add(word, SOFT, word)
+        # Technical keywords flag balancing anywhere, and count as skills as whole words
+        for word in TECHNICAL_KEYWORDS:
+            add(word, TECHNICAL, word)
+            add(word, SKILL, word)
+        self.trie = KeywordTrie(terms, anywhere=frozenset((TECHNICAL, SOFT)))
+
+    @classmethod
+    def from_catalog(cls, catalog) -> "QueryParser":
+        """Skill vocabulary from the scraped assessment names"""
+        vocabulary = set()
+        for record in catalog.records:
+            vocabulary.update(skill_terms(record.name))
+        return cls(vocabulary)
+
+    def parse(self, text: str) -> ParsedQuery:
+        lower = text.lower()
+
+        min_duration = max_duration = None
+        for match in DURATION_PATTERN.finditer(lower):
+            minutes = float(match.group("value"))
+            if match.group("unit").startswith(("hour", "hr")):
+                minutes *= 60
+            minutes = int(round(minutes))
+            if match.group("min"):
+                min_duration = minutes if min_duration is None else max(min_duration, minutes)
+            else:
+                max_duration = minutes if max_duration is None else min(max_duration, minutes)
+
+        seniority = set()
+        for match in SENIORITY_PATTERN.finditer(lower):
+            key = re.split(r"[- ]", match.group("level"))[0].rstrip("s")
+            seniority.add(SENIORITY_LEVELS.get(key, key))
+
+        skills, languages, test_types = set(), set(), set()
+        has_technical = has_soft = False
+        for kind, value in self.trie.find(lower):
+            if kind == TECHNICAL:
+                has_technical = True
+            elif kind == SOFT:
+                has_soft = True
+            elif kind == SKILL:
+                skills.add(value)
+            elif kind == LANGUAGE:
+                languages.add(value)
+            elif kind == TEST_TYPE:
+                test_types.add(value)
+
+        return ParsedQuery(
+            text, min_duration, max_duration, frozenset(seniority), frozenset(languages),
+            frozenset(skills), frozenset(test_types), has_technical, has_soft,
+        )
@@ -5,11 +5,43 @@ Creates ChromaDB with embeddings for semantic search
 
 import chromadb
 from sentence_transformers import SentenceTransformer
+import numpy as np
 import json
 import os
+import sys
 from pathlib import Path
 from typing import List
 
+from dotenv import load_dotenv
+
+# Make the `app` package importable when run as `python app/rag.py`
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# GEMINI_API_KEY lives in .env, like for the API
+load_dotenv()
+
+from app.retrieval import EMBEDDINGS_FILE, METADATA_FILE, FIELD_EMBEDDINGS_FILE, FIELD_NAMES
+from app.query_parser import skill_terms
+from app.assessment_ids import AssessmentIds, ASSESSMENT_IDS_FILE
+from app.insights import PROVIDER_FIELD, build_insights, default_provider
+from app.ann_index import CHROMA_EF_ENV
+from app.local_store import LocalStore
+from app.ingest import (
+    ingest, catalog_near_duplicate_groups, MISSING_VALUES, NEAR_DUPLICATES_FILE, QUARANTINE_PATH
+)
+
+
+# Neighbour lists stored next to the Chroma files
+SIMILAR_PATH = os.path.join("app", "chroma_db", "similar_assessments.npz")
+SIMILAR_TOP_K = 10
+
+# SHL test type letters, spelled out for the skills field
+TEST_TYPE_NAMES = {
+    "A": "Ability & Aptitude", "B": "Biodata & Situational Judgement",
+    "C": "Competencies", "D": "Development & 360", "E": "Assessment Exercises",
+    "K": "Knowledge & Skills", "P": "Personality & Behavior", "S": "Simulations",
+}
+
 
 class ChromaEmbeddingFunction:
     """Custom embedding function for ChromaDB"""
@@ -21,6 +53,13 @@ class ChromaEmbeddingFunction:
         embeddings = self._model.encode(input)
         return [embedding.tolist() for embedding in embeddings]
 
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """Embed many texts in batches, returning one float32 matrix"""
+        return np.asarray(
+            self._model.encode(texts, batch_size=batch_size, show_progress_bar=False),
+            dtype=np.float32
+        )
+
 
 def stringify(value):
     """Convert lists to comma-separated strings"""
@@ -29,6 +68,77 @@ def stringify(value):
     return str(value)
 
 
+def field_texts(item: dict) -> dict:
+    """Text embedded for each of FIELD_NAMES (empty when the field is missing)"""
+    name = item.get("name", "")
+    description = item.get("description", "")
+    test_types = [
+        TEST_TYPE_NAMES.get(letter, letter)
+        for letter in str(item.get("test_type", "")).split()
+        if letter.lower() not in MISSING_VALUES
+    ]
+    skills = skill_terms(name) + test_types
+    return {
+        "name": name if name.lower() not in MISSING_VALUES else "",
+        "description": description if description.lower() not in MISSING_VALUES else "",
+        "skills": ", ".join(skills),
+    }
+
+
+def embed_fields(embedding_function, items: List[dict]) -> np.ndarray:
+    """
+    Unit vectors per field stacked as (n_fields, n, dim) - one batched encode
+    for all non-empty texts, zero vectors for empty ones
+    """
+    texts = [field_texts(item) for item in items]
+    flat = [(f, i, t[name]) for f, name in enumerate(FIELD_NAMES) for i, t in enumerate(texts) if t[name]]
+    vectors = embedding_function.encode([text for _, _, text in flat])
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    stacked = np.zeros((len(FIELD_NAMES), len(items), vectors.shape[1]), dtype=np.float32)
+    for (f, i, _), vector in zip(flat, vectors):
+        stacked[f, i] = vector
+    return stacked
+
+
+def build_neighbor_graph(embeddings: np.ndarray, k: int = SIMILAR_TOP_K):
+    """
+    Top-k cosine neighbours of every assessment in one matrix multiply
+    Returns (neighbors, scores), both shaped (n, k), best first, self excluded
+    """
+    n = embeddings.shape[0]
+    k = min(k, n - 1)
+    if k <= 0:
+        return np.zeros((n, 0), dtype=np.int32), np.zeros((n, 0), dtype=np.float32)
+
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    unit = embeddings / np.maximum(norms, 1e-12)
+    similarity = unit @ unit.T
+    np.fill_diagonal(similarity, -np.inf)
+
+    # Unordered top-k per row, then sort just those k columns
+    top = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(similarity, top, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+
+    neighbors = np.take_along_axis(top, order, axis=1).astype(np.int32)
+    scores = np.take_along_axis(top_scores, order, axis=1).astype(np.float32)
+    return neighbors, scores
+
+
+def export_shared_index(index_dir: str, embeddings: np.ndarray, metadatas: List[dict]):
+    """
+    Write unit-normalized embeddings (.npy, mmap-able) and row-ordered metadata
+    (quantized / ANN indexes are built from the .npy on demand)
+    """
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    unit = (embeddings / np.maximum(norms, 1e-12)).astype(np.float32)
+    np.save(os.path.join(index_dir, EMBEDDINGS_FILE), unit)
+    
+    with open(os.path.join(index_dir, METADATA_FILE), "w", encoding='utf-8') as f:
+        json.dump(metadatas, f, ensure_ascii=False)
+
+
 def create_vector_db():
     """
     Create ChromaDB vector database from scraped assessments
@@ -62,22 +172,21 @@ def create_vector_db():
     
     print(f"✅ Loaded {len(assessments)} assessments")
     
+    # Quarantine scrape errors / incomplete items and collapse duplicate slugs
+    clean, quarantined = ingest(assessments)
+    with open(QUARANTINE_PATH, "w", encoding='utf-8') as f:
+        json.dump(quarantined, f, indent=2, ensure_ascii=False)
+    if quarantined:
+        print(f"⚠️  Quarantined {len(quarantined)} items (see {QUARANTINE_PATH})")
+    
     # Prepare documents and metadata
     documents = []
     metadatas = []
+    items = []
     
     print("\n📝 Processing assessments...")
     
-    for i, item in enumerate(assessments):
-        if not isinstance(item, dict):
-            print(f"⚠️  Skipping invalid item at index {i}")
-            continue
-        
-        # Required fields check
-        if 'name' not in item or 'url' not in item:
-            print(f"⚠️  Skipping incomplete item at index {i}")
-            continue
-        
+    for i, item in enumerate(clean):
         # Combine all text fields for embedding
         # This creates a rich semantic representation
         combined_text = " ".join([
@@ -92,6 +201,7 @@ def create_vector_db():
         ])
         
         documents.append(combined_text)
+        items.append(item)
         
         # Store metadata for retrieval
         metadatas.append({
@@ -107,13 +217,31 @@ def create_vector_db():
         })
         
         if (i + 1) % 50 == 0:
-            print(f"   Processed {i + 1}/{len(assessments)} assessments...")
+            print(f"   Processed {i + 1}/{len(clean)} assessments...")
     
     if not documents:
         raise ValueError("❌ No valid assessments found in JSON data")
     
     print(f"✅ Prepared {len(documents)} documents for embedding")
     
+    # Query-independent AI insights, generated once here instead of per request
+    provider = default_provider()
+    print(f"\n🤖 Generating AI insights ({provider})...")
+    if provider == "off" and not os.getenv("SHL_INSIGHTS"):
+        print("   ⚠️  No GEMINI_API_KEY - skipping insights (the API generates them per request)")
+    elif provider == "stub":
+        print("   ⚠️  Stub insights are for offline testing - the API serves them only with GEMINI_FAKE=1")
+    insights = build_insights(
+        [m["description"] for m in metadatas],
+        provider,
+        store=LocalStore(os.getenv("SHL_CACHE_DIR", os.path.join("app", "cache")))
+    )
+    for metadata, insight in zip(metadatas, insights):
+        metadata["ai_insights"] = insight
+        metadata[PROVIDER_FIELD] = provider
+    if insights:
+        print(f"✅ Stored insights for {sum(1 for i in insights if i)}/{len(metadatas)} assessments")
+    
     # Delete existing collection if it exists
     try:
         chroma_client.delete_collection("shl_assessments")
@@ -123,11 +251,19 @@ def create_vector_db():
     
     # Create collection with embedding function
     print("\n🔄 Creating ChromaDB collection...")
+    embedding_function = ChromaEmbeddingFunction()
+    # Chroma's HNSW search breadth is part of the collection config: set here, never while serving
+    ef_search = os.getenv(CHROMA_EF_ENV)
     collection = chroma_client.create_collection(
         name="shl_assessments",
-        embedding_function=ChromaEmbeddingFunction()
+        embedding_function=embedding_function,
+        configuration={"hnsw": {"ef_search": int(ef_search)}} if ef_search else None
     )
     
+    # Embed everything once - reused for Chroma and the neighbour graph
+    print("🔄 Embedding documents...")
+    embeddings = embedding_function.encode(documents)
+    
     # Add data in batches
     print("🔄 Adding embeddings to database...")
     batch_size = 100
@@ -137,12 +273,40 @@ def create_vector_db():
         
         collection.add(
             documents=documents[i:batch_end],
+            embeddings=embeddings[i:batch_end].tolist(),
             metadatas=metadatas[i:batch_end],
             ids=[str(j) for j in range(i, batch_end)]
         )
         
         print(f"   Added batch {i//batch_size + 1} ({batch_end} total)")
     
+    # Precompute "similar assessments" for every item
+    print("\n🔄 Building nearest-neighbour graph...")
+    neighbors, scores = build_neighbor_graph(embeddings)
+    np.savez(SIMILAR_PATH, neighbors=neighbors, scores=scores)
+    print(f"✅ Saved top-{neighbors.shape[1]} neighbours to: {SIMILAR_PATH}")
+    
+    # Read-only copy for multi-worker serving (memory-mapped by app/serve.py)
+    export_shared_index(chroma_path, embeddings, metadatas)
+    print(f"✅ Exported shared index to: {chroma_path}/{EMBEDDINGS_FILE}")
+    
+    # Canonical slug -> ID table used by evaluation and debugging
+    assessment_ids = AssessmentIds.from_urls(m["url"] for m in metadatas)
+    assessment_ids.save(chroma_path)
+    print(f"✅ Saved {len(assessment_ids)} assessment IDs to: {chroma_path}/{ASSESSMENT_IDS_FILE}")
+    
+    # Near-duplicate groups (MinHash over name + description, same name /
+    # test type / duration) - the API keeps only the best-ranked assessment of each group
+    groups = catalog_near_duplicate_groups(metadatas)
+    np.save(os.path.join(chroma_path, NEAR_DUPLICATES_FILE), groups)
+    print(f"✅ Grouped near-duplicates: {len(groups) - len(set(groups.tolist()))} assessments share a group")
+    
+    # Separate name/description/skills vectors for field-weighted search
+    print("🔄 Embedding fields...")
+    field_embeddings = embed_fields(embedding_function, items)
+    np.save(os.path.join(chroma_path, FIELD_EMBEDDINGS_FILE), field_embeddings)
+    print(f"✅ Saved {len(FIELD_NAMES)} field vectors per assessment to: {chroma_path}/{FIELD_EMBEDDINGS_FILE}")
+    
     print("\n" + "=" * 70)
     print(f"🎉 SUCCESS! Vector database created")
     print(f"   Total assessments: {len(documents)}")
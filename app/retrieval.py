@@ -0,0 +1,278 @@
+"""
+Retrievers
+Chroma-backed search, or a read-only memory-mapped embedding matrix that
+forked workers share without opening SQLite on the hot path
+Long queries are split into overlapping chunks, searched in one batch and
+aggregated back into a single ranking
+"""
+
+import json
+import os
+import sys
+from typing import Dict, List
+
+import numpy as np
+
+
+# Files written by rag.py next to the Chroma index
+EMBEDDINGS_FILE = "catalog_embeddings.npy"
+METADATA_FILE = "catalog_metadata.json"
+# Per-field unit vectors stacked as (n_fields, n, dim), rows in FIELD_NAMES order
+FIELD_EMBEDDINGS_FILE = "catalog_field_embeddings.npy"
+FIELD_NAMES = ("name", "description", "skills")
+# SHL_INDEX modes served from the read-only export (no Chroma/SQLite at query time)
+SHARED_INDEX_MODES = ("mmap", "fields", "int8", "binary", "ivf", "hnsw")
+DEFAULT_FIELD_WEIGHTS = {"name": 0.3, "description": 0.5, "skills": 0.2}
+
+
+def require_shared_index(entry_point: str) -> str:
+    """
+    SHL_INDEX for entry points that serve the read-only export (forked
+    workers, offline runs): mmap when unset, exit with an error for any
+    other mode - call before app.api_fixed is imported, it reads the variable
+    """
+    mode = os.environ.setdefault("SHL_INDEX", "mmap")
+    if mode not in SHARED_INDEX_MODES:
+        sys.exit(f"❌ SHL_INDEX={mode} is not supported by {entry_point}; use one of: {', '.join(SHARED_INDEX_MODES)}")
+    return mode
+
+# MiniLM truncates at 256 word pieces - ~180 words keeps a chunk under the limit
+CHUNK_WORDS = 180
+CHUNK_OVERLAP = 40
+AGGREGATIONS = ("max", "mean", "rrf")
+RRF_K = 60
+
+
+class ChromaRetriever:
+    """Vector search through a Chroma collection (embeds query texts itself)"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def __len__(self) -> int:
+        return self.collection.count()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Query vectors from the embedding function the collection was opened with
+        (what query_texts uses), called through Chroma's EmbeddingFunction protocol
+        """
+        embedding_function = self.collection._embedding_function
+        if embedding_function is None:
+            raise ValueError("Collection has no embedding function to encode queries with")
+        # embed_query is optional in the protocol; plain callables embed queries like documents
+        embed = getattr(embedding_function, "embed_query", embedding_function)
+        return np.asarray(embed(input=texts), dtype=np.float32)
+
+    def search(self, query_texts: List[str], k: int) -> dict:
+        """Chroma-shaped result: {"ids": [[...]], "distances": [[...]]} per query"""
+        return self.collection.query(
+            query_texts=query_texts,
+            n_results=k,
+            include=["distances"]
+        )
+
+    def search_vectors(self, query_vectors: np.ndarray, k: int) -> dict:
+        return self.collection.query(
+            query_embeddings=np.asarray(query_vectors, dtype=np.float32),
+            n_results=k,
+            include=["distances"]
+        )
+
+
+class MmapRetriever:
+    """
+    Exact search over a memory-mapped float32 matrix of unit vectors
+    - np.load(mmap_mode="r") maps the file read-only, so every worker shares the page cache
+    - Distances are squared L2 (2 - 2cos), the same scale Chroma returns
+    """
+
+    def __init__(self, embeddings: np.ndarray, encoder):
+        self.embeddings = embeddings
+        self.encoder = encoder
+
+    @classmethod
+    def load(cls, index_dir: str, encoder) -> "MmapRetriever":
+        path = os.path.join(index_dir, EMBEDDINGS_FILE)
+        return cls(np.load(path, mmap_mode="r"), encoder)
+
+    def __len__(self) -> int:
+        return self.embeddings.shape[0]
+
+    def set_search_params(self, **params):
+        """Exact search has nothing to tune; ANN retrievers take ef / nprobe"""
+        if params:
+            raise ValueError(f"{type(self).__name__} has no search parameters: {sorted(params)}")
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(
+            self.encoder.encode(texts, normalize_embeddings=True, show_progress_bar=False),
+            dtype=np.float32
+        )
+
+    def search(self, query_texts: List[str], k: int) -> dict:
+        return self.search_vectors(self.encode(query_texts), k)
+
+    def search_vectors(self, query_vectors: np.ndarray, k: int) -> dict:
+        return self.top_k(query_vectors @ self.embeddings.T, k)
+
+    def top_k(self, similarity: np.ndarray, k: int) -> dict:
+        """Best `k` rows per query from a (n_queries, n) cosine matrix"""
+        k = min(k, len(self))
+        top = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(similarity, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        return {
+            "ids": [[str(i) for i in row] for row in top],
+            "distances": (2.0 - 2.0 * top_scores).tolist(),
+        }
+
+
+class FieldRetriever(MmapRetriever):
+    """
+    Exact search over separate name/description/skills vectors
+    - All fields live in one stacked matrix, so a query is scored against every
+      field in a single matrix multiply
+    - Field scores are combined with weights chosen at query time; missing
+      fields are zero vectors and contribute nothing
+    """
+
+    def __init__(self, field_embeddings: np.ndarray, encoder, weights: Dict[str, float] = None):
+        n_fields, n, dim = field_embeddings.shape
+        # `embeddings` is the stacked (n_fields * n, dim) matrix; __len__ counts assessments
+        super().__init__(field_embeddings.reshape(n_fields * n, dim), encoder)
+        self.field_embeddings = field_embeddings
+        self.flat = self.embeddings
+        self.weights = self.weight_vector(weights or DEFAULT_FIELD_WEIGHTS)
+
+    @classmethod
+    def load(cls, index_dir: str, encoder, weights: Dict[str, float] = None) -> "FieldRetriever":
+        path = os.path.join(index_dir, FIELD_EMBEDDINGS_FILE)
+        return cls(np.load(path, mmap_mode="r"), encoder, weights)
+
+    def __len__(self) -> int:
+        return self.field_embeddings.shape[1]
+
+    @staticmethod
+    def weight_vector(weights: Dict[str, float]) -> np.ndarray:
+        """Weights in FIELD_NAMES order, normalized to sum to 1"""
+        unknown = set(weights) - set(FIELD_NAMES)
+        if unknown:
+            raise ValueError(f"Unknown fields: {sorted(unknown)}")
+        vector = np.array([weights.get(name, 0.0) for name in FIELD_NAMES], dtype=np.float32)
+        if vector.sum() <= 0:
+            raise ValueError("Field weights must sum to a positive value")
+        return vector / vector.sum()
+
+    def field_scores(self, query_vectors: np.ndarray) -> np.ndarray:
+        """Cosine of every query against every field: (n_queries, n_fields, n)"""
+        n_fields, n, _ = self.field_embeddings.shape
+        return (query_vectors @ self.flat.T).reshape(len(query_vectors), n_fields, n)
+
+    def search_vectors(self, query_vectors: np.ndarray, k: int, weights: np.ndarray = None) -> dict:
+        weights = self.weights if weights is None else weights
+        similarity = np.tensordot(self.field_scores(query_vectors), weights, axes=([1], [0]))
+        return self.top_k(similarity, k)
+
+
+def parse_field_weights(spec: str) -> Dict[str, float]:
+    """"name=0.3,description=0.5,skills=0.2" -> dict"""
+    weights = {}
+    for part in spec.split(","):
+        if part.strip():
+            name, _, value = part.partition("=")
+            weights[name.strip()] = float(value)
+    return weights
+
+
+def load_metadatas(index_dir: str) -> List[dict]:
+    """Catalog metadata exported by rag.py, in row order"""
+    with open(os.path.join(index_dir, METADATA_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def chunk_text(text: str, size: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    """Overlapping word windows; short texts come back as a single chunk"""
+    words = text.split()
+    if len(words) <= size:
+        return [text]
+    step = size - overlap
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(" ".join(words[start:start + size]))
+        if start + size >= len(words):
+            break
+    return chunks
+
+
+def aggregate_results(results: dict, k: int, method: str = "max") -> dict:
+    """
+    Fuse per-chunk results into one Chroma-shaped ranking
+    - max: best chunk distance per assessment
+    - mean: mean distance over chunks (a chunk that missed it counts its worst hit)
+    - rrf: reciprocal rank fusion, reported with the best chunk distance
+    """
+    if method not in AGGREGATIONS:
+        raise ValueError(f"Unknown aggregation: {method}")
+
+    best: Dict[str, float] = {}
+    totals: Dict[str, float] = {}
+    rrf: Dict[str, float] = {}
+    worst_sum = 0.0
+    for ids, distances in zip(results["ids"], results["distances"]):
+        worst = max(distances) if distances else 0.0
+        worst_sum += worst
+        for rank, (doc_id, distance) in enumerate(zip(ids, distances)):
+            best[doc_id] = min(best.get(doc_id, distance), distance)
+            # Store the difference from the chunk's worst so misses default to it
+            totals[doc_id] = totals.get(doc_id, 0.0) + distance - worst
+            rrf[doc_id] = rrf.get(doc_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+
+    n_chunks = len(results["ids"])
+    if method == "max":
+        scored = {doc_id: (distance, distance) for doc_id, distance in best.items()}
+    elif method == "mean":
+        scored = {}
+        for doc_id, total in totals.items():
+            mean = (total + worst_sum) / n_chunks
+            scored[doc_id] = (mean, mean)
+    else:
+        scored = {doc_id: (-score, best[doc_id]) for doc_id, score in rrf.items()}
+
+    ranked = sorted(scored.items(), key=lambda item: item[1][0])[:k]
+    return {
+        "ids": [[doc_id for doc_id, _ in ranked]],
+        "distances": [[distance for _, (_, distance) in ranked]],
+    }
+
+
+def chunk_vector_search(retriever, chunk_vectors: np.ndarray, k: int, method: str = "max") -> dict:
+    """batch_multi_vector_search for one text whose chunks are already embedded"""
+    if len(chunk_vectors) == 1:
+        return retriever.search_vectors(chunk_vectors, k)
+    return aggregate_results(retriever.search_vectors(chunk_vectors, k * 2), k, method)
+
+
+def batch_multi_vector_search(retriever, texts: List[str], k: int, method: str = "max") -> List[dict]:
+    """
+    Search with every chunk of every text in ONE batched call (one encode for
+    all chunks), fetching extra candidates per chunk before aggregating to `k`
+    Returns one Chroma-shaped result per text
+    """
+    chunked = [chunk_text(text) for text in texts]
+    multi = any(len(chunks) > 1 for chunks in chunked)
+    results = retriever.search([chunk for chunks in chunked for chunk in chunks], k * 2 if multi else k)
+
+    per_text = []
+    start = 0
+    for chunks in chunked:
+        end = start + len(chunks)
+        ids, distances = results["ids"][start:end], results["distances"][start:end]
+        if len(chunks) == 1:
+            per_text.append({"ids": [ids[0][:k]], "distances": [distances[0][:k]]})
+        else:
+            per_text.append(aggregate_results({"ids": ids, "distances": distances}, k, method))
+        start = end
+    return per_text
@@ -5,22 +5,29 @@ EXCLUDES Pre-packaged Job Solutions
 """
 
 import json
-from bs4 import BeautifulSoup
-import requests
-from urllib.parse import urljoin
-import time
+import sys
 import warnings
 import os
+from pathlib import Path
 warnings.filterwarnings("ignore")
 
+# Make the `app` package importable when run as `python app/scrapper_new.py`
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.page_parser import BASE_URL, parse_catalog_page, parse_assessment_pages
+from app.http_fixtures import MODE as HTTP_FIXTURES_MODE, ARCHIVE_PATH, fixture_session, throttle
+
+
+# Raw assessment pages saved by the fetch phase (see benchmark_parsing.py)
+PAGES_DIR = os.path.join("data", "pages")
+MANIFEST_FILE = "manifest.json"
+
 
 def scrape_shl_catalog():
     """
     Scrape ONLY Individual Test Solutions from SHL catalog
     Returns: List of assessment dictionaries
     """
-    BASE_URL = "https://www.shl.com"
-    
     # Pagination URLs - these load both categories, we'll filter programmatically
     CATALOG_URLS = [
         "https://www.shl.com/solutions/products/product-catalog/",
@@ -57,168 +64,86 @@ def scrape_shl_catalog():
         "https://www.shl.com/solutions/products/product-catalog/?start=372"
     ]
     
-    assessments = []
-    
     print("🚀 Starting SHL Catalog Scraping")
     print("=" * 70)
     print("⚠️  FILTERING: Individual Test Solutions ONLY")
     print("❌ EXCLUDING: Pre-packaged Job Solutions")
+    if HTTP_FIXTURES_MODE:
+        print(f"📼 HTTP fixtures: {HTTP_FIXTURES_MODE} ({ARCHIVE_PATH})")
     print("=" * 70)
     
+    # Records or replays pages when SHL_HTTP_FIXTURES is set
+    session = fixture_session()
+    
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    pages_dir = os.path.join(project_root, PAGES_DIR)
+    os.makedirs(pages_dir, exist_ok=True)
+    
+    # Phase 1 - fetch every page (network bound, rate limited); raw HTML is
+    # kept in data/pages/ so parsing can be re-run or benchmarked offline
+    jobs = []
+    manifest = []
+    failed = []
+    
     for page_num, CATALOG_URL in enumerate(CATALOG_URLS, 1):
         try:
             print(f"\n📄 Fetching Page {page_num}/32... ({CATALOG_URL})")
-            catalog_response = requests.get(
+            catalog_response = session.get(
                 CATALOG_URL, 
                 headers={'User-Agent': 'Mozilla/5.0'}, 
                 timeout=15
             )
             catalog_response.raise_for_status()
-            catalog_soup = BeautifulSoup(catalog_response.text, 'html.parser')
             
-            # Find ALL tables on the page
-            tables = catalog_soup.find_all("table")
-            
-            if len(tables) < 2:
-                print(f"   ⚠️  Expected 2 tables (Pre-packaged + Individual), found {len(tables)}")
-            
-            # The SECOND table contains "Individual Test Solutions"
-            # First table is "Pre-packaged Job Solutions" - we skip it
-            individual_table = tables[1] if len(tables) >= 2 else tables[0]
-            
-            rows = individual_table.select("tr")[1:]  # Skip header row
+            rows = parse_catalog_page(catalog_response.text, BASE_URL)
             print(f"   Found {len(rows)} Individual Test Solutions on this page")
             
-            for i, row in enumerate(rows, 1):
-                cols = row.select("td")
-                if not cols:
-                    continue
-                    
-                link = cols[0].find("a")
-                if not link:
-                    continue
-                
-                # Get assessment URL
-                assessment_url = urljoin(BASE_URL, link["href"].strip())
-                
-                # Clean duplicate path in URL
-                if "solutions/products/product-catalog/solutions/products" in assessment_url:
-                    assessment_url = assessment_url.replace(
-                        "solutions/products/product-catalog/solutions/products",
-                        "solutions/products"
-                    )
-                
+            for i, (assessment_name, assessment_url) in enumerate(rows, 1):
                 # Fetch individual assessment page
                 try:
-                    assessment_name = link.get_text(strip=True)
-                    print(f"   └─ Scraping ({i}/{len(rows)}): {assessment_name[:50]}...")
+                    print(f"   └─ Fetching ({i}/{len(rows)}): {assessment_name[:50]}...")
                     
-                    assessment_response = requests.get(
+                    assessment_response = session.get(
                         assessment_url, 
                         headers={'User-Agent': 'Mozilla/5.0'}, 
                         timeout=10
                     )
-                    assessment_soup = BeautifulSoup(assessment_response.text, 'html.parser')
                     
-                    # Initialize assessment data
-                    assessment_data = {
-                        "name": assessment_name,
-                        "url": assessment_url,
-                        "category": "Individual Test Solutions",
-                        "description": "Description unavailable",
-                        "duration": "Duration not specified",
-                        "languages": [],
-                        "job_level": "Level not specified",
-                        "remote_testing": "Not specified",
-                        "adaptive_support": "Not specified",
-                        "test_type": "Type not specified",
-                        "source_page": page_num
-                    }
-                    
-                    # Extract description (multiple fallback methods)
-                    description = ""
-                    
-                    # Method 1: Find description heading
-                    description_heading = assessment_soup.find(
-                        lambda tag: tag.name in ['h1', 'h2', 'h3', 'h4'] 
-                        and 'description' in tag.text.lower()
-                    )
-                    if description_heading:
-                        next_element = description_heading.find_next('p')
-                        if next_element:
-                            description = next_element.get_text(" ", strip=True)
-                    
-                    # Method 2: Find main content paragraphs
-                    if not description:
-                        keywords = ["assessment", "measure", "candidate", "skill", "test", "evaluates"]
-                        paragraphs = assessment_soup.find_all("p")
-                        for p in paragraphs:
-                            text = p.get_text(" ", strip=True)
-                            if any(kw in text.lower() for kw in keywords) and len(text) > 50:
-                                description = text
-                                break
-                    
-                    if description:
-                        assessment_data["description"] = description
-                    
-                    # Extract metadata from specifications section
-                    spec_sections = assessment_soup.find_all('div', class_='specification')
-                    
-                    for spec in spec_sections:
-                        spec_text = spec.get_text(" ", strip=True).lower()
-                        
-                        # Duration
-                        if 'duration' in spec_text or 'assessment length' in spec_text:
-                            duration_match = spec.find(string=lambda x: 'minutes' in x.lower() if x else False)
-                            if duration_match:
-                                assessment_data["duration"] = duration_match.strip()
-                        
-                        # Languages
-                        if 'language' in spec_text:
-                            lang_text = spec.get_text(strip=True)
-                            if ',' in lang_text:
-                                assessment_data["languages"] = [l.strip() for l in lang_text.split(',')]
-                        
-                        # Job Level
-                        if 'job level' in spec_text:
-                            assessment_data["job_level"] = spec.get_text(strip=True)
-                    
-                    # Extract Test Type
-                    test_type_element = assessment_soup.find(string=lambda x: "test type:" in x.lower() if x else False)
-                    if test_type_element:
-                        parent = test_type_element.parent
-                        test_type_text = parent.get_text(strip=True).replace("Test Type:", "").strip()
-                        assessment_data["test_type"] = test_type_text
-                    
-                    # Remote testing indicator
-                    remote_indicator = assessment_soup.find(string=lambda x: "remote testing" in x.lower() if x else False)
-                    if remote_indicator:
-                        parent = remote_indicator.parent
-                        if parent.find(class_='green') or 'yes' in parent.get_text().lower():
-                            assessment_data["remote_testing"] = "Yes"
-                        else:
-                            assessment_data["remote_testing"] = "No"
-                    
-                    assessments.append(assessment_data)
-                    time.sleep(1.5)  # Rate limiting
+                    file_name = f"{len(manifest):04d}.html"
+                    with open(os.path.join(pages_dir, file_name), "w", encoding='utf-8') as f:
+                        f.write(assessment_response.text)
+                    manifest.append({"file": file_name, "name": assessment_name, "url": assessment_url, "page": page_num})
+                    jobs.append((assessment_response.text, assessment_name, assessment_url, page_num))
+                    throttle(1.5)  # Rate limiting
                 
                 except Exception as e:
-                    print(f"      ⚠️  Failed to scrape details: {str(e)}")
-                    assessments.append({
-                        "name": link.get_text(strip=True),
+                    print(f"      ⚠️  Failed to fetch details: {str(e)}")
+                    failed.append((len(jobs), {
+                        "name": assessment_name,
                         "url": assessment_url,
                         "category": "Individual Test Solutions",
                         "description": f"Error: {str(e)}",
                         "source_page": page_num
-                    })
+                    }))
             
-            print(f"   ✅ Page {page_num} complete ({len(assessments)} Individual Tests so far)")
-            time.sleep(2)  # Delay between pages
+            print(f"   ✅ Page {page_num} fetched ({len(jobs)} Individual Tests so far)")
+            throttle(2)  # Delay between pages
             
         except Exception as e:
             print(f"   ❌ Page {page_num} failed: {str(e)}")
             continue
     
+    with open(os.path.join(pages_dir, MANIFEST_FILE), "w", encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    
+    # Phase 2 - parse all pages in a process pool (CPU bound)
+    print(f"\n🔄 Parsing {len(jobs)} assessment pages...")
+    assessments = parse_assessment_pages(jobs)
+    
+    # Failed fetches keep their position in catalog order
+    for position, record in reversed(failed):
+        assessments.insert(position, record)
+    
     # # Create data directory if it doesn't exist
     # os.makedirs("data", exist_ok=True)
     
@@ -227,7 +152,6 @@ def scrape_shl_catalog():
     # with open(output_path, "w", encoding='utf-8') as f:
     #     json.dump(assessments, f, indent=2, ensure_ascii=False)
 
-    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     data_dir = os.path.join(project_root, "data")
     
     # Create data directory if it doesn't exist
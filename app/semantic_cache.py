@@ -0,0 +1,95 @@
+"""
+Semantic Cache
+Reuses the ranked list of a previous query when a new one is a paraphrase
+- Keys are query embeddings; a lookup is one matrix-vector product over the
+  cached vectors, and hits need cosine >= threshold
+- Entries carry a guard (the parsed query constraints) that must match too,
+  so "under 30 minutes" never reuses the list for "under 60 minutes"
+- Bounded: the least recently used entry is evicted when full
+Per process - each forked worker warms its own cache
+"""
+
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+import numpy as np
+
+
+DEFAULT_CAPACITY = 1024
+DEFAULT_THRESHOLD = 0.95
+
+
+def query_key(chunk_vectors: np.ndarray) -> np.ndarray:
+    """One unit vector per query: the normalized mean of its chunk vectors"""
+    mean = np.asarray(chunk_vectors, dtype=np.float32).mean(axis=0)
+    return mean / max(float(np.linalg.norm(mean)), 1e-12)
+
+
+class SemanticCache:
+    """Bounded LRU map from unit query vectors to values, matched by cosine similarity"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, threshold: float = DEFAULT_THRESHOLD):
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.capacity = capacity
+        self.threshold = threshold
+        self.vectors = None  # (capacity, dim), allocated on first store
+        self.entries = [None] * capacity  # slot -> (guard, value)
+        self.lru = OrderedDict()  # slot -> None, oldest first
+        self.hits = self.misses = self.guard_misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.lru)
+
+    def clear(self):
+        """Drop every entry (e.g. after the catalog changes); counters are kept"""
+        self.entries = [None] * self.capacity
+        self.lru.clear()
+
+    def nearest(self, vector: np.ndarray) -> tuple:
+        """(slot, cosine) of the most similar cached query, or (None, -1.0)"""
+        if not self.lru:
+            return None, -1.0
+        # Slots fill front to back and evictions reuse them, so the first len() rows are live
+        similarity = self.vectors[:len(self.lru)] @ vector
+        slot = int(np.argmax(similarity))
+        return slot, float(similarity[slot])
+
+    def lookup(self, vector: np.ndarray, guard: Hashable = None) -> Optional[Any]:
+        slot, similarity = self.nearest(vector)
+        if slot is None or similarity < self.threshold:
+            self.misses += 1
+            return None
+        cached_guard, value = self.entries[slot]
+        if cached_guard != guard:
+            self.misses += 1
+            self.guard_misses += 1
+            return None
+        self.lru.move_to_end(slot)
+        self.hits += 1
+        return value
+
+    def store(self, vector: np.ndarray, value: Any, guard: Hashable = None):
+        if self.vectors is None:
+            self.vectors = np.zeros((self.capacity, len(vector)), dtype=np.float32)
+        if len(self.lru) < self.capacity:
+            slot = len(self.lru)
+        else:
+            slot, _ = self.lru.popitem(last=False)
+            self.evictions += 1
+        self.vectors[slot] = vector
+        self.entries[slot] = (guard, value)
+        self.lru[slot] = None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self),
+            "capacity": self.capacity,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "guard_misses": self.guard_misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,59 @@
+"""
+Response Serialization
+orjson-encoded responses built from per-assessment JSON fragments that are
+serialized once and spliced with the per-request fields
+"""
+
+from typing import List
+
+import orjson
+from fastapi.responses import Response
+
+from app.catalog import Catalog
+
+
+# Static fields of a recommendation, in response order
+STATIC_FIELDS = (
+    "name", "url", "description", "duration", "languages", "job_level",
+    "remote_testing", "adaptive_support", "test_type",
+)
+
+
+def build_fragments(catalog: Catalog) -> List[bytes]:
+    """
+    Pre-serialize the static part of every recommendation, indexed by row
+    Each fragment is an unterminated object: b'{"id":"0","name":...,"test_type":"K"'
+    """
+    fragments = []
+    for record in catalog.records:
+        static = {"id": str(record.row)}
+        static.update((field, catalog.field(record, field)) for field in STATIC_FIELDS)
+        fragments.append(orjson.dumps(static)[:-1])
+    return fragments
+
+
+def render_recommendation(fragment: bytes, relevance_score: float, ai_insights: str) -> bytes:
+    """Close a static fragment with the dynamic score and insight fields"""
+    return b"".join((
+        fragment,
+        b',"relevance_score":', orjson.dumps(relevance_score),
+        b',"ai_insights":', orjson.dumps(ai_insights),
+        b"}",
+    ))
+
+
+def render_payload(head: dict, recommendations: List[bytes], key: str = "recommendations") -> bytes:
+    """Splice pre-rendered recommendations into the response envelope under `key`"""
+    return b"".join((
+        orjson.dumps(head)[:-1],
+        b',"', key.encode(), b'":[', b",".join(recommendations), b"]}",
+    ))
+
+
+class RawJSONResponse(Response):
+    """Response whose body is already-encoded JSON bytes"""
+
+    media_type = "application/json"
+
+    def render(self, content: bytes) -> bytes:
+        return content
@@ -0,0 +1,134 @@
+"""
+Multi-Worker Server (pre-fork)
+Loads MiniLM, the memory-mapped index and the catalog ONCE in the parent,
+then forks workers that share those pages copy-on-write; a worker that
+exits is replaced until the server is stopped
+
+Usage: python -m app.serve --workers 4 --port 8000
+(run rag.py first - it exports catalog_embeddings.npy / catalog_metadata.json)
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+
+# A worker that dies sooner than this after its start is respawned after a pause (crash loops)
+RESPAWN_BACKOFF = 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork SHL API server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    from app.retrieval import require_shared_index
+
+    # Forked workers share the memory-mapped export; Chroma cannot be shared
+    require_shared_index("app.serve")
+
+    import uvicorn
+    from app import api_fixed
+
+    print(f"🚀 Preloading index and model (pid {os.getpid()})")
+    api_fixed.load_index()
+    if os.path.exists(api_fixed.SIMILAR_PATH):
+        api_fixed.get_similar_graph()
+
+    # Keep preloaded objects out of the GC's reach so collections in the
+    # workers don't write to (and un-share) their pages
+    gc.collect()
+    gc.freeze()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    # Split CPU threads between workers instead of oversubscribing
+    threads_per_worker = max(1, (os.cpu_count() or 1) // args.workers)
+
+    # The worker's own SIGUSR2 handler (installed by app.api_fixed), restored after fork
+    worker_usr2 = signal.getsignal(signal.SIGUSR2) if hasattr(signal, "SIGUSR2") else None
+
+    def spawn() -> int:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            if worker_usr2 is not None:
+                signal.signal(signal.SIGUSR2, worker_usr2)
+            try:
+                import torch
+                torch.set_num_threads(threads_per_worker)
+            except ImportError:
+                pass
+
+            config = uvicorn.Config(api_fixed.app, log_level="warning")
+            uvicorn.Server(config).run(sockets=[sock])
+            os._exit(0)
+        return pid
+
+    # pid -> start time
+    children = {spawn(): time.monotonic() for _ in range(args.workers)}
+    stopping = False
+
+    print(f"✅ Serving on http://{args.host}:{args.port} with {args.workers} workers: {list(children)}")
+    # Admission control and client buckets are per process - the server-wide limits are N times larger
+    admission, limiter = api_fixed.admission, api_fixed.client_limiter
+    print(f"   Limits per worker x {args.workers}: {admission.max_concurrent * args.workers} running, "
+          f"{admission.max_queue * args.workers} queued, up to {limiter.rate * args.workers:g} req/s per client")
+
+    def shutdown(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for child in children:
+            try:
+                os.kill(child, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    def profile_workers(signum, frame):
+        # `kill -USR2 <parent pid>` profiles every worker (see app/profiling.py)
+        for child in children:
+            try:
+                os.kill(child, signum)
+            except ProcessLookupError:
+                pass
+
+    if hasattr(signal, "SIGUSR2"):
+        signal.signal(signal.SIGUSR2, profile_workers)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        print(f"⚠️  Worker {pid} exited (status {status}), respawning")
+        if time.monotonic() - started < RESPAWN_BACKOFF:
+            time.sleep(RESPAWN_BACKOFF)
+        if not stopping:
+            pid = spawn()
+            children[pid] = time.monotonic()
+            if stopping:
+                # Shutdown arrived between fork and registration
+                os.kill(pid, signal.SIGTERM)
+    sock.close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Single Flight
+Concurrent identical calls share one in-flight computation
+- the first caller starts the work as its own task; callers arriving while it
+  runs await the same task
+- nothing is cached: once the task finishes the key is free again
+- a caller that disconnects only stops waiting, the shared task keeps going
+Per process and per event loop - forked workers coalesce independently
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Key -> in-flight task, with counters for /health and the burst benchmark"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.executions = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]):
+        """Result of `fn()`, run once for all concurrent callers with the same key"""
+        if not self.enabled:
+            self.executions += 1
+            return await fn()
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+            self.executions += 1
+        else:
+            self.shared += 1
+        # shield: a cancelled caller must not cancel the work others are waiting on
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the error as seen even if every caller stopped waiting
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._inflight),
+            "executions": self.executions,
+            "shared": self.shared,
+        }
@@ -0,0 +1,141 @@
+"""
+ANN Benchmark - exact vs IVF vs HNSW on synthetic catalogs of growing size
+For every catalog size and search setting (nprobe / ef) reports:
+- Recall@k against the exact top-k
+- Median per-query latency (queries run one at a time like /recommend)
+- Memory: the float32 vectors plus each index's own structures
+Writes benchmark_ann.csv, and benchmark_ann.html (recall vs latency, point
+size = memory, one panel per size) when altair is installed
+
+Usage: python benchmark_ann.py [--sizes 10000 100000 1000000] [--nprobe 1 4 16 64] [--ef 16 64 256]
+HNSW rows need hnswlib (pip install hnswlib)
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.retrieval import MmapRetriever
+from benchmark_helpers import overlap_at_k, timed_search
+from app.ann_index import HNSWRetriever, IVFRetriever, build_hnsw, build_ivf, default_nlist
+from synthetic_catalog import load_base, synthetic_queries, synthetic_vectors
+
+
+def hnsw_bytes(index) -> int:
+    """Size of the saved graph (vectors + links) - what hnswlib keeps in RAM"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.bin")
+        index.save_index(path)
+        return os.path.getsize(path)
+
+
+def benchmark_size(n: int, args, base) -> list:
+    vectors, _ = synthetic_vectors(n, base=base)
+    query_vectors = synthetic_queries(vectors, args.queries)
+    print(f"\n📦 {n:,} items ({vectors.nbytes / 1e6:.0f} MB of vectors), {len(query_vectors)} queries")
+
+    rows = []
+
+    def record(backend, setting, retriever, memory_bytes, build_s=0.0):
+        ids, latency = timed_search(retriever, query_vectors, args.k)
+        row = {
+            "n": n, "backend": backend, "setting": setting,
+            "recall": round(overlap_at_k(ids, exact, args.k), 4),
+            "p50_ms": round(latency, 3),
+            "memory_mb": round(memory_bytes / 1e6, 1),
+            "build_s": round(build_s, 1),
+        }
+        print(f"   {backend:<6}{setting:<14}recall@{args.k}={row['recall']:.3f}  "
+              f"p50={row['p50_ms']:.2f} ms  memory={row['memory_mb']} MB")
+        rows.append(row)
+
+    exact_retriever = MmapRetriever(vectors, None)
+    exact, _ = timed_search(exact_retriever, query_vectors, args.k)
+    record("exact", "-", exact_retriever, vectors.nbytes)
+
+    start = time.perf_counter()
+    ivf = build_ivf(vectors, nlist=args.nlist or default_nlist(n))
+    build_s = time.perf_counter() - start
+    ivf_retriever = IVFRetriever(vectors, ivf, None)
+    for nprobe in args.nprobe:
+        if nprobe > len(ivf["centroids"]):
+            continue
+        ivf_retriever.set_search_params(nprobe=nprobe)
+        record("ivf", f"nprobe={nprobe}", ivf_retriever, vectors.nbytes + ivf_retriever.resident_bytes(), build_s)
+
+    try:
+        start = time.perf_counter()
+        index = build_hnsw(vectors, M=args.m, ef_construction=args.ef_construction)
+        build_s = time.perf_counter() - start
+    except ImportError as e:
+        print(f"   ⚠️  Skipping HNSW: {e}")
+        return rows
+    # Graph search never touches the mapped matrix, so only the graph counts
+    hnsw_retriever = HNSWRetriever(vectors, index, None)
+    memory_bytes = hnsw_bytes(index)
+    for ef in args.ef:
+        hnsw_retriever.set_search_params(ef=ef)
+        record("hnsw", f"ef={ef}", hnsw_retriever, memory_bytes, build_s)
+    return rows
+
+
+def plot(df: pd.DataFrame, path: str, k: int) -> bool:
+    try:
+        import altair as alt
+    except ImportError:
+        return False
+    base = alt.Chart(df).encode(
+        x=alt.X("p50_ms:Q", scale=alt.Scale(type="log"), title="Median latency (ms, log)"),
+        y=alt.Y("recall:Q", scale=alt.Scale(zero=False), title=f"Recall@{k} vs exact"),
+        color=alt.Color("backend:N", title="Backend"),
+    )
+    points = base.mark_point(filled=True).encode(
+        size=alt.Size("memory_mb:Q", title="Memory (MB)"),
+        tooltip=["backend", "setting", "recall", "p50_ms", "memory_mb", "build_s"],
+    )
+    chart = alt.layer(base.mark_line(), points).facet(column=alt.Column("n:O", title="Catalog size"))
+    chart.save(path)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ANN benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=0, help="IVF lists (default ~sqrt(n))")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--m", type=int, default=16, help="HNSW links per node")
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--ef", type=int, nargs="+", default=[16, 32, 64, 128, 256])
+    parser.add_argument("--out", default="benchmark_ann")
+    args = parser.parse_args()
+
+    print("🚀 ANN Benchmark")
+    print("=" * 70)
+    base, _ = load_base()
+    if base is None:
+        print("⚠️  No exported embeddings - using random clustered vectors (run rag.py for catalog-like ones)")
+
+    rows = []
+    for n in args.sizes:
+        rows.extend(benchmark_size(n, args, base))
+
+    df = pd.DataFrame(rows)
+    df.to_csv(f"{args.out}.csv", index=False)
+    print("\n" + "=" * 70)
+    print(df.to_string(index=False))
+    print("=" * 70)
+    print(f"✅ Results saved to: {args.out}.csv")
+    if plot(df, f"{args.out}.html", args.k):
+        print(f"✅ Plot saved to: {args.out}.html")
+    else:
+        print("⚠️  altair not installed - skipped the plot")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Burst Benchmark - duplicate work saved by single-flight request coalescing
+Fires N identical /recommend requests at once (in-process, through the ASGI
+app) with coalescing on and off, and counts the work actually done:
+- page fetches: hits on a local JD page server (slow on purpose, like a real site)
+- searches: vector searches run
+- llm_calls: calls reaching the (fake) Gemini model
+Also checks that every response in a burst is identical
+
+Usage: python benchmark_burst.py [--burst 50] [--page-delay 0.3]
+(run rag.py first - it exports catalog_embeddings.npy / catalog_metadata.json)
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import numpy as np
+import pandas as pd
+
+from app.retrieval import SHARED_INDEX_MODES
+
+# Must be set before the API module reads them
+if os.environ.get("SHL_INDEX") not in SHARED_INDEX_MODES:
+    os.environ["SHL_INDEX"] = "mmap"
+os.environ.setdefault("GEMINI_FAKE", "1")
+os.environ.setdefault("GEMINI_FAKE_LATENCY", "0.5")
+
+from app import api_fixed
+from app.gemini_client import GeminiClient
+from app.local_store import LocalStore
+from app.semantic_cache import SemanticCache
+
+
+JD_HTML = b"""<html><body><div class="job-description">
+We are hiring a mid-level Java developer who collaborates with business teams,
+writes SQL and communicates clearly with stakeholders. Assessment under 60 minutes.
+</div></body></html>"""
+
+
+class JDPageServer:
+    """Local job posting that takes `delay` seconds to serve and counts its hits"""
+
+    def __init__(self, delay: float):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.hits += 1
+                time.sleep(delay)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.end_headers()
+                self.wfile.write(JD_HTML)
+
+            def log_message(self, *args):
+                pass
+
+        self.hits = 0
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/jobs/java-developer"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+
+
+class SearchCounter:
+    """Counts vector searches by wrapping the API's search step"""
+
+    def __init__(self):
+        self.count = 0
+        self._search = api_fixed.chunk_vector_search
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+        return self._search(*args, **kwargs)
+
+
+async def burst(client: httpx.AsyncClient, payload: dict, size: int) -> tuple:
+    async def one():
+        start = time.perf_counter()
+        response = await client.post("/recommend", json=payload)
+        return response, (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*[one() for _ in range(size)])
+    return results, time.perf_counter() - start
+
+
+async def run_scenario(name: str, payload: dict, size: int, coalesce: bool, page: JDPageServer,
+                       searches: SearchCounter) -> dict:
+    # Fresh caches and Gemini budget, so every run starts cold and only coalescing differs
+    for flight in api_fixed.flights.values():
+        flight.enabled = coalesce
+    api_fixed.cache_store = LocalStore(tempfile.mkdtemp(prefix="shl_burst_"))
+    api_fixed.gemini_client = GeminiClient.from_env(api_fixed.model)
+    if api_fixed.semantic_cache is not None:
+        api_fixed.semantic_cache = SemanticCache(api_fixed.SEMANTIC_CACHE_SIZE, api_fixed.SEMANTIC_THRESHOLD)
+
+    hits, search_count, llm_calls = page.hits, searches.count, api_fixed.model.calls
+    transport = httpx.ASGITransport(app=api_fixed.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://burst", timeout=120) as client:
+        results, wall = await burst(client, payload, size)
+
+    statuses = {response.status_code for response, _ in results}
+    bodies = {response.content for response, _ in results}
+    latencies = [ms for _, ms in results]
+    return {
+        "scenario": name,
+        "single_flight": "on" if coalesce else "off",
+        "requests": size,
+        "status": ",".join(str(s) for s in sorted(statuses)),
+        "identical": len(bodies) == 1,
+        "page_fetches": page.hits - hits,
+        "searches": searches.count - search_count,
+        "llm_calls": api_fixed.model.calls - llm_calls,
+        "wall_s": round(wall, 2),
+        "p50_ms": round(float(np.median(latencies)), 1),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 1),
+    }
+
+
+async def main_async(args):
+    page = JDPageServer(args.page_delay)
+    searches = SearchCounter()
+    api_fixed.chunk_vector_search = searches
+    api_fixed.load_index()
+
+    scenarios = [
+        ("JD URL", {"text": page.url, "use_ai": False}),
+        ("text + query insights", {"text": "Java developer who collaborates with business teams",
+                                   "insight_mode": "query"}),
+        ("text, no AI", {"text": "Python and SQL skills, mid-level, under 60 minutes", "use_ai": False}),
+    ]
+    rows = []
+    try:
+        for name, payload in scenarios:
+            for coalesce in (False, True):
+                rows.append(await run_scenario(name, payload, args.burst, coalesce, page, searches))
+    finally:
+        page.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-flight burst benchmark")
+    parser.add_argument("--burst", type=int, default=50, help="Identical concurrent requests per burst")
+    parser.add_argument("--page-delay", type=float, default=0.3, help="Seconds the JD page takes to load")
+    args = parser.parse_args()
+
+    print("🚀 Burst Benchmark")
+    print("=" * 70)
+    rows = asyncio.run(main_async(args))
+
+    print("\n" + "=" * 70)
+    print(pd.DataFrame(rows).to_string(index=False))
+    print("=" * 70)
+    print("Without single flight the semantic cache only helps requests that start after the first one finished")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Memory Benchmark - dict-per-item vs compact Catalog
+Compares the metadata dicts the API used to rebuild per item against
+app.catalog.Catalog (__slots__ records + interned value tables)
+
+Usage: python benchmark_catalog_memory.py [--copies 100]
+"""
+
+import argparse
+import json
+import os
+import time
+import tracemalloc
+
+from app.catalog import Catalog
+
+
+JSON_PATH = os.path.join("data", "shl_individual_assessments.json")
+
+
+def load_metadatas() -> list:
+    """Metadata dicts exactly as rag.py stores them (synthetic if no scrape is available)"""
+    if os.path.exists(JSON_PATH):
+        with open(JSON_PATH, "r", encoding="utf-8") as f:
+            items = json.load(f)
+    else:
+        print(f"⚠️  {JSON_PATH} not found - using a synthetic catalog")
+        items = [
+            {
+                "name": f"Assessment {i}",
+                "url": f"https://www.shl.com/solutions/products/product-catalog/view/assessment-{i}/",
+                "description": f"Measures skill number {i} for candidates applying to technical roles. " * 3,
+                "duration": ["Duration not specified", "30 minutes", "Approximate Completion Time in minutes = 20"][i % 3],
+                "languages": [["English (USA)"], ["English (USA)", "French", "German"], []][i % 3],
+                "job_level": ["Level not specified", "Mid-Professional, Professional Individual Contributor"][i % 2],
+                "remote_testing": ["Yes", "No", "Not specified"][i % 3],
+                "adaptive_support": ["Not specified", "Yes"][i % 2],
+                "test_type": ["K", "P", "A B P", "Type not specified"][i % 4],
+            }
+            for i in range(377)
+        ]
+
+    return [
+        {
+            "name": item.get("name", "Unknown"),
+            "url": item.get("url", ""),
+            "description": item.get("description", "No description"),
+            "duration": item.get("duration", "Not specified"),
+            "languages": ", ".join(map(str, item.get("languages", []))),
+            "job_level": item.get("job_level", "Not specified"),
+            "remote_testing": item.get("remote_testing", "Not specified"),
+            "adaptive_support": item.get("adaptive_support", "Not specified"),
+            "test_type": item.get("test_type", "Not specified"),
+        }
+        for item in items
+        if isinstance(item, dict) and "name" in item and "url" in item
+    ]
+
+
+def measure(build):
+    """Return (bytes retained, seconds) for the object built by `build()`"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    obj = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return current, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Catalog memory benchmark")
+    parser.add_argument("--copies", type=int, default=100,
+                        help="Replicate the catalog N times to simulate a larger bank")
+    args = parser.parse_args()
+
+    base = load_metadatas()
+    # Serialized once, parsed per build - mirrors metadata arriving from Chroma/JSON,
+    # where every repeated value is a fresh string object
+    payload = json.dumps(base * args.copies)
+    n_items = len(base) * args.copies
+
+    print("🚀 Catalog Memory Benchmark")
+    print("=" * 70)
+    print(f"   Items: {n_items} ({len(base)} x {args.copies})")
+
+    def dicts():
+        return [
+            {**metadata, "relevance_score": 0.0, "ai_insights": ""}
+            for metadata in json.loads(payload)
+        ]
+
+    def compact():
+        metadatas = json.loads(payload)
+        catalog = Catalog.from_metadatas((str(i) for i in range(len(metadatas))), metadatas)
+        del metadatas
+        return catalog
+
+    dict_bytes, dict_time = measure(dicts)
+    compact_bytes, compact_time = measure(compact)
+
+    print("-" * 70)
+    print(f"{'Representation':<28}{'Memory (MB)':>14}{'Bytes/item':>14}{'Build (s)':>12}")
+    print(f"{'dict per item':<28}{dict_bytes / 1e6:>14.2f}{dict_bytes / n_items:>14.0f}{dict_time:>12.3f}")
+    print(f"{'Catalog (__slots__)':<28}{compact_bytes / 1e6:>14.2f}{compact_bytes / n_items:>14.0f}{compact_time:>12.3f}")
+    print("-" * 70)
+    print(f"   Saving: {(1 - compact_bytes / dict_bytes) * 100:.1f}%")
+
+    catalog = compact()
+    print("\n   Distinct values per categorical field:")
+    for field, table in catalog.tables.items():
+        print(f"   - {field:<18} {len(table)}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
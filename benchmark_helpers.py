@@ -0,0 +1,25 @@
+"""
+Benchmark Helpers
+Search timing and result-overlap metrics shared by the index benchmarks
+(benchmark_ann.py, benchmark_quantization.py)
+"""
+
+import time
+
+import numpy as np
+
+
+def timed_search(retriever, query_vectors: np.ndarray, k: int) -> tuple:
+    """(row ids per query, median ms per query) - queries run one at a time like /recommend"""
+    ids, latencies = [], []
+    for vector in query_vectors:
+        start = time.perf_counter()
+        result = retriever.search_vectors(vector[None, :], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        ids.append(result["ids"][0])
+    return ids, float(np.median(latencies))
+
+
+def overlap_at_k(ids: list, baseline: list, k: int) -> float:
+    """Mean share of the baseline's top-k found in each top-k (Recall@k against exact search)"""
+    return float(np.mean([len(set(a[:k]) & set(b[:k])) / k for a, b in zip(ids, baseline)]))
@@ -0,0 +1,233 @@
+"""
+Load Benchmark - admission control, load shedding and per-client rate limits
+Open-loop load generator: requests start at a fixed rate whether or not earlier
+ones finished (like real traffic), mixing plain text, JD URL and query-insight
+requests from `--clients` simulated clients (X-Forwarded-For)
+Runs in-process through the ASGI app with admission control off and on and
+reports per request kind:
+- status counts (200 / 429 / 503 / timeout)
+- degraded: share of 200s served without LLM calls (X-Degraded)
+- p50/p95/p99 latency of successful responses
+Before the load runs, /recommend/stream is opened and dropped by the client
+(before the head and after the first line) - every admission slot must come
+back, or the benchmark exits with status 1
+
+Usage: python benchmark_load.py [--rps 40] [--duration 10] [--clients 20]
+       python benchmark_load.py --url http://127.0.0.1:8000
+(against a running server, start it with SHL_CLIENT_HEADER=x-forwarded-for;
+run rag.py first - it exports catalog_embeddings.npy / catalog_metadata.json)
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import httpx
+import numpy as np
+import orjson
+import pandas as pd
+
+# Also sets the in-process defaults (mmap index, fake Gemini with latency)
+from benchmark_burst import JDPageServer
+from app import api_fixed
+from app.admission import AdmissionController, ClientRateLimiter
+from app.gemini_client import GeminiClient
+from app.local_store import LocalStore
+
+
+TEXT_QUERIES = [
+    "Java developer who collaborates with business teams",
+    "Python and SQL skills, mid-level, under 60 minutes",
+    "Cognitive and personality tests for analyst role",
+    "Sales position for new graduates, 30 min assessment",
+]
+
+
+def request_mix(page_url: str, ai_share: float, url_share: float, rng: random.Random) -> tuple:
+    """(kind, payload) - unique text per request, so caches and coalescing do not hide the load"""
+    roll = rng.random()
+    if roll < url_share:
+        return "url", {"text": f"{page_url}?q={rng.randrange(10**9)}", "use_ai": False}
+    text = f"{rng.choice(TEXT_QUERIES)} (ref {rng.randrange(10**9)})"
+    if roll < url_share + ai_share:
+        return "query_insights", {"text": text, "insight_mode": "query"}
+    return "text", {"text": text, "use_ai": False}
+
+
+async def one(client: httpx.AsyncClient, kind: str, payload: dict, client_ip: str, timeout: float) -> dict:
+    start = time.perf_counter()
+    try:
+        response = await client.post("/recommend", json=payload, headers={"X-Forwarded-For": client_ip},
+                                     timeout=timeout)
+        status, degraded = response.status_code, response.headers.get("x-degraded") == "1"
+    except httpx.TimeoutException:
+        status, degraded = "timeout", False
+    return {"kind": kind, "status": status, "degraded": degraded, "ms": (time.perf_counter() - start) * 1000}
+
+
+async def open_loop(client: httpx.AsyncClient, page_url: str, args) -> list:
+    """Start `rps` requests per second for `duration` seconds; wait for all of them"""
+    rng = random.Random(args.seed)
+    clients = [f"10.0.{i // 256}.{i % 256}" for i in range(args.clients)]
+    tasks = []
+    start = time.perf_counter()
+    for i in range(int(args.rps * args.duration)):
+        delay = start + i / args.rps - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        kind, payload = request_mix(page_url, args.ai_share, args.url_share, rng)
+        tasks.append(asyncio.ensure_future(one(client, kind, payload, rng.choice(clients), args.timeout)))
+    return await asyncio.gather(*tasks)
+
+
+def configure(admission_on: bool, limits: dict):
+    """Fresh API state per run; 'off' = no concurrency, queue or per-client limits"""
+    api_fixed.CLIENT_HEADER = "x-forwarded-for"
+    api_fixed.cache_store = LocalStore(tempfile.mkdtemp(prefix="shl_load_"))
+    api_fixed.gemini_client = GeminiClient.from_env(api_fixed.model)
+    if admission_on:
+        api_fixed.admission = AdmissionController(**limits["admission"])
+        api_fixed.client_limiter = ClientRateLimiter(**limits["rate_limit"])
+    else:
+        api_fixed.admission = AdmissionController(max_concurrent=10**6, max_queue=0, degrade_at=float("inf"))
+        api_fixed.client_limiter = ClientRateLimiter(rate=1e9, burst=1e9)
+
+
+async def disconnecting_stream(body_chunks: int):
+    """
+    POST /recommend/stream straight to the ASGI app; the client goes away
+    once the response start and `body_chunks` body messages were sent
+    """
+    payload = orjson.dumps({"text": TEXT_QUERIES[0], "use_ai": False})
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": "/recommend/stream", "raw_path": b"/recommend/stream",
+        "query_string": b"", "root_path": "", "headers": [(b"content-type", b"application/json")],
+        "client": ("10.9.9.9", 1234), "server": ("load", 80),
+    }
+    messages = [{"type": "http.request", "body": payload, "more_body": False}]
+    sent = {"body": 0}
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            if sent["body"] >= body_chunks:
+                raise OSError("client disconnected")
+            sent["body"] += 1
+        elif body_chunks < 0:
+            raise OSError("client disconnected")
+
+    try:
+        await api_fixed.app(scope, receive, send)
+    except Exception:
+        pass
+
+
+async def check_stream_release() -> bool:
+    """Streams dropped by the client at every stage must give their admission slot back"""
+    configure(True, {"admission": {}, "rate_limit": {"rate": 1e9, "burst": 1e9}})
+    for body_chunks in (-1, 0, 1):
+        await disconnecting_stream(body_chunks)
+    # Let cancelled body iterators finish
+    await asyncio.sleep(0.1)
+    active = api_fixed.admission.active
+    print(f"   {'✅' if active == 0 else '❌'} stream disconnects: {active} admission slots still held")
+    return active == 0
+
+
+def summarize(label: str, results: list, wall: float) -> list:
+    rows = []
+    for kind in sorted({r["kind"] for r in results}):
+        group = [r for r in results if r["kind"] == kind]
+        statuses = Counter(r["status"] for r in group)
+        ok = [r for r in group if r["status"] == 200]
+        latencies = [r["ms"] for r in ok] or [float("nan")]
+        rows.append({
+            "admission": label,
+            "kind": kind,
+            "requests": len(group),
+            "200": statuses.get(200, 0),
+            "429": statuses.get(429, 0),
+            "503": statuses.get(503, 0),
+            "timeout": statuses.get("timeout", 0),
+            "degraded": round(sum(r["degraded"] for r in ok) / max(1, len(ok)), 2),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 1),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 1),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 1),
+            "wall_s": round(wall, 1),
+        })
+    return rows
+
+
+async def run(label: str, client: httpx.AsyncClient, page_url: str, args) -> list:
+    start = time.perf_counter()
+    results = await open_loop(client, page_url, args)
+    rows = summarize(label, results, time.perf_counter() - start)
+    print(f"   {label}: {len(results)} requests in {rows[0]['wall_s']}s")
+    return rows
+
+
+async def main_async(args) -> list:
+    page = JDPageServer(args.page_delay)
+    rows = []
+    try:
+        if args.url:
+            async with httpx.AsyncClient(base_url=args.url) as client:
+                rows += await run("server", client, page.url, args)
+            return rows
+
+        api_fixed.load_index()
+        # The SHL_* limits the API was configured with
+        admission, limiter = api_fixed.admission, api_fixed.client_limiter
+        if not await check_stream_release():
+            return None
+        limits = {
+            "admission": {name: getattr(admission, name)
+                          for name in ("max_concurrent", "max_queue", "queue_timeout", "degrade_at", "cooldown")},
+            "rate_limit": {"rate": limiter.rate, "burst": limiter.burst},
+        }
+        transport = httpx.ASGITransport(app=api_fixed.app)
+        for admission_on in (False, True):
+            configure(admission_on, limits)
+            async with httpx.AsyncClient(transport=transport, base_url="http://load") as client:
+                rows += await run("on" if admission_on else "off", client, page.url, args)
+    finally:
+        page.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop load benchmark")
+    parser.add_argument("--rps", type=float, default=40, help="Requests started per second")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of load")
+    parser.add_argument("--clients", type=int, default=20, help="Simulated client addresses")
+    parser.add_argument("--ai-share", type=float, default=0.3, help="Share of query-insight requests")
+    parser.add_argument("--url-share", type=float, default=0.2, help="Share of JD URL requests")
+    parser.add_argument("--page-delay", type=float, default=1.0, help="Seconds the JD page takes to load")
+    parser.add_argument("--timeout", type=float, default=30, help="Client timeout per request")
+    parser.add_argument("--url", help="Load a running server instead of the in-process app")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print("🚀 Load Benchmark")
+    print("=" * 70)
+    rows = asyncio.run(main_async(args))
+    if rows is None:
+        sys.exit(1)
+
+    print("\n" + "=" * 70)
+    print(pd.DataFrame(rows).to_string(index=False))
+    print("=" * 70)
+    print("degraded = share of 200s served without LLM calls; 429 = per-client limit, 503 = shed")
+
+
+if __name__ == "__main__":
+    main()
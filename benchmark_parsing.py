@@ -0,0 +1,153 @@
+"""
+Page Parsing Benchmark - BeautifulSoup (html.parser) vs lxml single pass
+Runs on the assessment pages saved by app/scrapper_new.py (data/pages/),
+checks both parsers extract the same records, then times them inline and
+in a process pool
+
+Usage: python benchmark_parsing.py [--pages data/pages] [--repeat 3] [--workers 4]
+"""
+
+import argparse
+import json
+import os
+import time
+
+from bs4 import BeautifulSoup
+
+from app.page_parser import parse_assessment_page, parse_assessment_pages
+
+
+def parse_assessment_page_bs4(page_html: str, name: str, url: str, page_num=None) -> dict:
+    """The scraper's previous extraction: full tree + several whole-document finds"""
+    assessment_soup = BeautifulSoup(page_html, 'html.parser')
+    assessment_data = {
+        "name": name,
+        "url": url,
+        "category": "Individual Test Solutions",
+        "description": "Description unavailable",
+        "duration": "Duration not specified",
+        "languages": [],
+        "job_level": "Level not specified",
+        "remote_testing": "Not specified",
+        "adaptive_support": "Not specified",
+        "test_type": "Type not specified",
+        "source_page": page_num
+    }
+
+    description = ""
+    description_heading = assessment_soup.find(
+        lambda tag: tag.name in ['h1', 'h2', 'h3', 'h4']
+        and 'description' in tag.text.lower()
+    )
+    if description_heading:
+        next_element = description_heading.find_next('p')
+        if next_element:
+            description = next_element.get_text(" ", strip=True)
+
+    if not description:
+        keywords = ["assessment", "measure", "candidate", "skill", "test", "evaluates"]
+        for p in assessment_soup.find_all("p"):
+            text = p.get_text(" ", strip=True)
+            if any(kw in text.lower() for kw in keywords) and len(text) > 50:
+                description = text
+                break
+
+    if description:
+        assessment_data["description"] = description
+
+    for spec in assessment_soup.find_all('div', class_='specification'):
+        spec_text = spec.get_text(" ", strip=True).lower()
+        if 'duration' in spec_text or 'assessment length' in spec_text:
+            duration_match = spec.find(string=lambda x: 'minutes' in x.lower() if x else False)
+            if duration_match:
+                assessment_data["duration"] = duration_match.strip()
+        if 'language' in spec_text:
+            lang_text = spec.get_text(strip=True)
+            if ',' in lang_text:
+                assessment_data["languages"] = [l.strip() for l in lang_text.split(',')]
+        if 'job level' in spec_text:
+            assessment_data["job_level"] = spec.get_text(strip=True)
+
+    test_type_element = assessment_soup.find(string=lambda x: "test type:" in x.lower() if x else False)
+    if test_type_element:
+        parent = test_type_element.parent
+        assessment_data["test_type"] = parent.get_text(strip=True).replace("Test Type:", "").strip()
+
+    remote_indicator = assessment_soup.find(string=lambda x: "remote testing" in x.lower() if x else False)
+    if remote_indicator:
+        parent = remote_indicator.parent
+        if parent.find(class_='green') or 'yes' in parent.get_text().lower():
+            assessment_data["remote_testing"] = "Yes"
+        else:
+            assessment_data["remote_testing"] = "No"
+
+    return assessment_data
+
+
+def load_corpus(pages_dir: str) -> list:
+    """(html, name, url, page_num) jobs from the scraper's manifest"""
+    with open(os.path.join(pages_dir, "manifest.json"), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    jobs = []
+    for entry in manifest:
+        with open(os.path.join(pages_dir, entry["file"]), "r", encoding="utf-8") as f:
+            jobs.append((f.read(), entry["name"], entry["url"], entry["page"]))
+    return jobs
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Page parsing benchmark")
+    parser.add_argument("--pages", default=os.path.join("data", "pages"))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print("🚀 Page Parsing Benchmark")
+    print("=" * 70)
+
+    if not os.path.exists(os.path.join(args.pages, "manifest.json")):
+        print(f"❌ No saved pages in {args.pages} - run app/scrapper_new.py first!")
+        return
+
+    jobs = load_corpus(args.pages)
+    total_mb = sum(len(job[0]) for job in jobs) / 1e6
+    print(f"✅ Loaded {len(jobs)} pages ({total_mb:.1f} MB)")
+
+    # Same records from both parsers
+    mismatches = [
+        job[2] for job in jobs
+        if parse_assessment_page_bs4(*job) != parse_assessment_page(*job)
+    ]
+    if mismatches:
+        print(f"⚠️  {len(mismatches)} pages differ, e.g. {mismatches[:3]}")
+    else:
+        print("✅ Both parsers extract identical records")
+
+    bs4_time = best_of(args.repeat, lambda: [parse_assessment_page_bs4(*job) for job in jobs])
+    lxml_time = best_of(args.repeat, lambda: parse_assessment_pages(jobs, workers=1))
+    pool_time = best_of(args.repeat, lambda: parse_assessment_pages(jobs, workers=args.workers))
+
+    n = len(jobs)
+    print("\n" + "=" * 70)
+    print(f"{'Parser':<32}{'Total (s)':>12}{'ms/page':>12}{'Speedup':>12}")
+    print("-" * 70)
+    for label, seconds in (
+        ("BeautifulSoup (html.parser)", bs4_time),
+        ("lxml single pass", lxml_time),
+        (f"lxml, {args.workers} processes", pool_time),
+    ):
+        print(f"{label:<32}{seconds:>12.3f}{seconds / n * 1000:>12.2f}{bs4_time / seconds:>11.1f}x")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
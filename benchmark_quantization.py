@@ -0,0 +1,116 @@
+"""
+Quantized Index Benchmark - float32 vs int8 vs binary (+ float32 rescoring)
+Reports, per index format:
+- Mean Recall@10 on the labeled train queries (same metric as evaluation.py)
+- Overlap@10 with the exact float32 results
+- Scan-stage memory, on-disk size and per-query latency
+Single-file indexes (codes + float16 rescoring vectors) are written to a temp dir
+
+Usage: python benchmark_quantization.py [--k 10]
+       python benchmark_quantization.py --synthetic 100000   (no model/labels needed)
+(run rag.py first - it exports catalog_embeddings.npy)
+"""
+
+import argparse
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from app.retrieval import EMBEDDINGS_FILE, MmapRetriever
+from app.quantized_index import QUANTIZATIONS, QuantizedRetriever, read_quantized_index, write_quantized_index
+from benchmark_helpers import overlap_at_k, timed_search
+from synthetic_catalog import synthetic_corpus
+
+
+INDEX_DIR = os.path.join("app", "chroma_db")
+TRAIN_CSV = os.path.join("data", "Gen_AI_Dataset_Train.csv")
+
+
+def directory_size(path: str, exclude=()) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            if name not in exclude:
+                total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantized index benchmark")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--synthetic", type=int, default=0, help="Benchmark N synthetic vectors instead")
+    args = parser.parse_args()
+    k = args.k
+
+    print("🚀 Quantized Index Benchmark")
+    print("=" * 70)
+
+    recall = None
+    if args.synthetic:
+        embeddings, query_vectors = synthetic_corpus(args.synthetic)
+        chroma_bytes = None
+        print(f"✅ {len(embeddings)} synthetic vectors, {len(query_vectors)} queries")
+    else:
+        from sentence_transformers import SentenceTransformer
+        from evaluation import load_train_data, load_assessment_ids, calculate_recall_at_k
+
+        embeddings_path = os.path.join(INDEX_DIR, EMBEDDINGS_FILE)
+        if not os.path.exists(embeddings_path):
+            print(f"❌ {embeddings_path} not found. Run rag.py first!")
+            return
+        embeddings = np.load(embeddings_path, mmap_mode="r")
+        chroma_bytes = directory_size(INDEX_DIR, exclude=(EMBEDDINGS_FILE,))
+
+        model = SentenceTransformer("all-MiniLM-L6-v2")
+        train_queries = load_train_data(TRAIN_CSV)
+        assessment_ids = load_assessment_ids(INDEX_DIR)
+        relevant = [assessment_ids.id_set(item["relevant_slugs"]) for item in train_queries]
+        query_vectors = MmapRetriever(embeddings, model).encode([item["query"] for item in train_queries])
+
+        def recall(ids):
+            return float(np.mean([
+                calculate_recall_at_k(assessment_ids.rows_to_ids(row_ids), ids_relevant)
+                for row_ids, ids_relevant in zip(ids, relevant)
+            ]))
+
+    retrievers = [("float32 (exact)", MmapRetriever(np.asarray(embeddings), None), embeddings.nbytes)]
+    file_bytes = {"float32 (exact)": embeddings.nbytes}
+    tmp_dir = tempfile.mkdtemp(prefix="shl_quantized_")
+    for quantization in QUANTIZATIONS:
+        path = os.path.join(tmp_dir, f"{quantization}.shlq")
+        write_quantized_index(path, embeddings, quantization)
+        _, sections = read_quantized_index(path)
+        label = f"{quantization} + rescore"
+        retrievers.append((label, QuantizedRetriever(sections, None, quantization), None))
+        file_bytes[label] = os.path.getsize(path)
+
+    rows = []
+    baseline = None
+    for label, retriever, resident in retrievers:
+        ids, latency = timed_search(retriever, query_vectors, k)
+        if baseline is None:
+            baseline = ids
+        row = {
+            "index": label,
+            f"overlap@{k}": round(overlap_at_k(ids, baseline, k), 3),
+            "scan_mb": round((resident or retriever.resident_bytes()) / 1e6, 2),
+            "file_mb": round(file_bytes[label] / 1e6, 2),
+            "p50_ms": round(latency, 3),
+        }
+        if recall is not None:
+            row[f"recall@{k}"] = round(recall(ids), 4)
+        rows.append(row)
+
+    print("\n" + "=" * 70)
+    print(pd.DataFrame(rows).to_string(index=False))
+    print("=" * 70)
+    if chroma_bytes is not None:
+        print(f"Chroma directory (SQLite + HNSW): {chroma_bytes / 1e6:.2f} MB")
+    print("scan_mb = memory read on every query; rescoring rows are only paged in for the shortlist")
+    print("file_mb = the whole index on disk (quantized codes + float16 rescoring vectors, no .npy needed)")
+
+
+if __name__ == "__main__":
+    main()
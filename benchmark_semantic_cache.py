@@ -0,0 +1,147 @@
+"""
+Semantic Cache Benchmark - hit rate vs false hits per similarity threshold
+Replays the train queries, paraphrased variants of them (light rewording,
+added JD boilerplate, dropped sentences) and the Streamlit examples through
+the /recommend ranking, once without the cache and once per threshold:
+- hit_rate: share of queries answered from the cache
+- false_hits: hits whose top 10 differs from what a fresh search returns
+- overlap@10: mean overlap with the fresh top 10 over the hits
+- recall@10: on labeled queries (variants inherit their source's labels),
+  with the cache vs without
+
+Usage: python benchmark_semantic_cache.py [--thresholds 0.9 0.95 0.98] [--capacity 1024]
+(run rag.py first - it exports catalog_embeddings.npy / catalog_metadata.json)
+"""
+
+import argparse
+import os
+import random
+import re
+
+import numpy as np
+import pandas as pd
+
+from app.retrieval import SHARED_INDEX_MODES
+
+# Must be set before the API module reads it
+if os.environ.get("SHL_INDEX") not in SHARED_INDEX_MODES:
+    os.environ["SHL_INDEX"] = "mmap"
+os.environ.setdefault("GEMINI_FAKE", "1")
+
+from app import api_fixed
+from app.semantic_cache import SemanticCache
+from app.dataset_loader import load_train_queries
+from evaluation import calculate_recall_at_k, load_assessment_ids
+
+
+TRAIN_CSV = os.path.join("data", "Gen_AI_Dataset_Train.csv")
+EXAMPLE_QUERIES = [
+    "Java developer who collaborates with business teams",
+    "Python and SQL skills, mid-level, under 60 minutes",
+    "Cognitive and personality tests for analyst role",
+    "Sales position for new graduates, 30 min assessment",
+]
+SYNONYMS = {
+    "looking for": "seeking", "hire": "recruit", "hiring": "recruiting",
+    "developer": "engineer", "assessment": "test", "tests": "assessments",
+    "candidates": "applicants", "skills": "abilities", "role": "position",
+}
+BOILERPLATE = (
+    "We are an equal opportunity employer and value diversity at our company.",
+    "Apply now to join a fast-growing team.",
+)
+
+
+def reword(text: str) -> str:
+    for word, synonym in SYNONYMS.items():
+        text = re.sub(rf"\b{word}\b", synonym, text, flags=re.IGNORECASE)
+    return text
+
+
+def variants(text: str, rng: random.Random) -> list:
+    """Paraphrase-like edits that keep the request itself intact"""
+    out = [
+        reword(text),
+        re.sub(r"[^\w\s]", "", text).lower(),
+        f"{text} {rng.choice(BOILERPLATE)}",
+    ]
+    sentences = [s for s in re.split(r"(?<=[.!?])\s+", text) if s]
+    if len(sentences) > 2:
+        drop = rng.randrange(1, len(sentences))
+        out.append(" ".join(s for i, s in enumerate(sentences) if i != drop))
+    return [v for v in out if v.strip() and v != text]
+
+
+def query_stream(train_queries: list, seed: int = 0) -> list:
+    """(text, relevant IDs or None) - originals and variants, shuffled"""
+    rng = random.Random(seed)
+    stream = []
+    for text, relevant in [(q["query"], q["relevant"]) for q in train_queries] + [(q, None) for q in EXAMPLE_QUERIES]:
+        stream.append((text, relevant))
+        stream.extend((variant, relevant) for variant in variants(text, rng))
+    rng.shuffle(stream)
+    return stream
+
+
+def top_rows(index, assessments, text: str) -> list:
+    _, recommendations, _ = api_fixed.search_and_rank(index, assessments, text)
+    return [rec["row"] for rec in recommendations[:10]]
+
+
+def run(stream: list, fresh: dict, index, assessments, assessment_ids, capacity: int, threshold) -> dict:
+    api_fixed.semantic_cache = SemanticCache(capacity, threshold) if threshold is not None else None
+    hits, false_hits, overlaps, recalls = 0, 0, [], []
+    for text, relevant in stream:
+        before = api_fixed.semantic_cache.hits if api_fixed.semantic_cache else 0
+        rows = top_rows(index, assessments, text)
+        if api_fixed.semantic_cache and api_fixed.semantic_cache.hits > before:
+            hits += 1
+            false_hits += rows != fresh[text]
+            overlaps.append(len(set(rows) & set(fresh[text])) / max(1, len(fresh[text])))
+        if relevant:
+            recalls.append(calculate_recall_at_k(assessment_ids.rows_to_ids(rows), relevant))
+    return {
+        "threshold": "off" if threshold is None else threshold,
+        "hit_rate": round(hits / len(stream), 3),
+        "false_hits": false_hits,
+        "false_hit_rate": round(false_hits / hits, 3) if hits else 0.0,
+        "overlap@10": round(float(np.mean(overlaps)), 3) if overlaps else None,
+        "recall@10": round(float(np.mean(recalls)), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Semantic cache benchmark")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.85, 0.9, 0.93, 0.95, 0.97, 0.99])
+    parser.add_argument("--capacity", type=int, default=1024)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print("🚀 Semantic Cache Benchmark")
+    print("=" * 70)
+
+    index, assessments = api_fixed.load_index()
+    assessment_ids = load_assessment_ids(api_fixed.INDEX_DIR)
+    train_queries = [
+        {"query": item["query"], "relevant": assessment_ids.id_set(item["relevant_slugs"])}
+        for item in load_train_queries(TRAIN_CSV)
+    ]
+    stream = query_stream(train_queries, args.seed)
+    print(f"✅ {len(stream)} queries ({len(train_queries)} train + {len(EXAMPLE_QUERIES)} examples, with variants)")
+
+    # Uncached top 10 of every text - the reference for false hits
+    api_fixed.semantic_cache = None
+    fresh = {text: top_rows(index, assessments, text) for text, _ in stream}
+
+    rows = [run(stream, fresh, index, assessments, assessment_ids, args.capacity, None)]
+    for threshold in args.thresholds:
+        rows.append(run(stream, fresh, index, assessments, assessment_ids, args.capacity, threshold))
+
+    print("\n" + "=" * 70)
+    print(pd.DataFrame(rows).to_string(index=False))
+    print("=" * 70)
+    print("false_hit_rate = cached top 10 differs from a fresh search (share of hits)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Serialization Benchmark - /recommend response encoding
+Compares FastAPI's default path (jsonable_encoder + json.dumps), plain orjson
+on dicts, and splicing pre-serialized fragments (app/serialization.py)
+
+Usage: python benchmark_serialization.py [--repeat 200]
+"""
+
+import argparse
+import json
+import random
+import time
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+from app.catalog import Catalog
+from app.serialization import build_fragments, render_payload, render_recommendation
+from benchmark_catalog_memory import load_metadatas
+
+
+def to_response(catalog: Catalog, record, relevance_score: float, ai_insights: str = "") -> dict:
+    """One recommendation as a plain dict - what the API built before pre-serialized fragments"""
+    return {
+        "id": str(record.row),
+        "name": record.name,
+        "url": record.url,
+        "description": record.description,
+        **{name: catalog.field(record, name) for name in
+           ("duration", "languages", "job_level", "remote_testing", "adaptive_support", "test_type")},
+        "relevance_score": relevance_score,
+        "ai_insights": ai_insights,
+    }
+
+
+def timed(fn, repeat: int) -> float:
+    """Mean milliseconds per call"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response serialization benchmark")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    metadatas = load_metadatas()
+    catalog = Catalog.from_metadatas((str(i) for i in range(len(metadatas))), metadatas)
+    fragments = build_fragments(catalog)
+    rng = random.Random(0)
+
+    print("🚀 Serialization Benchmark")
+    print("=" * 70)
+    print(f"{'Batch':>8}{'json (ms)':>14}{'orjson (ms)':>14}{'fragments (ms)':>17}{'speedup':>10}")
+
+    for batch in [10, 100, 1000, 10000]:
+        picks = [(rng.randrange(len(catalog)), rng.random()) for _ in range(batch)]
+        head = {"query": "Java developer who collaborates with business teams",
+                "total_found": batch, "returned": batch}
+
+        def as_dicts():
+            return {**head, "recommendations": [
+                to_response(catalog, catalog[row], score, "• Key skill measured") for row, score in picks
+            ]}
+
+        def stdlib():
+            # What FastAPI does for a returned dict without a response_model
+            return json.dumps(jsonable_encoder(as_dicts()), ensure_ascii=False,
+                              allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+        def plain_orjson():
+            return orjson.dumps(as_dicts())
+
+        def spliced():
+            return render_payload(head, [
+                render_recommendation(fragments[row], score, "• Key skill measured") for row, score in picks
+            ])
+
+        assert orjson.loads(spliced()) == orjson.loads(stdlib())
+
+        repeat = max(3, args.repeat * 10 // batch)
+        t_json = timed(stdlib, repeat)
+        t_orjson = timed(plain_orjson, repeat)
+        t_frag = timed(spliced, repeat)
+        print(f"{batch:>8}{t_json:>14.3f}{t_orjson:>14.3f}{t_frag:>17.3f}{t_json / t_frag:>9.1f}x")
+
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
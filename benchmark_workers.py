@@ -0,0 +1,134 @@
+"""
+Worker Scaling Benchmark - memory and throughput per worker count
+Starts `python -m app.serve --workers N`, fires /recommend requests from a
+thread pool and reads RSS/PSS of every worker from /proc (Linux only)
+
+Usage: python benchmark_workers.py [--workers 1 2 4] [--seconds 15]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+
+
+QUERIES = [
+    "Java developer who collaborates with business teams",
+    "Python and SQL skills, mid-level, under 60 minutes",
+    "Cognitive and personality tests for analyst role",
+    "Sales position for new graduates, 30 min assessment",
+]
+
+
+def children_of(pid: int) -> list:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def memory_kb(pid: int) -> dict:
+    """Rss and Pss (shared pages split between sharers) from smaps_rollup"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:"):
+                values[parts[0][:-1]] = int(parts[1])
+    return values
+
+
+def wait_until_ready(base_url: str, timeout: float = 180):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{base_url}/health", timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError("Server did not become ready")
+
+
+def run_load(base_url: str, seconds: float, concurrency: int) -> tuple:
+    """Return (completed requests, errors) within `seconds`"""
+    deadline = time.time() + seconds
+    session = requests.Session()
+
+    def worker(i):
+        done = errors = 0
+        while time.time() < deadline:
+            try:
+                response = session.post(
+                    f"{base_url}/recommend",
+                    json={"text": QUERIES[(i + done) % len(QUERIES)], "use_ai": False},
+                    timeout=30
+                )
+                if response.status_code == 200:
+                    done += 1
+                else:
+                    errors += 1
+            except requests.RequestException:
+                errors += 1
+        return done, errors
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(worker, range(concurrency)))
+    return sum(r[0] for r in results), sum(r[1] for r in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker scaling benchmark")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    rows = []
+
+    print("🚀 Worker Scaling Benchmark")
+    print("=" * 70)
+
+    for n in args.workers:
+        print(f"\n🔄 Starting server with {n} worker(s)...")
+        server = subprocess.Popen(
+            [sys.executable, "-m", "app.serve", "--workers", str(n), "--port", str(args.port)],
+            env={**os.environ, "GEMINI_FAKE": "1"},
+        )
+        try:
+            wait_until_ready(base_url)
+            run_load(base_url, 2, args.concurrency)  # warm-up
+            done, errors = run_load(base_url, args.seconds, args.concurrency)
+
+            workers = children_of(server.pid)
+            memory = [memory_kb(pid) for pid in workers]
+            parent = memory_kb(server.pid)
+            rows.append({
+                "workers": n,
+                "req_per_s": round(done / args.seconds, 1),
+                "errors": errors,
+                "parent_rss_mb": round(parent["Rss"] / 1024, 1),
+                "worker_rss_mb": round(sum(m["Rss"] for m in memory) / len(memory) / 1024, 1),
+                "worker_pss_mb": round(sum(m["Pss"] for m in memory) / len(memory) / 1024, 1),
+                "total_pss_mb": round((parent["Pss"] + sum(m["Pss"] for m in memory)) / 1024, 1),
+            })
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    print("\n" + "=" * 70)
+    print(pd.DataFrame(rows).to_string(index=False))
+    print("=" * 70)
+    print("PSS splits shared pages between processes - total_pss_mb is the real footprint")
+
+
+if __name__ == "__main__":
+    main()
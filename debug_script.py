@@ -1,26 +1,30 @@
 import json
-import pandas as pd
+
+from app.assessment_ids import AssessmentIds
+from app.dataset_loader import read_csv
 
 # Load scraped data
 with open("data/shl_individual_assessments.json", "r", encoding='utf-8') as f:
     scraped = json.load(f)
 
-scraped_urls = set([assess['url'].lower().strip('/') for assess in scraped])
+# Same canonical IDs as the index and evaluation.py
+assessment_ids = AssessmentIds.from_urls(assess['url'] for assess in scraped)
+scraped_ids = set(assessment_ids.row_ids)
 
 # Load ground truth
-train_df = pd.read_csv("data/Gen_AI_Dataset_Train.csv", encoding='cp1252')
-ground_truth_urls = set(train_df['Assessment_url'].str.lower().str.strip('/'))
+train_df = read_csv("data/Gen_AI_Dataset_Train.csv")
+ground_truth_ids = assessment_ids.id_set(train_df['Assessment_url'])
 
 # Check overlap
-overlap = scraped_urls.intersection(ground_truth_urls)
+overlap = scraped_ids & ground_truth_ids
 
-print(f"Scraped assessments: {len(scraped_urls)}")
-print(f"Ground truth URLs: {len(ground_truth_urls)}")
+print(f"Scraped assessments: {len(scraped_ids)}")
+print(f"Ground truth URLs: {len(ground_truth_ids)}")
 print(f"Overlap: {len(overlap)}")
-print(f"Overlap %: {len(overlap)/len(ground_truth_urls)*100:.2f}%")
+print(f"Overlap %: {len(overlap)/len(ground_truth_ids)*100:.2f}%")
 
 # Show mismatches
-missing = ground_truth_urls - scraped_urls
+missing = ground_truth_ids - scraped_ids
 print(f"\n❌ Missing from scraped data ({len(missing)}):")
-for url in list(missing)[:10]:
-    print(f"  - {url}")
+for assessment_id in sorted(missing)[:10]:
+    print(f"  - {assessment_ids.slugs[assessment_id]}")
@@ -1,10 +1,11 @@
 # save as debug_urls.py
-import pandas as pd
 import chromadb
 from sentence_transformers import SentenceTransformer
 
+from app.dataset_loader import read_csv
+
 # Load train data
-df = pd.read_csv('data/Gen_AI_Dataset_Train.csv', encoding='cp1252')
+df = read_csv('data/Gen_AI_Dataset_Train.csv')
 print("Sample URLs from train data:")
 print(df['Assessment_url'].head(3).tolist())
 
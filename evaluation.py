@@ -169,8 +169,15 @@ Calculates Mean Recall@K on the labeled train set
 import pandas as pd
 import chromadb
 from sentence_transformers import SentenceTransformer
+import itertools
 import json
-from typing import List, Dict
+import sys
+import numpy as np
+from typing import Iterable, List, Dict, Set
+
+from app.retrieval import FieldRetriever, FIELD_NAMES, load_metadatas
+from app.dataset_loader import load_train_queries
+from app.assessment_ids import AssessmentIds
 
 
 # def normalize_url(url: str) -> str:
@@ -185,102 +192,50 @@ from typing import List, Dict
 #     normalized = normalized.lower()
 #     return normalized
 
-def normalize_url(url: str) -> str:
-    """
-    Aggressive URL normalization - matches regardless of /solutions/ prefix
-    """
-    url = url.lower().strip().rstrip('/')
-    
-    # Remove protocol and domain
-    url = url.replace('https://', '').replace('http://', '')
-    url = url.replace('www.shl.com/', '').replace('shl.com/', '')
-    
-    # Normalize path - remove /solutions/ variations
-    url = url.replace('solutions/products/product-catalog/view/', '')
-    url = url.replace('products/product-catalog/view/', '')
-    url = url.replace('solutions/products/', '')
-    url = url.replace('products/', '')
-    
-    # Return just the assessment slug
-    parts = [p for p in url.split('/') if p]
-    if parts:
-        return parts[-1]  # Final slug only: "automata-fix-new"
-    
-    return url
-
-# Example transformations:
-# https://www.shl.com/solutions/products/product-catalog/view/automata-fix-new/
-# → automata-fix-new
-
-# https://www.shl.com/products/product-catalog/view/automata-fix-new/
-# → automata-fix-new
-
-
-
 def load_train_data(csv_path: str) -> List[Dict]:
     """
     Load train data from CSV and parse ground truth URLs
     Expected columns: Query, Assessment_url
+    Parsed once per file version (see app/dataset_loader.py)
     """
-    # Try multiple encodings
-    for encoding in ['utf-8', 'cp1252', 'latin-1', 'iso-8859-1']:
-        try:
-            df = pd.read_csv(csv_path, encoding=encoding)
-            print(f"✅ Successfully read CSV with {encoding} encoding")
-            break
-        except (UnicodeDecodeError, Exception) as e:
-            if encoding == 'iso-8859-1':
-                raise Exception(f"Could not read CSV with any encoding: {e}")
-            continue
-    
-    # Group by Query to get all relevant assessments
-    train_queries = []
-    for query, group in df.groupby('Query'):
-        relevant_urls = group['Assessment_url'].tolist()
-        train_queries.append({
-            'query': query,
-            'relevant_urls': relevant_urls
-        })
+    train_queries = load_train_queries(csv_path)
+    total_pairs = sum(len(item['relevant_urls']) for item in train_queries)
     
     print(f"✅ Loaded {len(train_queries)} unique queries")
-    print(f"✅ Total labeled pairs: {len(df)} query-assessment pairs")
+    print(f"✅ Total labeled pairs: {total_pairs} query-assessment pairs")
     
     return train_queries
 
 
-def get_recommendations(query: str, collection, model, k: int = 10) -> List[str]:
-    """Get top K recommendation URLs for a query"""
+def load_assessment_ids(index_dir: str) -> AssessmentIds:
+    """ID table written by rag.py (rebuilt from the exported metadata for older indexes)"""
+    try:
+        return AssessmentIds.load(index_dir)
+    except FileNotFoundError:
+        return AssessmentIds.from_urls(m["url"] for m in load_metadatas(index_dir))
+
+
+def get_recommendations(query: str, collection, model, assessment_ids: AssessmentIds, k: int = 10) -> List[int]:
+    """Get top K recommendation assessment IDs for a query"""
     results = collection.query(
         query_texts=[query],
         n_results=k,
-        include=["metadatas"]
+        include=[]
     )
     
-    # Extract URLs
-    recommended_urls = [
-        results["metadatas"][0][i]["url"] 
-        for i in range(len(results["ids"][0]))
-    ]
-    
-    return recommended_urls
+    # Chroma ids are index rows - map them straight to assessment IDs
+    return assessment_ids.rows_to_ids(results["ids"][0])
 
 
-def calculate_recall_at_k(recommended: List[str], relevant: List[str]) -> float:
+def calculate_recall_at_k(recommended: Iterable[int], relevant: Set[int]) -> float:
     """
-    Calculate Recall@K for a single query with URL normalization
+    Calculate Recall@K for a single query on assessment IDs
     Recall@K = (Number of relevant items in top K) / (Total relevant items)
     """
     if len(relevant) == 0:
         return 0.0
     
-    # Normalize URLs for comparison
-    recommended_normalized = [normalize_url(url) for url in recommended]
-    relevant_normalized = [normalize_url(url) for url in relevant]
-    
-    matched = sum(1 for url in recommended_normalized if url in relevant_normalized)
-    recall = matched / len(relevant)
-    
-    return recall
+    return len(relevant.intersection(recommended)) / len(relevant)
 
 
 def evaluate_system(train_csv_path: str, chroma_db_path: str = "app/chroma_db", k: int = 10):
@@ -301,6 +256,7 @@ def evaluate_system(train_csv_path: str, chroma_db_path: str = "app/chroma_db",
     except ValueError:
         print("❌ Collection 'shl_assessments' not found. Run rag.py first!")
         return
+    assessment_ids = load_assessment_ids(chroma_db_path)
     
     # Load train data
     print(f"\n📂 Loading train data from: {train_csv_path}")
@@ -315,23 +271,20 @@ def evaluate_system(train_csv_path: str, chroma_db_path: str = "app/chroma_db",
     
     for i, item in enumerate(train_queries, 1):
         query = item['query']
-        relevant_urls = item['relevant_urls']
+        relevant = assessment_ids.id_set(item['relevant_slugs'])
         
         # Get recommendations
-        recommended_urls = get_recommendations(query, collection, model, k)
+        recommended = get_recommendations(query, collection, model, assessment_ids, k)
         
         # Calculate recall
-        recall = calculate_recall_at_k(recommended_urls, relevant_urls)
+        recall = calculate_recall_at_k(recommended, relevant)
         recall_scores.append(recall)
         
-        # Count matches (with normalization for display)
-        recommended_normalized = [normalize_url(url) for url in recommended_urls]
-        relevant_normalized = [normalize_url(url) for url in relevant_urls]
-        matches = sum(1 for url in recommended_normalized if url in relevant_normalized)
+        matches = len(relevant.intersection(recommended))
         
         print(f"Query {i}/{len(train_queries)}:")
         print(f"  Text: {query[:80]}...")
-        print(f"  Relevant assessments: {len(relevant_urls)}")
+        print(f"  Relevant assessments: {len(relevant)}")
         print(f"  Matched in top {k}: {matches}")
         print(f"  Recall@{k}: {recall:.4f}")
         print()
@@ -366,9 +319,68 @@ def evaluate_system(train_csv_path: str, chroma_db_path: str = "app/chroma_db",
     return mean_recall
 
 
+def weight_grid(step: float = 0.1) -> List[Dict[str, float]]:
+    """Every combination of field weights on a `step` grid that sums to 1"""
+    ticks = int(round(1 / step))
+    grid = []
+    for combo in itertools.product(range(ticks + 1), repeat=len(FIELD_NAMES) - 1):
+        if sum(combo) <= ticks:
+            values = list(combo) + [ticks - sum(combo)]
+            grid.append({name: round(v * step, 3) for name, v in zip(FIELD_NAMES, values)})
+    return grid
+
+
+def evaluate_field_weights(train_csv_path: str, index_dir: str = "app/chroma_db", k: int = 10, step: float = 0.1):
+    """
+    Mean Recall@K of the field-aware index for every weight combination
+    Queries are embedded and scored against each field once; each grid point
+    is only a weighted sum and a top-k, so nothing is re-embedded
+    """
+    print(f"🔍 Field weight grid search with K={k}, step={step}")
+    print("=" * 60)
+    
+    model = SentenceTransformer('all-MiniLM-L6-v2')
+    try:
+        retriever = FieldRetriever.load(index_dir, model)
+    except FileNotFoundError:
+        print("❌ Field embeddings not found. Run rag.py first!")
+        return
+    assessment_ids = load_assessment_ids(index_dir)
+    
+    train_queries = load_train_data(train_csv_path)
+    relevant = [assessment_ids.id_set(item['relevant_slugs']) for item in train_queries]
+    field_scores = retriever.field_scores(retriever.encode([item['query'] for item in train_queries]))
+    
+    rows = []
+    for weights in weight_grid(step):
+        similarity = np.tensordot(field_scores, retriever.weight_vector(weights), axes=([1], [0]))
+        top = retriever.top_k(similarity, k)["ids"]
+        recalls = [
+            calculate_recall_at_k(assessment_ids.rows_to_ids(ids), ids_relevant)
+            for ids, ids_relevant in zip(top, relevant)
+        ]
+        rows.append({**weights, f"mean_recall@{k}": sum(recalls) / len(recalls)})
+    
+    df = pd.DataFrame(rows).sort_values(f"mean_recall@{k}", ascending=False)
+    print(df.head(10).to_string(index=False))
+    print("=" * 60)
+    
+    best = df.iloc[0]
+    spec = ",".join(f"{name}={best[name]:g}" for name in FIELD_NAMES)
+    print(f"✅ Best weights: SHL_FIELD_WEIGHTS={spec}")
+    
+    df.to_csv(f"field_weight_grid_k{k}.csv", index=False)
+    print(f"✅ Full grid saved to field_weight_grid_k{k}.csv")
+    return df
+
+
 if __name__ == "__main__":
     TRAIN_CSV = "data/Gen_AI_Dataset_Train.csv"
     
+    if "--field-grid" in sys.argv:
+        evaluate_field_weights(TRAIN_CSV, k=10)
+        sys.exit(0)
+    
     print("🚀 SHL Assessment Recommendation System - Evaluation\n")
     
     for k in [5, 10]:
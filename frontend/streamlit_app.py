@@ -5,7 +5,10 @@ Matches your FastAPI backend structure
 
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
+import time
 
 # Configuration
 st.set_page_config(
@@ -27,6 +30,109 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+class APIError(Exception):
+    """Non-200 API response (raised so st.cache_data never caches failures)"""
+
+    def __init__(self, status_code: int, text: str, detail: str = ""):
+        super().__init__(f"API Error: {status_code}")
+        self.status_code = status_code
+        self.text = text
+        self.detail = detail
+
+
+class DegradedResponse(Exception):
+    """X-Degraded response (insights skipped under load) - raised so st.cache_data never caches it"""
+
+    def __init__(self, data: dict):
+        super().__init__("Degraded response")
+        self.data = data
+
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """One pooled HTTP session reused across reruns and users"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504], allowed_methods=["GET"])
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def check_health(api_base_url: str):
+    """Health status, cached briefly so widget interactions don't hit the API"""
+    try:
+        health_response = get_session().get(f"{api_base_url}/health", timeout=5)
+        if health_response.status_code == 200:
+            return "ok", health_response.json()
+        return "error", None
+    except Exception:
+        return "unreachable", None
+
+
+def raise_for_api_error(response: requests.Response):
+    if response.status_code != 200:
+        try:
+            detail = response.json().get('detail', 'Unknown error')
+        except ValueError:
+            detail = 'Unknown error'
+        raise APIError(response.status_code, response.text, detail)
+
+
+def run_job(api_base_url: str, payload: dict, timeout: float = 90) -> dict:
+    """
+    Submit a background job (JD URLs) and poll until it finishes
+    The page is fetched by the API's job workers, not inside our HTTP request
+    """
+    response = get_session().post(f"{api_base_url}/jobs", json=payload, timeout=10)
+    if response.status_code == 404:
+        # API without the job endpoints - fall back to the synchronous call
+        return None
+    if response.status_code != 202:
+        raise_for_api_error(response)
+    poll_url = f"{api_base_url}{response.json()['poll']}"
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = get_session().get(poll_url, timeout=10)
+        raise_for_api_error(response)
+        job = response.json()
+        if job["status"] == "done":
+            return job["result"]
+        if job["status"] == "failed":
+            error = job.get("error", {})
+            raise APIError(error.get("status_code", 500), response.text, error.get("detail", "Unknown error"))
+        time.sleep(min(float(response.headers.get("Retry-After", 1)), 2))
+    raise APIError(504, "", "Timed out waiting for the job description to be processed")
+
+
+@st.cache_data(ttl=600, max_entries=256, show_spinner=False)
+def fetch_recommendations(api_base_url: str, query: str, use_ai: bool) -> dict:
+    """Recommendations memoized per (API, query, settings)"""
+    payload = {
+        "text": query,
+        "use_ai": use_ai
+    }
+    if query.strip().startswith(("http://", "https://")):
+        data = run_job(api_base_url, payload)
+        if data is not None:
+            return data
+
+    response = get_session().post(
+        f"{api_base_url}/recommend",
+        json=payload,
+        timeout=30
+    )
+    raise_for_api_error(response)
+    if response.headers.get("X-Degraded") == "1":
+        raise DegradedResponse(response.json())
+    return response.json()
+
+
 # Title
 st.title("🎯 SHL Assessment Recommendation System")
 st.markdown("### AI-Powered Recommendations from 377+ Individual Test Solutions")
@@ -44,20 +150,18 @@ with st.sidebar:
         help="Enter your API base URL (without /recommend)"
     )
     
-    # Check API health
-    try:
-        health_response = requests.get(f"{api_base_url}/health", timeout=5)
-        if health_response.status_code == 200:
-            health_data = health_response.json()
-            st.success("✅ API Connected")
-            st.json({
-                "Status": health_data.get("status", "unknown"),
-                "Gemini AI": health_data.get("gemini_ai", "unknown"),
-                "Vector DB": health_data.get("vector_db", "unknown")
-            })
-        else:
-            st.error("❌ API Not Responding")
-    except:
+    # Check API health (cached for 30s)
+    health_state, health_data = check_health(api_base_url)
+    if health_state == "ok":
+        st.success("✅ API Connected")
+        st.json({
+            "Status": health_data.get("status", "unknown"),
+            "Gemini AI": health_data.get("gemini_ai", "unknown"),
+            "Vector DB": health_data.get("vector_db", "unknown")
+        })
+    elif health_state == "error":
+        st.error("❌ API Not Responding")
+    else:
         st.warning("⚠️ API Not Connected")
         st.code(f"Make sure API is running at:\n{api_base_url}")
     
@@ -133,159 +237,163 @@ with col3:
 
 if clear_button:
     st.session_state.query = ""
+    st.session_state.submitted = None
     st.rerun()
 
-# Process query
+# Remember the submitted search so later reruns (slider, checkbox...) re-render
+# it from the memoized result instead of calling the API again
 if search_button:
     if not query.strip():
         st.warning("⚠️ Please enter a query or job description")
+        st.session_state.submitted = None
     else:
+        st.session_state.submitted = (query, use_ai_insights)
+
+# Process query
+if st.session_state.get("submitted"):
+    submitted_query, submitted_use_ai = st.session_state.submitted
+    try:
         with st.spinner("🤖 Analyzing requirements and finding best assessments..."):
+            # Call your API (memoized per query and settings)
             try:
-                # Call your API
-                response = requests.post(
-                    f"{api_base_url}/recommend",
-                    json={
-                        "text": query,
-                        "use_ai": use_ai_insights
-                    },
-                    timeout=30
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    recommendations = data.get("recommendations", [])
-                    total_found = data.get("total_found", len(recommendations))
-                    returned = data.get("returned", len(recommendations))
-                    
-                    if recommendations:
-                        # Success metrics
-                        st.success(f"✅ Found {total_found} matching assessments, showing top {min(num_recommendations, returned)}")
-                        
-                        # Stats
-                        col1, col2, col3 = st.columns(3)
-                        with col1:
-                            st.metric("Total Matches", total_found)
-                        with col2:
-                            st.metric("Showing", min(num_recommendations, len(recommendations)))
-                        with col3:
-                            avg_score = sum(r.get('relevance_score', 0) for r in recommendations[:num_recommendations]) / min(num_recommendations, len(recommendations))
-                            st.metric("Avg Match Score", f"{avg_score*100:.1f}%")
-                        
-                        st.markdown("---")
-                        
-                        # Display recommendations
-                        for i, rec in enumerate(recommendations[:num_recommendations], 1):
-                            with st.expander(
-                                f"#{i} - {rec['name']} ({rec.get('relevance_score', 0)*100:.0f}% Match)", 
-                                expanded=(i <= 3)
-                            ):
-                                # Header with score
-                                col_title, col_score = st.columns([4, 1])
-                                with col_title:
-                                    st.markdown(f"### {rec['name']}")
-                                with col_score:
-                                    score = rec.get('relevance_score', 0)
-                                    st.progress(score)
-                                    st.caption(f"{score*100:.1f}% Match")
-                                
-                                # Details grid
-                                col1, col2, col3, col4 = st.columns(4)
-                                
-                                with col1:
-                                    st.markdown("**⏱️ Duration**")
-                                    st.write(rec.get('duration', 'Not specified'))
-                                
-                                with col2:
-                                    st.markdown("**👤 Job Level**")
-                                    st.write(rec.get('job_level', 'Not specified'))
-                                
-                                with col3:
-                                    st.markdown("**📋 Test Type**")
-                                    st.write(rec.get('test_type', 'Not specified'))
-                                
-                                with col4:
-                                    st.markdown("**🌐 Remote**")
-                                    st.write(rec.get('remote_testing', 'Not specified'))
-                                
-                                # Description
-                                st.markdown("**📝 Description:**")
-                                st.write(rec.get('description', 'No description available'))
-                                
-                                # AI Insights
-                                if use_ai_insights and rec.get('ai_insights'):
-                                    st.markdown("**🤖 AI-Generated Insights:**")
-                                    with st.container():
-                                        st.info(rec['ai_insights'])
-                                
-                                # Languages
-                                if rec.get('languages') and rec['languages'] != 'Not specified':
-                                    st.markdown("**🌍 Available Languages:**")
-                                    st.write(rec['languages'])
-                                
-                                # Link
-                                st.markdown(f"**🔗 [View Full Assessment Details]({rec['url']})**")
-                        
-                        # Export section
-                        st.markdown("---")
-                        st.subheader("📥 Export Results")
-                        
-                        # Prepare DataFrame
-                        export_data = []
-                        for rec in recommendations[:num_recommendations]:
-                            export_data.append({
-                                'Assessment Name': rec['name'],
-                                'URL': rec['url'],
-                                'Match Score': f"{rec.get('relevance_score', 0)*100:.1f}%",
-                                'Duration': rec.get('duration', 'N/A'),
-                                'Job Level': rec.get('job_level', 'N/A'),
-                                'Test Type': rec.get('test_type', 'N/A'),
-                                'Remote Testing': rec.get('remote_testing', 'N/A'),
-                                'Description': rec.get('description', '')[:200] + '...'
-                            })
-                        
-                        df = pd.DataFrame(export_data)
-                        
-                        # Display table
-                        st.dataframe(df, use_container_width=True)
-                        
-                        # Download button
-                        csv = df.to_csv(index=False)
-                        st.download_button(
-                            label="📥 Download Results as CSV",
-                            data=csv,
-                            file_name="shl_recommendations.csv",
-                            mime="text/csv",
-                            use_container_width=True
-                        )
-                    else:
-                        st.warning("😕 No assessments found. Try rephrasing your query or using different keywords.")
-                
-                elif response.status_code == 500:
-                    st.error("❌ Server Error")
-                    error_detail = response.json().get('detail', 'Unknown error')
-                    st.code(error_detail)
-                    if 'Vector database not initialized' in error_detail:
-                        st.info("💡 Run `python app/rag.py` to initialize the vector database")
-                else:
-                    st.error(f"❌ API Error: {response.status_code}")
-                    st.code(response.text)
-            
-            except requests.exceptions.ConnectionError:
-                st.error(f"❌ Could not connect to API at {api_base_url}")
-                st.info("""
-                **Troubleshooting:**
-                1. Make sure API is running: `uvicorn app.api_fixed:app --reload`
-                2. Check if URL is correct
-                3. Verify firewall settings
-                """)
-            
-            except requests.exceptions.Timeout:
-                st.error("⏱️ Request timed out. The API might be processing...")
-            
-            except Exception as e:
-                st.error(f"❌ Unexpected Error: {str(e)}")
-                st.code(str(e))
+                data = fetch_recommendations(api_base_url, submitted_query, submitted_use_ai)
+            except DegradedResponse as e:
+                # Shown once, not cached - the next run asks again for full insights
+                data = e.data
+                st.info("ℹ️ The API is under heavy load - showing results without new AI insights")
+        
+        recommendations = data.get("recommendations", [])
+        total_found = data.get("total_found", len(recommendations))
+        returned = data.get("returned", len(recommendations))
+
+        if recommendations:
+            # Success metrics
+            st.success(f"✅ Found {total_found} matching assessments, showing top {min(num_recommendations, returned)}")
+
+            # Stats
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Total Matches", total_found)
+            with col2:
+                st.metric("Showing", min(num_recommendations, len(recommendations)))
+            with col3:
+                avg_score = sum(r.get('relevance_score', 0) for r in recommendations[:num_recommendations]) / min(num_recommendations, len(recommendations))
+                st.metric("Avg Match Score", f"{avg_score*100:.1f}%")
+
+            st.markdown("---")
+
+            # Display recommendations
+            for i, rec in enumerate(recommendations[:num_recommendations], 1):
+                with st.expander(
+                    f"#{i} - {rec['name']} ({rec.get('relevance_score', 0)*100:.0f}% Match)", 
+                    expanded=(i <= 3)
+                ):
+                    # Header with score
+                    col_title, col_score = st.columns([4, 1])
+                    with col_title:
+                        st.markdown(f"### {rec['name']}")
+                    with col_score:
+                        score = rec.get('relevance_score', 0)
+                        st.progress(score)
+                        st.caption(f"{score*100:.1f}% Match")
+
+                    # Details grid
+                    col1, col2, col3, col4 = st.columns(4)
+
+                    with col1:
+                        st.markdown("**⏱️ Duration**")
+                        st.write(rec.get('duration', 'Not specified'))
+
+                    with col2:
+                        st.markdown("**👤 Job Level**")
+                        st.write(rec.get('job_level', 'Not specified'))
+
+                    with col3:
+                        st.markdown("**📋 Test Type**")
+                        st.write(rec.get('test_type', 'Not specified'))
+
+                    with col4:
+                        st.markdown("**🌐 Remote**")
+                        st.write(rec.get('remote_testing', 'Not specified'))
+
+                    # Description
+                    st.markdown("**📝 Description:**")
+                    st.write(rec.get('description', 'No description available'))
+
+                    # AI Insights
+                    if submitted_use_ai and rec.get('ai_insights'):
+                        st.markdown("**🤖 AI-Generated Insights:**")
+                        with st.container():
+                            st.info(rec['ai_insights'])
+
+                    # Languages
+                    if rec.get('languages') and rec['languages'] != 'Not specified':
+                        st.markdown("**🌍 Available Languages:**")
+                        st.write(rec['languages'])
+
+                    # Link
+                    st.markdown(f"**🔗 [View Full Assessment Details]({rec['url']})**")
+
+            # Export section
+            st.markdown("---")
+            st.subheader("📥 Export Results")
+
+            # Prepare DataFrame
+            export_data = []
+            for rec in recommendations[:num_recommendations]:
+                export_data.append({
+                    'Assessment Name': rec['name'],
+                    'URL': rec['url'],
+                    'Match Score': f"{rec.get('relevance_score', 0)*100:.1f}%",
+                    'Duration': rec.get('duration', 'N/A'),
+                    'Job Level': rec.get('job_level', 'N/A'),
+                    'Test Type': rec.get('test_type', 'N/A'),
+                    'Remote Testing': rec.get('remote_testing', 'N/A'),
+                    'Description': rec.get('description', '')[:200] + '...'
+                })
+
+            df = pd.DataFrame(export_data)
+
+            # Display table
+            st.dataframe(df, use_container_width=True)
+
+            # Download button
+            csv = df.to_csv(index=False)
+            st.download_button(
+                label="📥 Download Results as CSV",
+                data=csv,
+                file_name="shl_recommendations.csv",
+                mime="text/csv",
+                use_container_width=True
+            )
+        else:
+            st.warning("😕 No assessments found. Try rephrasing your query or using different keywords.")
+    
+    except APIError as e:
+        if e.status_code == 500:
+            st.error("❌ Server Error")
+            st.code(e.detail)
+            if 'Vector database not initialized' in e.detail:
+                st.info("💡 Run `python app/rag.py` to initialize the vector database")
+        else:
+            st.error(f"❌ API Error: {e.status_code}")
+            st.code(e.text)
+    
+    except requests.exceptions.ConnectionError:
+        st.error(f"❌ Could not connect to API at {api_base_url}")
+        st.info("""
+        **Troubleshooting:**
+        1. Make sure API is running: `uvicorn app.api_fixed:app --reload`
+        2. Check if URL is correct
+        3. Verify firewall settings
+        """)
+
+    except requests.exceptions.Timeout:
+        st.error("⏱️ Request timed out. The API might be processing...")
+
+    except Exception as e:
+        st.error(f"❌ Unexpected Error: {str(e)}")
+        st.code(str(e))
 
 # Footer
 st.markdown("---")
@@ -1,71 +1,120 @@
 """
 Generate predictions for unlabeled test set
 Format: CSV with Query and Assessment_url columns
+
+Runs in-process (no API, no network): the same retrieval, reranking and
+Test Type balancing as /recommend, with queries encoded in batches and
+batches spread over forked worker processes. Rows are written as each
+batch finishes.
+
+Usage: python predict_test.py [--workers 4] [--batch-size 32]
+(run rag.py first - it exports catalog_embeddings.npy / catalog_metadata.json)
 """
 
-import pandas as pd
-import requests
-import json
+import argparse
+import csv
+import os
 import time
+from multiprocessing import get_context
+
+import pandas as pd
+
+from app.retrieval import batch_multi_vector_search, require_shared_index
+
+# Forked batch workers share the memory-mapped export
+require_shared_index("predict_test.py")
+os.environ.setdefault("GEMINI_FAKE", "1")  # insights are not part of the submission
+
+from app import api_fixed
+from app.dataset_loader import load_queries
 
 # Configuration
-API_URL = "http://localhost:8000/recommend"
 TEST_FILE = "data/Gen_AI_Dataset_Test.csv"
 OUTPUT_FILE = "predictions_submission.csv"
+MAX_RESULTS = 10  # Max 10 as per requirement
+CANDIDATES = 15   # Same candidate pool as /recommend
+
 
-print("🔍 Loading test set...")
-test_df = pd.read_csv(TEST_FILE, encoding='cp1252')
-print(f"✅ Loaded {len(test_df)} test queries\n")
+def predict_batch(queries: list) -> list:
+    """(query, url) rows for a batch of queries, one batched encode"""
+    index, assessments = api_fixed.load_index()
+    results = batch_multi_vector_search(index, queries, CANDIDATES, api_fixed.CHUNK_AGGREGATION)
 
-results = []
+    rows = []
+    for query, result in zip(queries, results):
+        for rec in api_fixed.rank_candidates(assessments, query, result)[:MAX_RESULTS]:
+            rows.append((query, assessments[rec["row"]].url))
+    return rows
 
-for idx, row in test_df.iterrows():
-    query = row['Query']
-    
-    print(f"Query {idx+1}/{len(test_df)}:")
-    print(f"  {query[:80]}...")
-    
+
+def init_worker(threads: int):
+    """Split CPU threads between workers instead of oversubscribing"""
     try:
-        # Call your API
-        response = requests.post(
-            API_URL,
-            json={"text": query, "use_ai": False},  # Disable AI for faster response
-            timeout=30
-        )
-        response.raise_for_status()
-        
-        recommendations = response.json()['recommendations']
-        
-        # Add each recommendation as separate row (required format)
-        for rec in recommendations[:10]:  # Max 10 as per requirement
-            results.append({
-                'Query': query,
-                'Assessment_url': rec['url']
-            })
-        
-        print(f"  ✅ Generated {len(recommendations)} recommendations\n")
-        
-    except Exception as e:
-        print(f"  ❌ Error: {str(e)}\n")
-        # Add at least one dummy recommendation to avoid empty results
-        results.append({
-            'Query': query,
-            'Assessment_url': 'https://www.shl.com/products/product-catalog/'
-        })
-    
-    time.sleep(1)  # Rate limiting
-
-# Save in required format
-output_df = pd.DataFrame(results)
-output_df.to_csv(OUTPUT_FILE, index=False)
-
-print("=" * 70)
-print(f"🎉 SUCCESS!")
-print(f"   Total predictions: {len(results)}")
-print(f"   Queries processed: {len(test_df)}")
-print(f"   Saved to: {OUTPUT_FILE}")
-print("=" * 70)
-
-# Verify format
-print("\nFirst 5 rows of submission:")
-print(output_df.head())
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline batch predictions for the test set")
+    parser.add_argument("--input", default=TEST_FILE)
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    print("🔍 Loading test set...")
+    queries = load_queries(args.input)
+    print(f"✅ Loaded {len(queries)} test queries\n")
+
+    start = time.perf_counter()
+
+    # Load model, index and catalog once; forked workers share them
+    print("🔄 Loading index and model...")
+    api_fixed.load_index()
+
+    batches = [queries[i:i + args.batch_size] for i in range(0, len(queries), args.batch_size)]
+    workers = max(1, min(args.workers, len(batches)))
+
+    total = 0
+    with open(args.output, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Query", "Assessment_url"])
+
+        if workers == 1:
+            results = map(predict_batch, batches)
+            pool = None
+        else:
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            pool = get_context("fork").Pool(workers, initializer=init_worker, initargs=(threads,))
+            results = pool.imap(predict_batch, batches)
+
+        try:
+            for i, rows in enumerate(results, 1):
+                writer.writerows(rows)
+                f.flush()
+                total += len(rows)
+                print(f"   Batch {i}/{len(batches)}: {len(rows)} predictions")
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+    elapsed = time.perf_counter() - start
+
+    print("=" * 70)
+    print(f"🎉 SUCCESS!")
+    print(f"   Total predictions: {total}")
+    print(f"   Queries processed: {len(queries)}")
+    print(f"   Workers: {workers}, time: {elapsed:.2f}s")
+    print(f"   Saved to: {args.output}")
+    print("=" * 70)
+
+    # Verify format
+    print("\nFirst 5 rows of submission:")
+    print(pd.read_csv(args.output).head())
+
+
+if __name__ == "__main__":
+    main()
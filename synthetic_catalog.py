@@ -0,0 +1,133 @@
+"""
+Synthetic Catalog Generator
+Scales the catalog to 10k / 100k / 1M items for ANN and memory benchmarks
+- With an exported index (rag.py), every synthetic item is a jittered copy of
+  a real assessment: its vector is perturbed and re-normalized, its metadata
+  copied with a variant name/URL
+- Without one, clustered random unit vectors stand in for the embeddings
+
+Writes the same files as rag.py's export, so the output directory can be
+served directly: SHL_INDEX_DIR=data/synthetic/100k SHL_INDEX=ivf
+
+Usage: python synthetic_catalog.py --size 100000 [--out data/synthetic/100k] [--ann ivf]
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+from app.retrieval import EMBEDDINGS_FILE, METADATA_FILE
+from app.ann_index import ANN_KINDS, build_ann_index
+
+
+INDEX_DIR = os.path.join("app", "chroma_db")
+DIM = 384
+# Noise norm relative to the source vector / cluster centre
+ITEM_NOISE = 0.6
+QUERY_NOISE = 0.5
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def synthetic_vectors(n: int, dim: int = DIM, seed: int = 0, base: np.ndarray = None) -> tuple:
+    """
+    (unit vectors, source row of each) - jittered copies of `base` rows, or of
+    random cluster centres (~500 items per cluster) when no base is given
+    """
+    rng = np.random.default_rng(seed)
+    if base is None:
+        base = rng.normal(size=(max(8, n // 500), dim))
+        noise = ITEM_NOISE
+    else:
+        # Real embeddings are unit vectors, random centres are not: scale noise per component
+        noise = ITEM_NOISE / np.sqrt(base.shape[1])
+    sources = rng.integers(0, len(base), n)
+    vectors = np.empty((n, base.shape[1]), dtype=np.float32)
+    for start in range(0, n, 65536):
+        rows = sources[start:start + 65536]
+        vectors[start:start + len(rows)] = _unit(base[rows] + noise * rng.normal(size=(len(rows), base.shape[1])))
+    return vectors, sources
+
+
+def synthetic_queries(vectors: np.ndarray, count: int = 200, seed: int = 1) -> np.ndarray:
+    """Perturbed copies of random catalog rows - each has near neighbours to find"""
+    rng = np.random.default_rng(seed)
+    picks = np.asarray(vectors[rng.integers(0, len(vectors), count)])
+    return _unit(picks + QUERY_NOISE / np.sqrt(vectors.shape[1]) * rng.normal(size=picks.shape))
+
+
+def synthetic_corpus(n: int, dim: int = DIM, queries: int = 200, seed: int = 0) -> tuple:
+    """Clustered unit vectors (like catalog embeddings) and queries near them"""
+    vectors, _ = synthetic_vectors(n, dim, seed)
+    return vectors, synthetic_queries(vectors, queries, seed + 1)
+
+
+def load_base(index_dir: str = INDEX_DIR) -> tuple:
+    """(embeddings, metadatas) of the real export, or (None, None) before rag.py has run"""
+    embeddings_path = os.path.join(index_dir, EMBEDDINGS_FILE)
+    metadata_path = os.path.join(index_dir, METADATA_FILE)
+    if not (os.path.exists(embeddings_path) and os.path.exists(metadata_path)):
+        return None, None
+    with open(metadata_path, "r", encoding="utf-8") as f:
+        return np.load(embeddings_path), json.load(f)
+
+
+def synthetic_metadata(i: int, source: int, base_metadatas=None) -> dict:
+    if base_metadatas:
+        item = dict(base_metadatas[source])
+        item["name"] = f"{item['name']} (variant {i})"
+        item["url"] = f"{item['url'].rstrip('/')}-variant-{i}/"
+        return item
+    return {
+        "name": f"Synthetic Assessment {i}",
+        "url": f"https://example.com/assessments/synthetic-{i}/",
+        "description": f"Synthetic assessment {i} in cluster {source}",
+        "duration": f"{10 + i % 50} minutes",
+        "languages": "English",
+        "job_level": "Not specified",
+        "remote_testing": "Yes",
+        "adaptive_support": "No",
+        "test_type": "K",
+    }
+
+
+def write_catalog(out_dir: str, size: int, seed: int = 0, base_dir: str = INDEX_DIR) -> np.ndarray:
+    """Embeddings + metadata in rag.py's export format; returns the embeddings"""
+    base, base_metadatas = load_base(base_dir)
+    vectors, sources = synthetic_vectors(size, seed=seed, base=base)
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, EMBEDDINGS_FILE), vectors)
+    with open(os.path.join(out_dir, METADATA_FILE), "w", encoding="utf-8") as f:
+        json.dump([synthetic_metadata(i, int(s), base_metadatas) for i, s in enumerate(sources)], f,
+                  ensure_ascii=False)
+    return vectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic catalog generator")
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--out", default=None, help="Default: data/synthetic/<size>")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ann", choices=ANN_KINDS, action="append", default=[],
+                        help="Also build this ANN index (repeatable)")
+    args = parser.parse_args()
+    out_dir = args.out or os.path.join("data", "synthetic", str(args.size))
+
+    print("🚀 Synthetic Catalog Generator")
+    print("=" * 70)
+    if load_base()[0] is None:
+        print(f"⚠️  No export in {INDEX_DIR} - using random clustered vectors (run rag.py for realistic ones)")
+
+    vectors = write_catalog(out_dir, args.size, args.seed)
+    print(f"✅ Wrote {len(vectors)} items ({vectors.nbytes / 1e6:.1f} MB of vectors) to: {out_dir}")
+    for kind in args.ann:
+        path = build_ann_index(out_dir, kind)
+        print(f"✅ Built {kind} index: {path}")
+
+
+if __name__ == "__main__":
+    main()